@@ -1,507 +1,265 @@
+import time
+
+_rerun_start = time.perf_counter()  # 재실행마다 초기화에 걸리는 시간 측정 시작
+
 import streamlit as st
-import subprocess
+import streamlit.components.v1 as components
 import os
 import re
-from langchain_community.llms import Ollama
-from langchain_chroma import Chroma
-from langchain_ollama import OllamaEmbeddings
-from uuid import uuid4
-import pandas as pd
-import json
-
-# Ollama & Chroma 설정
-LLM_BASE_URL = "http://localhost:11434"
-llm = Ollama(model="llama3.2:1b", base_url=LLM_BASE_URL)
-embeddings = OllamaEmbeddings(base_url=LLM_BASE_URL, model="llama3.2:1b")
-
-# Chroma 클라이언트 설정 함수
-def create_chroma_client(collection_name):
-    return Chroma(
-        collection_name=collection_name,
-        embedding_function=embeddings,
-        persist_directory="./chroma_db"
-    )
-
-# Chroma 클라이언트 생성
-chroma_client_pdf = create_chroma_client("pa_documents")
-chroma_client_api_list = create_chroma_client("api_list")
-chroma_client_api_spec = create_chroma_client("api_spec")
-chroma_client_dbTable = create_chroma_client("dbTable")
-chroma_client_puml = create_chroma_client("puml") 
+import secrets
+import sys
+from python_script import resources
+from python_script.answer import AnswerStats
+from python_script.history import HISTORY_MAX_LOADED, HISTORY_PAGE, HISTORY_WINDOW, fold_summary, history_context
+from python_script.jobs import DONE, FAILED, QUEUED, RUNNING
+from python_script.resources import UPLOAD_DIR, UPLOADS_DIR, UML_ORIGINAL, UML2IMG
+from python_script.retrieval import format_retrieval_timings
+from python_script.tracing import span, tracer
+
+# Ollama & Chroma 설정 (프로세스당 한 번만 생성되고, 모든 세션과 재실행이 같은 객체를 공유)
+embeddings = resources.get_embeddings()
+job_queue = resources.get_job_queue()
+response_cache = resources.get_response_cache()
+service = resources.get_service()  # 업로드 적재, 조회, 답변 생성은 서비스가 처리하고 여기서는 화면만 그림
+image_cache = resources.get_image_cache()
+history_store = resources.get_history_store()
+metrics_server = resources.get_metrics_server()  # METRICS_PORT가 있을 때만 /metrics 제공
+profiler = resources.get_profiler()  # TRACE_PROFILE=1일 때만 사용
+
+# Chroma 클라이언트 생성 (적재/검색 모듈은 같은 객체를 resources에서 꺼내 씀)
+for collection_name in resources.COLLECTIONS:
+    resources.get_chroma_client(collection_name)
+
+# 임베딩 모델 예열 (첫 질문/적재에서 모델 로딩 시간을 기다리지 않도록 시작할 때 한 번 호출, 실패도 한 번만 시도)
+for backend, error in resources.warm_up_embeddings().items():
+    st.sidebar.warning(f"임베딩 모델 예열 실패 ({backend}): {error}")
 
 # Streamlit UI 제목
 st.title("Llama3.2: 1b 모델 탑재한 챗봇")
 
 # 경로 설정
-UPLOAD_DIR = "/proj/mini-chat-bot/chatbot/data_result"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
-PY_SCRIPT_DIR = "/proj/mini-chat-bot/chatbot/python_script"
-UML_ORIGINAL = os.path.join(UPLOAD_DIR, "UML_ORIGINAL") # puml
-UML2IMG = os.path.join(UPLOAD_DIR, "UML2IMG") # puml
+os.makedirs(UPLOADS_DIR, exist_ok=True)  # 업로드별 작업 폴더 (동시에 올린 같은 이름의 파일끼리 덮어쓰지 않음)
 os.makedirs(UML_ORIGINAL, exist_ok=True) # puml
 os.makedirs(UML2IMG, exist_ok=True) # puml
 
-# 세션 상태 초기화
-if "messages" not in st.session_state:
-    st.session_state.messages = []
-if "processed_files" not in st.session_state:
-    st.session_state.processed_files = set()
-if "current_pdf" not in st.session_state:
-    st.session_state.current_pdf = None
-
-# PDF 처리 함수
-def process_pdf(file_path):
-    pdf_file_name = os.path.basename(file_path)
-    pdf_name_only = os.path.splitext(pdf_file_name)[0]
-
-    # PDF별 PNG 저장 폴더 설정
-    pdf_png_dir = os.path.join(UPLOAD_DIR, "DEVIDED_PDF_DIR", pdf_name_only)
-
-    scripts = ["devide_pdf.py", "pdf2txt.py", "del_noWF.py", "pa_number.py"]
-
-    with st.spinner(f"{pdf_file_name} 처리중..!"):
-        for script in scripts:
-            script_path = os.path.join(PY_SCRIPT_DIR, script)
-            if not os.path.exists(script_path):
-                st.error(f"{script} 경로가 존재하지 않습니다! ❌")
-                continue
-
-            result = subprocess.run(["python", script_path, file_path], capture_output=True, text=True)
-
-            # 실행 결과 출력
-            if result.returncode == 0:
-                st.success(f"{script} 실행 완료 ✅")
-            else:
-                st.error(f"{script} 실행 중 오류 발생 ❌\n{result.stderr}")
-                continue
-
-    # PA 넘버 파일 경로 설정
-    PA_FILE = os.path.join(UPLOAD_DIR, "EXTRACTED_ONLY_PA_NUMBER_EACHPAGE", f"{pdf_name_only}_pa_number.txt")
-
-    # PA 넘버 파일이 존재하는지 확인
-    if not os.path.exists(PA_FILE):
-        st.error("PA 넘버 파일이 존재하지 않습니다! ❌")
-        return []
-
-    # 1. Chroma DB에 저장할 데이터 정리
-    pa_mapping = {}
-
-    with open(PA_FILE, 'r', encoding='utf-8') as f:
-        content = f.read().strip()
-
-    # PA 넘버 정보 매핑
-    matches = re.findall(r'--- page_(\d+) ---\n(.*)', content)
-    for match in matches:
-        page_number = int(match[0])
-        pa_number = match[1].strip()
-        if pa_number.lower() != "none":  # PA넘버가 'None'인 결과값은 저장하지 않음
-            pa_mapping[page_number] = pa_number
-
-    # 2. PDF 이미지와 PA 넘버 매칭 후 Chroma DB 저장
-    documents, ids, embeddings_list, metadatas = [], [], [], []
-
-    for page_file in sorted(os.listdir(pdf_png_dir)):
-        match = re.search(r'page_(\d+)\.png', page_file)
-        if match:
-            page_number = int(match.group(1))
-            if page_number in pa_mapping:
-                pa_number = pa_mapping[page_number]
-                image_path = os.path.join(pdf_png_dir, page_file)
-
-                # 문서 내용과 메타데이터 구성
-                doc_content = f"PA 넘버: {pa_number}"
-                doc_metadata = {
-                    "pa_number": pa_number,
-                    "image_path": image_path,
-                    "pdf_filename": pdf_file_name
-                }
-
-                # ChromaDB 저장을 위한 데이터 리스트 구성
-                documents.append(doc_content)
-                metadatas.append(doc_metadata)
-                ids.append(str(uuid4()))
-                embeddings_list.append(embeddings.embed_query(doc_content))
-
-    # 3. ChromaDB에 upsert 방식으로 저장
-    if documents:
-        chroma_client_pdf._collection.upsert(
-            ids=ids,
-            embeddings=embeddings_list,
-            metadatas=metadatas,
-            documents=documents
+# 세션 ID 쿠키 설정 (새로고침해도 같은 세션의 최근 대화와 적재 작업을 다시 보여주기 위해 사용)
+# 세션 ID만 알면 대화 기록과 작업 목록을 볼 수 있으므로, 공유되는 URL에는 넣지 않고 추측할 수 없는 값을 씀
+SESSION_COOKIE = "chatbot_session"
+SESSION_COOKIE_MAX_AGE = 30 * 24 * 3600  # 초
+SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{43}")  # secrets.token_urlsafe(32) 형식
+
+# 세션 상태 초기화 (messages에는 최근 HISTORY_WINDOW개만 두고 전체 기록은 history_store에 저장)
+if "session_id" not in st.session_state:
+    if "session" in st.query_params:
+        del st.query_params["session"]  # 예전 방식(?session=...)으로 공유된 링크의 세션 ID는 쓰지 않음
+    session_id = st.context.cookies.get(SESSION_COOKIE, "")
+    if not SESSION_ID_PATTERN.fullmatch(session_id):
+        session_id = secrets.token_urlsafe(32)
+        # 브라우저에 쿠키로 저장 (컴포넌트 iframe은 앱과 같은 출처이므로 부모 문서의 쿠키를 쓸 수 있음)
+        components.html(
+            f"<script>window.parent.document.cookie = '{SESSION_COOKIE}={session_id}; path=/; "
+            f"max-age={SESSION_COOKIE_MAX_AGE}; SameSite=Strict';</script>",
+            height=0,
         )
+    st.session_state.session_id = session_id
+    st.session_state.messages = history_store.page(session_id, sys.maxsize, HISTORY_WINDOW)
+    st.session_state.summary = history_store.summary(session_id)  # 창 밖으로 밀려난 대화의 요약 (크기 제한 있음)
+    st.session_state.older_messages = []  # "이전 대화 더 보기"로 불러온 메시지
+if "job_ids" not in st.session_state:
+    st.session_state.job_ids = {}  # (파일명, 업로드 file_id) -> 작업 ID
+
+# 초기화 시간 기록 (첫 실행은 리소스 생성 포함, 이후 실행은 재사용 비용만 포함)
+rerun_setup_time = time.perf_counter() - _rerun_start
+if "first_setup_time" not in st.session_state:
+    st.session_state.first_setup_time = rerun_setup_time
+    st.session_state.rerun_count = 0
+    st.session_state.rerun_setup_total = 0.0  # 최초 실행을 뺀 재실행 초기화 시간 합계 (평균 계산용)
+else:
+    st.session_state.rerun_setup_total += rerun_setup_time
+st.session_state.rerun_count += 1
+
+# 파일 업로드 섹션 (여러 파일을 한 번에 올리면 백그라운드에서 동시에 처리)
+uploaded_files = st.file_uploader(
+    "파일을 업로드하세요.(pdf, xlsx, puml)",
+    type=["pdf", "xlsx", "puml"],
+    accept_multiple_files=True
+)
+
+# 파일 업로드 후 처리: 작업 큐에 등록만 하고 실제 처리는 워커가 수행하므로 채팅이 막히지 않음
+for uploaded_file in uploaded_files or []:
+    # 업로더의 file_id는 업로드마다 달라지므로 재실행마다 다시 등록하지 않도록 키로 사용
+    upload_key = (uploaded_file.name, uploaded_file.file_id)
+    if upload_key in st.session_state.job_ids:
+        continue  # 이번 세션에서 이미 등록한 업로드
+
+    # 파일 내용 해시가 매니페스트와 같으면 이미 처리된 파일이므로 건너뜀
+    job_id = service.submit_upload(uploaded_file.name, uploaded_file.getvalue(), st.session_state.session_id)
+    if job_id is None:
+        st.info(f"이미 처리된 파일입니다 (변경 사항 없음): {uploaded_file.name}")
+    st.session_state.job_ids[upload_key] = job_id
+
+# 적재 작업 진행 상황 (이 부분만 1초마다 다시 그려서 채팅 입력을 방해하지 않음)
+JOB_STATUS_LABELS = {QUEUED: "대기 중", RUNNING: "처리 중", DONE: "완료", FAILED: "실패"}
+JOB_STATUS_STATES = {QUEUED: "running", RUNNING: "running", DONE: "complete", FAILED: "error"}
+
+@st.fragment(run_every=1)
+def show_ingest_jobs():
+    # 이 세션에서 등록한 작업만 표시 (다른 사용자의 업로드는 보이지 않고, 새로고침해도 유지)
+    for job in job_queue.store.recent(st.session_state.session_id):
+        label = f"{job['file_name']} · {JOB_STATUS_LABELS[job['status']]}"
+        if job["stage"]:
+            label += f" · {job['stage']}"
+        with st.status(label, state=JOB_STATUS_STATES[job["status"]], expanded=job["status"] == RUNNING):
+            for message in job["messages"]:
+                getattr(st, message["level"])(message["text"])
+
+show_ingest_jobs()
+
+def render_images(images, message_key):
+    """메시지의 이미지를 미리보기로 표시하고, 원본은 원본 보기를 켠 이미지만 읽어서 표시"""
+    if not images:
+        return
+    start = time.perf_counter()
+    total_bytes = 0
+    with span("chat.render_images", images=len(images)) as render_span:
+        for i, (image_path, caption) in enumerate(images):
+            data = image_cache.preview(image_path)
+            if data is None:
+                continue
+            st.image(data, caption=caption)
+            total_bytes += len(data)
+            if st.toggle("원본 보기", key=f"original-{message_key}-{i}"):
+                original = image_cache.original(image_path)
+                st.image(original, caption=f"{caption} (원본)")
+                total_bytes += len(original)
+        render_span.set(bytes=total_bytes)
+    # 메시지별 이미지 전송량과 표시 시간
+    st.caption(f"이미지 {len(images)}개 · {total_bytes / 1024:.0f}KB · {(time.perf_counter() - start) * 1000:.1f}ms")
+
+def add_message(message):
+    """메시지를 기록 저장소에 저장하고 세션의 최근 메시지에 추가"""
+    message["seq"] = history_store.append(st.session_state.session_id, message)
+    st.session_state.messages.append(message)
+
+def trim_history():
+    """최근 HISTORY_WINDOW개를 넘는 메시지는 세션에서 빼고 요약에 합침 (원문은 history_store에 남아 있음)"""
+    overflow = len(st.session_state.messages) - HISTORY_WINDOW
+    if overflow > 0:
+        evicted = st.session_state.messages[:overflow]
+        del st.session_state.messages[:overflow]
+        st.session_state.summary = fold_summary(st.session_state.summary, evicted)
+        history_store.save_summary(st.session_state.session_id, st.session_state.summary)
+        # 이전 대화를 펼쳐 둔 상태면 빠진 메시지를 이어 붙여 중간이 비지 않게 함 (오래된 것부터 버림)
+        if st.session_state.older_messages:
+            st.session_state.older_messages.extend(evicted)
+            del st.session_state.older_messages[:-HISTORY_MAX_LOADED]
+
+# 이전 대화: 버튼을 누를 때만 SQLite에서 한 페이지씩 읽어 옴 (이미지는 다시 그리지 않음)
+older = st.session_state.older_messages
+window = st.session_state.messages
+first_seq = older[0]["seq"] if older else (window[0]["seq"] if window else 1)
+if first_seq > 1:
+    columns = st.columns(2)
+    if len(older) < HISTORY_MAX_LOADED and columns[0].button(f"이전 대화 더 보기 ({first_seq - 1}개)"):
+        older[:0] = history_store.page(st.session_state.session_id, first_seq, HISTORY_PAGE)
+    if older and columns[1].button("이전 대화 접기"):
+        older.clear()
+for msg in older:
+    with st.chat_message(msg["role"]):
+        st.markdown(msg["content"])
+        if msg.get("images"):
+            st.caption(f"이미지 {len(msg['images'])}개 (이전 대화는 이미지를 표시하지 않음)")
 
-        # 세션 상태 업데이트
-        st.session_state.processed_files.add(pdf_file_name)
-        st.session_state.current_pdf = pdf_file_name
-        st.success(f"✅ {len(documents)}개의 페이지 데이터가 ChromaDB에 저장되었습니다!")
-
-    return list(pa_mapping.values())
-
-# api_list 데이터 chroma db 적제
-def store_api_list_in_chroma(excel_file_path):
-    API_LIST_DIR = os.path.join(UPLOAD_DIR, "API_LIST_DIR")
-    json_output_path = os.path.join(API_LIST_DIR, f"{os.path.splitext(os.path.basename(excel_file_path))[0]}.json")
-
-    if not os.path.exists(json_output_path):
-        st.error(f"API 리스트 JSON 파일을 찾을 수 없습니다: {json_output_path}")
-        return False
-
-    with open(json_output_path, "r", encoding="utf-8") as f:
-        api_data = json.load(f)
-
-    documents, metadatas, ids, embeddings_list = [], [], [], []
-
-    for sheet in api_data["API리스트"]:
-        for item in sheet["data"]:
-            api_id = item.get("API ID", "") or "" # api_list.py의 결과물에서 API ID 추출(ex.CMM001)
-            pa_number = item.get("사용화면아이디\n(없으면 비화면 API)", "") or "" # api_list.py의 결과물에서 사용화면아이디\n(없으면 비화면 API) 추출(ex.PA1201001)
-
-            # 모든 키-값 쌍을 문자열로 변환하여 document에 추가
-            doc_content = "\n".join([f"{k}: {v}" for k, v in item.items() if v is not None])
-
-            documents.append(doc_content)
-            metadatas.append({
-                "source_file": excel_file_path,
-                "sheet_name": sheet["sheet_name"],
-                "api_id": api_id,
-                "pa_number": pa_number
-            })
-            ids.append(str(uuid4()))
-            embeddings_list.append(embeddings.embed_query(doc_content))
-
-    # ChromaDB에 저장
-    chroma_client_api_list._collection.upsert(
-        ids=ids,
-        documents=documents,
-        metadatas=metadatas,
-        embeddings=embeddings_list
-    )
-
-    st.success(f"✅ API 리스트 {len(documents)}개가 ChromaDB에 저장되었습니다!")
-    return True
-
-# API명세서 데이터 chroma db 적제
-def store_api_spec_in_chroma(excel_file_path):
-    API_DIR = os.path.join(UPLOAD_DIR, "API_DIR")
-    json_output_path = os.path.join(API_DIR, f"{os.path.splitext(os.path.basename(excel_file_path))[0]}.json")
-
-    if not os.path.exists(json_output_path):
-        st.error(f"API명세서 JSON 파일을 찾을 수 없습니다: {json_output_path}")
-        return False
-
-    with open(json_output_path, "r", encoding="utf-8") as f:
-        api_spec_data = json.load(f)
-
-    documents, metadatas, ids, embeddings_list = [], [], [], []
-    for sheet_name, api_spec_list in api_spec_data.items(): # "API명세서"로 시작하는 시트이름으로 iteration
-        for item in api_spec_list:
-            # API ID 추출 (ex. item["설명"]["API ID"]
-            api_id = item.get("설명", {}).get("API ID", "") or "" # api_specification.py의 결과물에서 "설명":{"API ID": "CMM001"} → "CMM001" 추출
-
-            # document에는 API ID만 저장
-            doc_content = f"API ID: {api_id}"
-
-            # API 명세 정보를 JSON 문자열로 변환하여 저장
-            api_spec_info = json.dumps(item, ensure_ascii=False)
-
-            metadata = {
-                "api_id": api_id, # API ID를 metadata에 추가
-                "source_file": excel_file_path,
-                "sheet_name": sheet_name,
-                "api_spec_info": api_spec_info  # API 명세 정보를 JSON 문자열로 저장
-            }
-
-            documents.append(doc_content)
-            metadatas.append(metadata)
-            ids.append(str(uuid4()))
-            embeddings_list.append(embeddings.embed_query(doc_content))
-    # Chroma DB에 저장
-    chroma_client_api_spec._collection.upsert(
-        ids=ids,
-        documents=documents,
-        metadatas=metadatas,
-        embeddings=embeddings_list
-    )
-
-    st.success(f"✅ API 명세서 {len(documents)}개가 ChromaDB에 저장되었습니다!")
-    return True
-
-# 엑셀 파일 처리 및 ChromaDB 저장 함수
-def process_excel(file_path):
-    file_name = os.path.basename(file_path)
-
-    if file_name in st.session_state.processed_files:
-        st.error(f"이미 처리된 파일입니다: {file_name}")
-        return False
-
-    try:
-        # 엑셀 파일 관련 스크립트 실행
-        scripts = []
-        xls = pd.ExcelFile(file_path)
-        sheets = xls.sheet_names
-
-        if any("DB_TABLE" in sheet for sheet in sheets):
-            scripts.append("dbTable2json.py")
-        if any("기능목록정의서" in sheet for sheet in sheets):
-            scripts.append("fc.py")
-        if any("API명세서" in sheet for sheet in sheets):
-            scripts.append("api_specification.py")
-        if any("API리스트" in sheet for sheet in sheets):
-            scripts.append("api_list.py")
-
-        for script in scripts:
-            script_path = os.path.join(PY_SCRIPT_DIR, script)
-            result = subprocess.run(
-                ["python", script_path, file_path],
-                capture_output=True,
-                text=True
-            )
-            if result.returncode == 0:
-                st.success(f"{script} 실행 완료 ✅")
-            else:
-                st.error(f"{script} 실행 실패 ❌\n{result.stderr}")
-                return False  # 스크립트 실패 시 즉시 종료
-
-        # API 리스트 및 명세서 ChromaDB에 저장
-        success_api_list = store_api_list_in_chroma(file_path)
-        # API 명세서를 ChromaDB에 저장
-        success_api_spec = store_api_spec_in_chroma(file_path)
-
-        if success_api_list and success_api_spec:
-            st.session_state.processed_files.add(file_name)
-            st.success(f"✅ 엑셀 파일({file_name}) 처리 완료!")
-            return True
-        else:
-            st.error("❌ 엑셀 파일의 API 리스트 또는 명세서 ChromaDB 저장 실패!")
-            return False
-
-    except Exception as e:
-        st.error(f"❌ 엑셀 처리 중 오류 발생: {str(e)}")
-        return False
-
-# UML 파일 처리 및 업로드 함수
-def process_puml(file_path):
-    file_name = os.path.basename(file_path)
-    if file_name in st.session_state.processed_files:
-        st.error(f"이미 처리된 파일입니다!!: {file_name}")
-        return False
-
-    try:
-        # puml 파일 관련 스크립트 실행
-        script_path = os.path.join(PY_SCRIPT_DIR, "convert_uml2img.py")
-        result = subprocess.run(
-            ["python", script_path, file_path],
-            capture_output=True,
-            text=True
-        )
-
-        if result.returncode == 0:
-            # Extract the returned values from the standard output
-            output_lines = result.stdout.strip().split('\n')
-            png_path = None
-            title_code = None
-            db_tables = None
-
-            for line in output_lines:
-                if line.startswith("PNG Path:"):
-                    png_path = line.split("PNG Path:")[1].strip()
-                elif line.startswith("Title Code:"):
-                    title_code = line.split("Title Code:")[1].strip()
-                elif line.startswith("DB Tables:"):
-                    db_tables = line.split("DB Tables:")[1].strip().replace("[","").replace("]","").replace("'","").split(", ")
-
-            if png_path and title_code and db_tables:
-                # Store data in ChromaDB
-                doc_content = f"UML Diagram for API ID: {title_code}"
-                metadata = {
-                    "api_id": title_code,
-                    "db_name": db_tables,
-                    "png_path": png_path,
-                    "source_file": file_name
-                }
-                chroma_client_puml._collection.upsert(
-                    ids=[str(uuid4())],
-                    documents=[doc_content],
-                    metadatas=[metadata],
-                    embeddings=[embeddings.embed_query(doc_content)]
-                )
-
-                st.success(f"✅ UML 파일({file_name}) 처리 완료! API ID: {title_code}, DB Tables: {db_tables}")
-                st.session_state.processed_files.add(file_name)  # Mark as processed
-                return True
-            else:
-                st.error("❌ UML 파일 처리 중 필요한 정보 추출 실패!")
-                return False
-        else:
-            st.error(f"❌ convert_uml2img.py 실행 실패 ❌\n{result.stderr}")
-            return False
-
-    except Exception as e:
-        st.error(f"❌ puml 처리 중 오류 발생: {str(e)}")
-        return False
-
-# 파일 업로드 섹션
-uploaded_file = st.file_uploader("파일을 업로드하세요.(pdf, xlsx, puml)", type=["pdf", "xlsx", "puml"])
-
-# 파일 업로드 후 처리
-if uploaded_file:
-    file_path = os.path.join(UPLOAD_DIR, uploaded_file.name)
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-
-    file_extension = uploaded_file.name.split(".")[-1].lower()
-
-    if file_extension == "pdf":
-        if uploaded_file.name not in st.session_state.processed_files:
-            try:
-                pa_numbers = process_pdf(file_path)
-                if pa_numbers:
-                    st.success(f"✅ 새로운 PDF 파일({uploaded_file.name})이 처리되었습니다!")
-            except Exception as e:
-                st.error(f"❌ PDF 처리 실패: {str(e)}")
-
-    elif file_extension == "xlsx":
-        success = process_excel(file_path)
-        if not success:
-            st.error("❌ 엑셀 처리 실패!")
-
-    elif file_extension == "puml":
-        success = process_puml(file_path)
-        if not success:
-            st.error("🚫 puml 파일 처리 실패!!")
-    else:
-        st.error("❌ 지원하지 않는 파일 형식입니다. (pdf, xlsx, puml 파일만 업로드 가능)")
-
-# API 정보 검색 함수
-def search_api_info(pa_number):
-    query_embedding = embeddings.embed_query(pa_number)
-    results = chroma_client_api_list._collection.query(
-        query_embeddings=[query_embedding],
-        n_results=5,
-        where={"pa_number": pa_number}
-    )
-    return results
-
-# API 명세 정보 검색 함수
-def search_api_spec_info(api_id):
-    query_embedding = embeddings.embed_query(api_id)
-    results = chroma_client_api_spec._collection.query(
-        query_embeddings=[query_embedding],
-        n_results=5,  
-        where={"api_id": api_id}
-    )
-    return results
-
-# UML 정보 검색 함수
-def search_uml_info(api_id):
-    results = chroma_client_puml._collection.query(
-        query_embeddings=[embeddings.embed_query(api_id)],
-        n_results=5,
-        where={"api_id": api_id}
-    )
-    return results
-
-# 채팅 UI
+# 채팅 UI (최근 메시지만 그림)
 for msg in st.session_state.messages:
     with st.chat_message(msg["role"]):
+        render_images(msg.get("images"), msg["seq"])
         st.markdown(msg["content"])
 
 # 사용자 입력 처리
 user_input = st.chat_input("질문을 입력하세요...")
 if user_input:
-    st.session_state.messages.append({"role": "user", "content": user_input})
-
-    # 1. PA 넘버 추출
-    pa_number_match = re.search(r'PA\d+', user_input)
-    pa_number = pa_number_match.group(0) if pa_number_match else None
-
-    # 2. PDF 파일명 추출(".pdf"가 포함된 문자열)
-    pdf_filename_match = re.search(r"([\w\-]+\.pdf)", user_input)
-    pdf_filename = pdf_filename_match.group(1) if pdf_filename_match else None
-
-    # API ID 추출 시도
-    api_id_match = re.search(r'API ID: (\w+)', user_input)
-    api_id = api_id_match.group(1) if api_id_match else None
-
-    if pa_number_match and pdf_filename_match:
-        pa_number = pa_number_match.group(0)
-        pdf_filename = pdf_filename_match.group(1)
-
-        # 3. ChromaDB에서 검색 (PA 넘버와 PDF 파일명이 일치하는 데이터 찾기)
-        pdf_results = chroma_client_pdf._collection.query(
-            query_embeddings=[embeddings.embed_query(pa_number)],
-            n_results=10,
-            where={
-                "$and": [
-                    {"pa_number": pa_number},
-                    {"pdf_filename": pdf_filename}
-                ]
-            }
-        )
-
-        # 4. api_list에서 PA 넘버 관련 정보 검색
-        api_list_results = search_api_info(pa_number)
-
-        if api_list_results['documents'] and pdf_results['documents']:
-            # api_list_info를 문자열로 결합하기 전에 데이터 구조 확인
-            if isinstance(api_list_results['documents'][0], list):
-                api_list_info = "\n".join(api_list_results['documents'][0])  # 첫 번째 리스트의 요소만 사용
+    # 프롬프트에 넣을 이전 대화 (요약 + 토큰 예산 안의 최근 대화)
+    history = history_context(st.session_state.summary, st.session_state.messages)
+    user_message = {"role": "user", "content": user_input}
+    add_message(user_message)
+    with st.chat_message("user"):
+        st.markdown(user_input)
+
+    # 1. 질문에서 추출한 키로 캐시를 확인하고, 없으면 ChromaDB 조회 (서비스가 모든 세션의 캐시/연결을 공유)
+    context = service.prepare_answer(user_input)
+    if context["cached"] is not None:
+        message_images = context["cached"]["images"]
+        response = context["cached"]["response"]
+        with st.chat_message("assistant"):
+            render_images(message_images, user_message["seq"] + 1)
+            st.markdown(response)
+            st.caption(f"캐시된 응답 ({'같은 키' if context['cache_hit'] == 'key' else '비슷한 질문'})")
+    else:
+        # 2. 검색 결과를 토큰 예산 안에서 프롬프트로 만들어 답변을 스트리밍
+        message_images = context["images"]
+        with st.chat_message("assistant"):
+            if context["error"]:
+                st.warning(f"검색에 실패했습니다: {context['error']}")
+            render_images(message_images, user_message["seq"] + 1)
+
+            answer_stats = None
+            if context["sections"]:
+                prompt, context_tokens = service.build_prompt(context, history)
+                answer_stats = AnswerStats(context_tokens)
+                try:
+                    with span("chat.generate", profile=True, prompt_tokens=context_tokens) as generate_span:
+                        response = st.write_stream(service.stream(prompt, answer_stats))
+                        generate_span.set(tokens=answer_stats.tokens, ttft_ms=(answer_stats.ttft or 0) * 1000)
+                except Exception as e:
+                    st.warning(f"답변 생성에 실패해 검색 결과를 그대로 표시합니다: {str(e)}")
+                    answer_stats = None
+                    response = context["fallback"] or "관련 정보를 찾을 수 없습니다."
+                    st.markdown(response)
             else:
-                api_list_info = "\n".join(api_list_results['documents'])
-
-            # 5. API ID 추출
-            api_id_match = re.search(r'API ID: (\w+)', api_list_info)
-            api_id = api_id_match.group(1) if api_id_match else None
-
-            # 이미지 표시
-            images = []
-            for metadata in pdf_results['metadatas'][0]:
-                image_path = metadata.get('image_path', '')
-                if os.path.exists(image_path):
-                    images.append(image_path)
-
-            if images:
-                for img in images:
-                    st.image(img, caption=f"{pdf_filename}의 {pa_number}")
-
-                # 6. api_spec에서 API ID로 정보 검색
-                if api_id:
-                    api_spec_results = search_api_spec_info(api_id)
-
-                    # 디버깅으로 API Spec Results 출력
-                    st.write("API Spec Results:", api_spec_results)
-                    st.write("API Spec Results Metadatas:", api_spec_results['metadatas'])
-
-                    if api_spec_results and 'metadatas' in api_spec_results and api_spec_results['metadatas']:
-                        # metadatas가 이중 리스트 구조이므로 첫 번째 요소의 첫 번째 요소에 접근
-                        first_metadata = api_spec_results['metadatas'][0][0]
-                        if isinstance(first_metadata, dict) and 'api_spec_info' in first_metadata:
-                            api_spec_info = first_metadata['api_spec_info']
-                            try:
-                                api_spec = json.loads(api_spec_info)
-                                api_spec_str = json.dumps(api_spec, indent=4, ensure_ascii=False)
-                            except json.JSONDecodeError:
-                                api_spec_str = "API 명세 정보를 파싱하는 데 실패했습니다."
-                        else:
-                            api_spec_str = "API 명세 정보를 찾을 수 없습니다."
-                    else:
-                        api_spec_str = "API 명세 정보를 찾을 수 없습니다."
-
-                    response = f"{pdf_filename}에서 PA넘버: {pa_number} 관련 이미지 {len(images)}개와 API 정보:\n{api_list_info}\n\nAPI 명세 정보:\n{api_spec_str}"
-
-    # Check for API ID and search UML info
-    if api_id:
-        uml_results = search_uml_info(api_id)
-
-        if uml_results and uml_results['metadatas']:
-            uml_metadata = uml_results['metadatas'][0][0]  # Access the first element of the first list
-            uml_image_path = uml_metadata.get('png_path', None)
-
-            if uml_image_path and os.path.exists(uml_image_path):
-                st.image(uml_image_path, caption=f"UML Diagram for API ID: {api_id}")
-                response += f"\n\nUML Diagram:\n![UML Diagram]({uml_image_path})"  # Append to the response
-
-    st.session_state.messages.append({"role": "assistant", "content": response})
-    with st.chat_message("assistant"):
-        st.markdown(response)
\ No newline at end of file
+                response = "관련 정보를 찾을 수 없습니다."
+                st.markdown(response)
+
+            if context["retrieval"] is not None:
+                st.caption(f"검색 시간: {format_retrieval_timings(context['retrieval'])}")
+            if answer_stats is not None:
+                st.caption(f"답변 생성: {answer_stats.format()}")
+
+        # 답변 생성에 성공한 응답만 캐시
+        if answer_stats is not None:
+            service.remember(context, response)
+
+    add_message({"role": "assistant", "content": response, "images": message_images})
+    trim_history()
+
+# 최근 구간 기록과 지표 내보내기 (어느 단계에서 시간이 걸렸는지 확인용)
+with st.sidebar.expander("구간별 소요 시간"):
+    st.caption("구간별 평균 (프로세스 시작 후 전체)")
+    st.code(tracer.format_summary() or "기록 없음", language=None)
+    st.caption("최근 구간 (마지막 30개, 실행마다 측정값)")
+    st.code(tracer.format_recent(30) or "기록 없음", language=None)
+    st.download_button("지표 내려받기 (Prometheus)", tracer.prometheus_text(), file_name="metrics.txt")
+    if profiler is not None:
+        st.download_button("프로파일 내려받기 (collapsed stack)", profiler.collapsed(), file_name="profile.txt")
+
+# 임베딩 캐시 통계 (이번 실행까지의 누적값)
+st.sidebar.caption(f"임베딩 캐시: {embeddings.format_stats()}")
+st.sidebar.caption(f"응답 캐시: {response_cache.format_stats()}")
+st.sidebar.caption(f"이미지 캐시: {image_cache.format_stats()}")
+st.sidebar.caption(f"전체 세션: {service.format_stats()}")
+
+# 시작 시간 리포트: 리소스를 매번 새로 만들 때의 비용(기존)과 재실행 초기화 비용 비교
+# 리소스 생성 비용은 프로세스에서 처음 만들 때 한 번 잰 값이고, 재실행 평균은 이 세션의 최초 실행을 뺀 평균
+st.sidebar.caption(
+    f"리소스 생성 비용(기존 매 실행, 프로세스 시작 시 1회 측정): {sum(resources.build_timings.values()) * 1000:.0f}ms "
+    f"({resources.format_build_timings()})"
+)
+rerun_average = (
+    f"{st.session_state.rerun_setup_total / (st.session_state.rerun_count - 1) * 1000:.1f}ms"
+    if st.session_state.rerun_count > 1 else "-"
+)
+st.sidebar.caption(
+    f"재실행 초기화 시간: 재실행 평균 {rerun_average} / 마지막 실행 {rerun_setup_time * 1000:.1f}ms / "
+    f"최초 {st.session_state.first_setup_time * 1000:.1f}ms / 실행 {st.session_state.rerun_count}회"
+)
@@ -0,0 +1,126 @@
+import json
+import math
+import time
+
+# 답변 생성 설정
+PROMPT_TOKEN_BUDGET = 1500  # 프롬프트에 넣을 검색 결과(컨텍스트)의 최대 토큰 수 (추정치)
+TRUNCATED_MARK = "\n...(생략)"
+
+PROMPT_TEMPLATE = """당신은 API 설계 문서를 설명하는 도우미입니다.
+아래 [검색 결과]에 있는 내용만 근거로 질문에 한국어로 답하세요.
+검색 결과에 없는 내용은 추측하지 말고 모른다고 답하세요.
+
+[검색 결과]
+{context}
+{history}
+[질문]
+{question}
+
+[답변]
+"""
+HISTORY_TEMPLATE = """
+[이전 대화]
+{history}
+"""
+
+
+def estimate_tokens(text):
+    """토크나이저 없이 쓰는 토큰 수 추정치 (UTF-8 4바이트당 1토큰, 한글은 글자당 약 0.75토큰)"""
+    return math.ceil(len(text.encode("utf-8")) / 4)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """추정 토큰 수가 max_tokens를 넘지 않도록 text 뒷부분을 잘라냄"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max(max_tokens * 4 - len(TRUNCATED_MARK.encode("utf-8")), 0)
+    # UTF-8 바이트 기준으로 자른 뒤 깨진 마지막 글자는 버림
+    return text.encode("utf-8")[:limit].decode("utf-8", errors="ignore") + TRUNCATED_MARK
+
+
+def context_sections(retrieval, api_spec=None):
+    """retrieve() 결과에서 프롬프트에 넣을 (제목, 내용) 목록을 중요한 순서대로 생성"""
+    sections = []
+    if retrieval.get("api_list_info"):
+        sections.append(("API 리스트", retrieval["api_list_info"]))
+    if api_spec is not None:
+        sections.append(("API 명세", json.dumps(api_spec, ensure_ascii=False, indent=1)))
+
+    uml_results = retrieval.get("uml_results")
+    if uml_results and uml_results["metadatas"] and uml_results["metadatas"][0]:
+        uml_metadata = uml_results["metadatas"][0][0]
+        sections.append(("UML", f"API ID {uml_metadata.get('api_id', '')}의 UML 다이어그램: {uml_metadata.get('png_path', '')}"))
+
+    semantic_results = retrieval.get("semantic_results")
+    if semantic_results and semantic_results["documents"] and semantic_results["documents"][0]:
+        sections.append(("관련 API", "\n\n".join(semantic_results["documents"][0])))
+
+    page_results = retrieval.get("page_results")
+    if page_results and page_results["documents"] and page_results["documents"][0]:
+        pages = [
+            f"[{metadata.get('pdf_filename', '')}] {document}"
+            for document, metadata in zip(page_results["documents"][0], page_results["metadatas"][0])
+        ]
+        sections.append(("관련 화면", "\n\n".join(pages)))
+    return sections
+
+
+def build_prompt(question, sections, budget=PROMPT_TOKEN_BUDGET, history=""):
+    """컨텍스트를 토큰 예산 안에서 중요한 순서대로 채운 프롬프트와 사용한 토큰 수를 반환
+
+    예산을 넘는 섹션은 남은 예산만큼 잘라서 넣고, 그 뒤 섹션은 넣지 않는다.
+    history(이전 대화)는 호출하는 쪽에서 따로 예산을 맞춰 넘기며, 사용한 토큰 수에 포함된다.
+    """
+    parts = []
+    used = 0
+    for title, content in sections:
+        header = f"## {title}\n"
+        remaining = budget - used - estimate_tokens(header)
+        if remaining <= 0:
+            break
+        content = truncate_to_tokens(content, remaining)
+        parts.append(header + content)
+        used += estimate_tokens(header) + estimate_tokens(content)
+    history_text = HISTORY_TEMPLATE.format(history=history) if history else ""
+    used += estimate_tokens(history) if history else 0
+    return PROMPT_TEMPLATE.format(context="\n\n".join(parts), history=history_text, question=question), used
+
+
+class AnswerStats:
+    """스트리밍 답변 하나의 첫 토큰까지 걸린 시간(TTFT)과 초당 토큰 수"""
+
+    def __init__(self, prompt_tokens=0):
+        self.prompt_tokens = prompt_tokens
+        self.ttft = None
+        self.tokens = 0
+        self.seconds = 0.0
+
+    @property
+    def tokens_per_sec(self):
+        # 첫 토큰 이후 생성 구간 기준 (첫 토큰 대기 시간은 TTFT로 따로 표시)
+        generation = self.seconds - (self.ttft or 0.0)
+        return self.tokens / generation if self.tokens > 1 and generation > 0 else 0.0
+
+    def format(self):
+        ttft = f"{self.ttft * 1000:.0f}ms" if self.ttft is not None else "-"
+        return (
+            f"첫 토큰 {ttft}, {self.tokens}토큰 / {self.seconds:.2f}초 ({self.tokens_per_sec:.1f} tok/s), "
+            f"프롬프트 컨텍스트 약 {self.prompt_tokens}토큰"
+        )
+
+
+def stream_answer(llm, prompt, stats):
+    """llm.stream()의 토큰을 그대로 흘려보내면서 stats에 TTFT와 토큰 수를 기록하는 제너레이터
+
+    Ollama는 청크 하나에 토큰 하나를 보내므로 청크 수를 토큰 수로 센다.
+    """
+    start = time.perf_counter()
+    for chunk in llm.stream(prompt):
+        if not chunk:
+            continue
+        if stats.ttft is None:
+            stats.ttft = time.perf_counter() - start
+        stats.tokens += 1
+        stats.seconds = time.perf_counter() - start
+        yield chunk
+    stats.seconds = time.perf_counter() - start
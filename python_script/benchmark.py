@@ -0,0 +1,339 @@
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+
+from python_script.excel_reader import iter_sheet_frames
+from python_script.fake_ollama import start_fake_server
+from python_script.synthetic_corpus import generate_corpus
+
+# 벤치마크 설정
+# 코퍼스 크기별 설정: PDF 수, PDF당 페이지 수, 엑셀 API 행 수, puml 수
+SIZES = {
+    "small": {"pdfs": 2, "pages": 10, "rows": 100, "pumls": 10},
+    "medium": {"pdfs": 5, "pages": 20, "rows": 1000, "pumls": 50},
+    "large": {"pdfs": 10, "pages": 40, "rows": 5000, "pumls": 200},
+}
+QUERY_COUNT = 200  # 크기별로 실행할 조회 수 (키 조회와 의미 검색 각각)
+REGRESSION_TOLERANCE = 0.2  # 기준 결과보다 20% 넘게 나빠지면 회귀로 판단
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PA_PATTERN = re.compile(r"PA\d+")
+
+
+class QuietReporter:
+    """적재 함수의 ui 인터페이스를 화면 출력 없이 기록만 하는 객체"""
+
+    def __init__(self):
+        self.messages = []
+
+    def success(self, text):
+        self.messages.append(("success", text))
+
+    def error(self, text):
+        self.messages.append(("error", text))
+
+    def info(self, text):
+        self.messages.append(("info", text))
+
+    def warning(self, text):
+        self.messages.append(("warning", text))
+
+    @contextmanager
+    def spinner(self, text):
+        yield
+
+
+# --- 합성 코퍼스용 단계 ---
+# 저장소 밖에 있는 헬퍼 스크립트(del_noWF, pa_number, api_specification, convert_uml2img) 대신
+# 합성 코퍼스의 형식만 아는 단순한 함수로 같은 결과 형식을 만들어 적재 경로 전체를 측정한다.
+
+def bench_del_nowf(file_path, results):
+    """del_noWF.py 대신: 합성 PDF는 모든 페이지가 와이어프레임이므로 페이지 이미지를 그대로 둠"""
+    return results.get("devide_pdf.py")
+
+
+def bench_pa_number(file_path, results):
+    """pa_number.py 대신: pdf2txt 단계가 읽은 텍스트 레이어에서 페이지별 첫 PA 넘버를 찾음"""
+    texts = (results.get("pdf2txt.py") or {}).get("texts", {})
+    mapping = {}
+    for page, text in texts.items():
+        match = PA_PATTERN.search(text)
+        mapping[page] = match.group(0) if match else "None"
+    return mapping
+
+
+def bench_api_specification(file_path, results):
+    """api_specification.py 대신: API명세서 시트의 행을 {시트 이름: [{"설명": {컬럼: 값}}]}로 변환"""
+    spec = {}
+    for sheet_name, frame in iter_sheet_frames(file_path, lambda name: "API명세서" in name, header_key="API ID"):
+        for record in frame.to_dict("records"):
+            spec.setdefault(sheet_name, []).append(
+                {"설명": {key: "" if value is None else str(value) for key, value in record.items()}}
+            )
+    return spec
+
+
+def write_placeholder_png(path, width=8, height=8):
+    """외부 라이브러리 없이 흰색 PNG를 저장 (UML 이미지 자리표시)"""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    raw = b"".join(b"\x00" + b"\xff\xff\xff" * width for _ in range(height))
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw)))
+        f.write(chunk(b"IEND", b""))
+
+
+def bench_convert_uml2img(file_path, results):
+    """convert_uml2img.py 대신: puml의 title/database 줄을 읽고 자리표시 PNG를 저장"""
+    with open(file_path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    title_code = next((line.split(None, 1)[1] for line in lines if line.startswith("title ")), None)
+    db_tables = [line.split(None, 1)[1] for line in lines if line.startswith("database ")]
+
+    png_dir = os.path.join(os.path.dirname(os.path.abspath(file_path)), "UML2IMG")
+    os.makedirs(png_dir, exist_ok=True)
+    png_path = os.path.join(png_dir, f"{os.path.splitext(os.path.basename(file_path))[0]}.png")
+    write_placeholder_png(png_path)
+    return {"png_path": png_path, "title_code": title_code, "db_tables": db_tables}
+
+
+BENCH_STAGES = {
+    "del_noWF.py": bench_del_nowf,
+    "pa_number.py": bench_pa_number,
+    "api_specification.py": bench_api_specification,
+    "convert_uml2img.py": bench_convert_uml2img,
+}
+
+
+def percentile(values, p):
+    """선형 보간 백분위수 (values가 비어 있으면 0)"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (k - lower)
+
+
+def rss_mb():
+    """현재 프로세스의 RSS(MB), /proc을 읽을 수 없으면 최대 RSS"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def latency_summary(latencies):
+    return {
+        "count": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def run_size(size, workdir, query_count=QUERY_COUNT, seed=0):
+    """현재 프로세스에서 코퍼스 하나를 만들고 적재/조회 성능을 측정
+
+    resources가 환경 변수(UPLOAD_DIR, LLM_BASE_URL)와 현재 폴더(./chroma_db)를 읽으므로
+    run_isolated()가 만든 자식 프로세스 안에서 실행해야 한다.
+    """
+    from python_script import ingest, pipeline, resources, retrieval
+
+    for script, func in BENCH_STAGES.items():
+        pipeline.register_stage(script, func)
+
+    params = SIZES[size]
+    corpus = generate_corpus(os.path.join(workdir, "corpus"), seed=seed, **params)
+    result = {"size": size, "params": params, "ingest": {}, "query": {}}
+
+    def total_rows():
+        return sum(resources.get_chroma_client(name)._collection.count() for name in resources.COLLECTIONS)
+
+    # 1. 적재: 파일 종류별 처리 시간과 컬렉션에 추가된 행 수
+    for kind, process, paths in (
+        ("pdf", ingest.process_pdf, corpus["pdfs"]),
+        ("excel", ingest.process_excel, corpus["workbooks"]),
+        ("puml", ingest.process_puml, corpus["pumls"]),
+    ):
+        reporter = QuietReporter()
+        before = total_rows()
+        start = time.perf_counter()
+        failures = sum(1 for path in paths if not process(path, reporter))
+        seconds = time.perf_counter() - start
+        rows = total_rows() - before
+        result["ingest"][kind] = {
+            "files": len(paths),
+            "failures": failures,
+            "rows": rows,
+            "seconds": seconds,
+            "rows_per_sec": rows / seconds if seconds > 0 else 0.0,
+            "errors": [text for level, text in reporter.messages if level == "error"][:3],
+        }
+    result["memory_after_ingest_mb"] = rss_mb()
+
+    # 2. 조회: 키 조회(PA 넘버 + PDF 파일명)와 의미 검색 경로
+    rng = random.Random(seed)
+    key_latencies, semantic_latencies = [], []
+    for _ in range(query_count):
+        pa, pdf = rng.choice(corpus["queries"])
+        start = time.perf_counter()
+        retrieval.retrieve(pa, pdf, None, query_text=f"{pdf}에서 {pa} 보여줘")
+        key_latencies.append(time.perf_counter() - start)
+    for i in range(query_count):
+        start = time.perf_counter()
+        retrieval.retrieve(None, None, None, query_text=f"기능 {i % 50} 관련 API 알려줘")
+        semantic_latencies.append(time.perf_counter() - start)
+    result["query"]["key"] = latency_summary(key_latencies)
+    result["query"]["semantic"] = latency_summary(semantic_latencies)
+    result["memory_mb"] = rss_mb()
+    result["peak_memory_mb"] = peak_rss_mb()
+    return result
+
+
+def run_isolated(size, base_url, query_count=QUERY_COUNT, seed=0, keep=False):
+    """깨끗한 작업 폴더와 자식 프로세스에서 run_size()를 실행하고 결과를 반환
+
+    크기마다 리소스(Chroma, 캐시, 매니페스트)를 새로 만들어야 서로 영향을 주지 않는다.
+    """
+    workdir = tempfile.mkdtemp(prefix=f"bench-{size}-")
+    env = dict(
+        os.environ,
+        UPLOAD_DIR=os.path.join(workdir, "data_result"),
+        LLM_BASE_URL=base_url,
+        PY_SCRIPT_DIR=os.path.join(REPO_DIR, "python_script"),
+        PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get("PYTHONPATH")])),
+    )
+    output_path = os.path.join(workdir, "result.json")
+    command = [
+        sys.executable, "-m", "python_script.benchmark", "--child", size,
+        "--workdir", workdir, "--queries", str(query_count), "--seed", str(seed), "--json", output_path,
+    ]
+    try:
+        completed = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"{size} 벤치마크 실패:\n{completed.stderr}")
+        with open(output_path, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def format_result(result):
+    lines = [f"[{result['size']}] {result['params']}"]
+    for kind, stats in result["ingest"].items():
+        line = (
+            f"  적재 {kind:5s}: 파일 {stats['files']}개 (실패 {stats['failures']}), 행 {stats['rows']}개, "
+            f"{stats['seconds']:.2f}초, {stats['rows_per_sec']:.1f} rows/s"
+        )
+        lines.append(line)
+        lines.extend(f"    오류: {error.splitlines()[0]}" for error in stats["errors"])
+    for kind, stats in result["query"].items():
+        lines.append(
+            f"  조회 {kind:8s}: {stats['count']}회, p50 {stats['p50_ms']:.1f}ms / "
+            f"p95 {stats['p95_ms']:.1f}ms / p99 {stats['p99_ms']:.1f}ms"
+        )
+    lines.append(
+        f"  메모리: 적재 후 {result['memory_after_ingest_mb']:.0f}MB, 조회 후 {result['memory_mb']:.0f}MB, "
+        f"최대 {result['peak_memory_mb']:.0f}MB"
+    )
+    return "\n".join(lines)
+
+
+def ingest_failures(result):
+    """실패한 파일이 있거나 행이 하나도 적재되지 않은 파일 종류 목록 (측정 결과를 믿을 수 없음)"""
+    return [
+        f"{result['size']} 적재 {kind}: 실패 {stats['failures']}개, 행 {stats['rows']}개"
+        for kind, stats in result["ingest"].items()
+        if stats["failures"] or not stats["rows"]
+    ]
+
+
+def find_regressions(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """기준 결과보다 적재 처리량이 떨어지거나 조회 p95가 늘어난 항목 목록"""
+    regressions = []
+    baseline = {item["size"]: item for item in baseline}
+    for result in results:
+        base = baseline.get(result["size"])
+        if base is None:
+            continue
+        for kind, stats in result["ingest"].items():
+            before = base["ingest"].get(kind, {}).get("rows_per_sec")
+            if before and stats["rows_per_sec"] < before * (1 - tolerance):
+                regressions.append(f"{result['size']} 적재 {kind}: {before:.1f} → {stats['rows_per_sec']:.1f} rows/s")
+        for kind, stats in result["query"].items():
+            before = base["query"].get(kind, {}).get("p95_ms")
+            if before and stats["p95_ms"] > before * (1 + tolerance):
+                regressions.append(f"{result['size']} 조회 {kind} p95: {before:.1f} → {stats['p95_ms']:.1f}ms")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="합성 코퍼스로 적재/조회 성능 측정 (가짜 임베딩 서버 사용)")
+    parser.add_argument("--sizes", default="small,medium", help=f"쉼표로 구분한 코퍼스 크기 ({', '.join(SIZES)})")
+    parser.add_argument("--queries", type=int, default=QUERY_COUNT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="가짜 임베딩 요청당 지연 시간(초)")
+    parser.add_argument("--json", help="결과를 JSON으로 저장할 경로")
+    parser.add_argument("--baseline", help="비교할 기준 결과 JSON (회귀가 있으면 종료 코드 1)")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    parser.add_argument("--keep", action="store_true", help="작업 폴더를 지우지 않음")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # run_isolated()가 띄운 자식 프로세스: 한 크기만 측정해서 JSON으로 저장
+        child_result = run_size(args.child, args.workdir, args.queries, args.seed)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(child_result, f, ensure_ascii=False)
+        sys.exit(0)
+
+    server = start_fake_server(latency=args.embed_latency)
+    results = []
+    for size in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        if size not in SIZES:
+            parser.error(f"알 수 없는 코퍼스 크기입니다: {size}")
+        results.append(run_isolated(size, server.base_url, args.queries, args.seed, args.keep))
+        print(format_result(results[-1]), flush=True)
+    server.shutdown()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    # 적재가 실패했으면 처리량/지연 시간이 의미가 없으므로 기준 비교와 상관없이 실패로 종료
+    failures = [failure for result in results for failure in ingest_failures(result)]
+    for failure in failures:
+        print(f"적재 실패: {failure}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"회귀: {regression}")
+    sys.exit(1 if failures or regressions else 0)
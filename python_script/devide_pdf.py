@@ -1,49 +1,125 @@
+import argparse
 import os
-from pdf2image import convert_from_path
+import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pdf2image import convert_from_path, pdfinfo_from_path
 
-# UPLOAD_DIR 경로 설정
-UPLOAD_DIR = "/proj/mini-chat-bot/chatbot/data_result"
-OUTPUT_BASE_DIR = os.path.join(UPLOAD_DIR, "DEVIDED_PDF_DIR")
+# 페이지 이미지는 PDF가 있는 폴더 아래 DEVIDED_PDF_DIR/<PDF 이름>에 저장
+# (적재할 때는 PDF를 UPLOAD_DIR로 옮겨서 실행하므로 del_noWF.py 등 보조 스크립트가 보는 위치와 같음)
+OUTPUT_DIR_NAME = "DEVIDED_PDF_DIR"
 
-def get_latest_pdf(directory):
-    """디렉토리에서 가장 최근에 추가된 PDF 파일을 찾는 함수"""
-    pdf_files = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".pdf")]
-    
-    if not pdf_files:
-        raise FileNotFoundError("UPLOAD_DIR에 PDF 파일이 없습니다.")
+# 변환 설정 (파이프라인에서 실행할 때도 환경 변수로 바꿀 수 있음)
+DEFAULT_DPI = int(os.environ.get("PDF_DPI", "300"))
+DEFAULT_FORMAT = os.environ.get("PDF_IMAGE_FORMAT", "png")  # png, jpeg, tiff 중 선택
+PAGES_PER_CHUNK = 4  # 워커 하나가 한 번에 변환할 페이지 수
+MAX_WORKERS = os.cpu_count() or 1
 
-    # 파일 수정 시간 기준으로 가장 최근 파일 찾기
-    latest_pdf = max(pdf_files, key=os.path.getmtime)
-    return latest_pdf
+# pdftoppm이 실제로 쓰는 확장자
+FORMAT_EXTENSIONS = {"png": "png", "jpeg": "jpg", "jpg": "jpg", "tiff": "tif"}
 
-def divide_pdf(pdf_path):
-    """PDF를 페이지별로 이미지로 변환하여 저장"""
+def page_image_dir(pdf_path):
+    """PDF의 페이지 이미지를 저장할 디렉토리 경로 (예: <작업 폴더>/DEVIDED_PDF_DIR/<PDF 이름>)"""
+    pdf_name_only = os.path.splitext(os.path.basename(pdf_path))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(pdf_path)), OUTPUT_DIR_NAME, pdf_name_only)
+
+def page_image_path(output_dir, page_number, fmt=DEFAULT_FORMAT):
+    """페이지 번호에 해당하는 이미지 저장 경로"""
+    return os.path.join(output_dir, f"page_{page_number}.{FORMAT_EXTENSIONS[fmt]}")
+
+def chunk_pages(pages, size=PAGES_PER_CHUNK):
+    """페이지 번호 목록을 연속된 (first_page, last_page) 구간으로 나누는 함수"""
+    chunks = []
+    for page in pages:
+        if chunks and page == chunks[-1][1] + 1 and chunks[-1][1] - chunks[-1][0] + 1 < size:
+            chunks[-1][1] = page
+        else:
+            chunks.append([page, page])
+    return [tuple(chunk) for chunk in chunks]
+
+def render_page_range(pdf_path, output_dir, first_page, last_page, dpi=DEFAULT_DPI, fmt=DEFAULT_FORMAT):
+    """워커 스레드에서 실행: 페이지 구간을 변환해 바로 디스크에 저장
+
+    실제 렌더링은 pdftoppm 프로세스가 하므로 스레드로 나눠도 여러 코어를 쓴다.
+    output_folder + paths_only를 쓰면 pdftoppm이 렌더링한 페이지를 곧바로 파일로 쓰기 때문에
+    PIL 이미지가 메모리에 쌓이지 않는다.
+    """
+    saved = []
+    with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+        paths = convert_from_path(
+            pdf_path,
+            dpi=dpi,
+            first_page=first_page,
+            last_page=last_page,
+            fmt=fmt,
+            output_folder=tmp_dir,
+            output_file="page",
+            paths_only=True,
+        )
+        for path in paths:
+            # pdftoppm 출력 파일명(page-01.png 등)에서 페이지 번호 추출 후 page_N.png로 이동
+            page_number = int(re.search(r"-(\d+)\.\w+$", os.path.basename(path)).group(1))
+            output_path = page_image_path(output_dir, page_number, fmt)
+            shutil.move(path, output_path)
+            saved.append(output_path)
+    return saved
+
+def divide_pdf(pdf_path, dpi=DEFAULT_DPI, fmt=DEFAULT_FORMAT, max_workers=MAX_WORKERS, verbose=False):
+    """PDF를 페이지별로 이미지로 변환하여 저장 (verbose면 페이지마다 저장/건너뜀을 출력)"""
     if not os.path.isfile(pdf_path):
         raise FileNotFoundError(f"파일을 찾을 수 없습니다: {pdf_path}")
-
-    # PDF 파일 이름 추출
-    pdf_file_name = os.path.basename(pdf_path)
-    pdf_name_only = os.path.splitext(pdf_file_name)[0]
+    if fmt not in FORMAT_EXTENSIONS:
+        raise ValueError(f"지원하지 않는 이미지 형식입니다: {fmt}")
 
     # PDF별 개별 디렉토리 생성
-    output_dir = os.path.join(OUTPUT_BASE_DIR, pdf_name_only)
+    output_dir = page_image_dir(pdf_path)
     os.makedirs(output_dir, exist_ok=True)
 
-    # PDF 파일을 이미지로 변환
-    images = convert_from_path(pdf_path, dpi=300)  # dpi 값으로 해상도 설정
+    # PDF보다 최신인 이미지가 이미 있는 페이지는 건너뜀
+    page_count = pdfinfo_from_path(pdf_path)["Pages"]
+    pdf_mtime = os.path.getmtime(pdf_path)
+    pages_to_render = []
+    for page_number in range(1, page_count + 1):
+        output_path = page_image_path(output_dir, page_number, fmt)
+        if os.path.exists(output_path) and os.path.getmtime(output_path) >= pdf_mtime:
+            if verbose:
+                print(f"Skipped: {output_path}")
+        else:
+            pages_to_render.append(page_number)
 
-    # 각 페이지를 이미지로 저장
-    for page_number, image in enumerate(images, start=1):
-        output_path = os.path.join(output_dir, f"page_{page_number}.png")
-        image.save(output_path, "PNG")
-        print(f"Saved: {output_path}")
+    # 페이지 구간별로 스레드 풀에 나눠서 변환 (멀티스레드 서버 안에서 fork하지 않도록 프로세스 풀은 쓰지 않음)
+    chunks = chunk_pages(pages_to_render)
+    if chunks:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            futures = [
+                executor.submit(render_page_range, pdf_path, output_dir, first, last, dpi, fmt)
+                for first, last in chunks
+            ]
+            for future in as_completed(futures):
+                for output_path in future.result():
+                    if verbose:
+                        print(f"Saved: {output_path}")
 
     return output_dir  # 저장된 디렉토리 경로 반환
 
+def run(file_path, results=None):
+    """파이프라인 단계로 실행될 때의 진입점: 페이지 이미지가 저장된 디렉토리를 반환
+
+    DPI와 이미지 형식은 PDF_DPI, PDF_IMAGE_FORMAT 환경 변수로 정한다.
+    """
+    return divide_pdf(file_path, dpi=DEFAULT_DPI, fmt=DEFAULT_FORMAT)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PDF를 페이지별 이미지로 변환")
+    parser.add_argument("pdf_path", help="변환할 PDF 경로")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI)
+    parser.add_argument("--format", dest="fmt", default=DEFAULT_FORMAT, choices=sorted(FORMAT_EXTENSIONS))
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
     try:
-        latest_pdf = get_latest_pdf(UPLOAD_DIR)
-        output_dir = divide_pdf(latest_pdf)
-        print(f"Images for {os.path.basename(latest_pdf)} saved in: {output_dir}")
+        output_dir = divide_pdf(args.pdf_path, dpi=args.dpi, fmt=args.fmt, max_workers=args.workers, verbose=True)
+        print(f"Images for {os.path.basename(args.pdf_path)} saved in: {output_dir}")
     except FileNotFoundError as e:
         print(e)
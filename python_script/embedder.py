@@ -0,0 +1,77 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from python_script.tracing import span
+
+# 적재용 임베딩 설정
+EMBED_BATCH_SIZE = 64  # embed_documents 한 번에 보낼 문서 수
+EMBED_MAX_IN_FLIGHT = 4  # 동시에 보낼 수 있는 최대 요청 수
+
+
+class BatchEmbedder:
+    """문서를 배치로 나눠 embed_documents로 동시에 임베딩하는 적재용 임베더
+
+    동시 요청 수 제한(max_in_flight)은 인스턴스 단위라서, 여러 적재 작업이 같은 임베더를
+    함께 써도 임베딩 서버로 가는 요청은 전체에서 max_in_flight개를 넘지 않는다.
+    """
+
+    def __init__(self, embeddings, batch_size=EMBED_BATCH_SIZE, max_in_flight=EMBED_MAX_IN_FLIGHT):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
+        self._lock = threading.Lock()
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+
+        # 누적 처리량 통계
+        self.total_docs = 0
+        self.total_batches = 0
+        self.total_seconds = 0.0
+        self.last_stats = None
+
+    def embed_documents(self, texts):
+        """texts를 batch_size 단위로 나눠 (모든 호출을 합쳐) 최대 max_in_flight개의 요청을 동시에 보내고, 입력 순서대로 벡터를 반환"""
+        texts = list(texts)
+        if not texts:
+            return []
+
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+        start = time.perf_counter()
+        with span("embed.documents", docs=len(texts), batches=len(batches), chars=sum(map(len, texts))):
+            with ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(batches))) as executor:
+                # executor.map은 입력 순서를 유지하므로 결과를 그대로 이어 붙이면 된다
+                results = list(executor.map(self._embed_batch, batches))
+        elapsed = time.perf_counter() - start
+
+        vectors = [vector for batch in results for vector in batch]
+        if len(vectors) != len(texts):
+            raise ValueError(f"임베딩 개수가 문서 개수와 다릅니다: {len(vectors)} != {len(texts)}")
+
+        stats = {
+            "docs": len(texts),
+            "batches": len(batches),
+            "seconds": elapsed,
+            "docs_per_sec": len(texts) / elapsed if elapsed > 0 else float("inf"),
+        }
+        with self._lock:
+            self.total_docs += stats["docs"]
+            self.total_batches += stats["batches"]
+            self.total_seconds += elapsed
+            self.last_stats = stats
+
+        return vectors
+
+    def _embed_batch(self, batch):
+        with self._in_flight:
+            return self.embeddings.embed_documents(batch)
+
+    def format_stats(self, stats=None):
+        """처리량 통계를 사람이 읽을 수 있는 문자열로 변환"""
+        stats = stats or self.last_stats
+        if not stats:
+            return "임베딩 기록 없음"
+        return (
+            f"{stats['docs']}개 문서 / {stats['batches']}개 배치 / "
+            f"{stats['seconds']:.2f}초 ({stats['docs_per_sec']:.1f} docs/s)"
+        )
@@ -0,0 +1,148 @@
+import argparse
+import math
+import os
+import time
+
+from langchain_core.embeddings import Embeddings
+
+# 임베딩 백엔드 설정
+# 백엔드는 "종류:대상" 문자열로 지정한다.
+#   ollama:<모델 이름>       예) ollama:llama3.2:1b, ollama:nomic-embed-text
+#   onnx:<모델 폴더>         model.onnx와 tokenizer.json이 있는 sentence-transformer 폴더
+ONNX_MAX_LENGTH = 128  # 토큰 최대 길이 (PA 넘버/API ID 같은 짧은 문서에는 충분)
+ONNX_BATCH_SIZE = 32
+WARM_UP_TEXT = "API ID: CMM001"
+
+
+class OnnxSentenceEmbeddings(Embeddings):
+    """ONNX Runtime(CPU)으로 실행하는 sentence-transformer 임베딩 (mean pooling + L2 정규화)
+
+    onnxruntime, tokenizers, numpy는 이 백엔드를 쓸 때만 필요하다.
+    """
+
+    def __init__(self, model_dir, max_length=ONNX_MAX_LENGTH, batch_size=ONNX_BATCH_SIZE, threads=None):
+        import numpy as np
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self._np = np
+        self.model = f"onnx:{os.path.basename(os.path.normpath(model_dir))}"
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def _embed(self, texts):
+        np = self._np
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        hidden = self.session.run(None, feeds)[0]  # (배치, 토큰, 차원)
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.tolist()
+
+    def embed_documents(self, texts):
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed(texts[i:i + self.batch_size]))
+        return vectors
+
+    def embed_query(self, text):
+        return self._embed([text])[0]
+
+
+def create_embeddings(backend, base_url):
+    """백엔드 문자열로 임베딩 객체 생성"""
+    kind, _, target = backend.partition(":")
+    if kind == "ollama":
+        from langchain_ollama import OllamaEmbeddings
+        return OllamaEmbeddings(base_url=base_url, model=target)
+    if kind == "onnx":
+        return OnnxSentenceEmbeddings(target)
+    raise ValueError(f"지원하지 않는 임베딩 백엔드입니다: {backend}")
+
+
+def warm_up(embeddings, text=WARM_UP_TEXT):
+    """모델 로딩/첫 요청 비용을 시작 시점에 미리 치르고 걸린 시간(초)을 반환"""
+    start = time.perf_counter()
+    embeddings.embed_query(text)
+    return time.perf_counter() - start
+
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round((len(values) - 1) * p / 100)))]
+
+
+def benchmark_backend(embeddings, count=200, batch_size=64):
+    """짧은 ID 문서로 백엔드 하나의 질의 지연 시간, 배치 처리량, 정확도를 측정
+
+    정확도는 "CMM0001 조회 API" 같은 질문의 가장 가까운 문서가 해당 API 문서인 비율(top-1)이다.
+    """
+    from python_script.synthetic_corpus import api_id
+
+    apis = [api_id(i) for i in range(count)]
+    documents = [f"API ID: {api}\nAPI 명: {api} 조회\nURL: /api/v1/{api.lower()}" for api in apis]
+    questions = [f"{api} 조회 API" for api in apis]
+
+    warm_up_seconds = warm_up(embeddings)
+
+    start = time.perf_counter()
+    vectors = []
+    for i in range(0, len(documents), batch_size):
+        vectors.extend(embeddings.embed_documents(documents[i:i + batch_size]))
+    batch_seconds = time.perf_counter() - start
+
+    latencies, correct = [], 0
+    for expected, question in enumerate(questions):
+        start = time.perf_counter()
+        query = embeddings.embed_query(question)
+        latencies.append(time.perf_counter() - start)
+        best = max(range(len(vectors)), key=lambda i: _cosine(query, vectors[i]))
+        correct += best == expected
+
+    return {
+        "dim": len(vectors[0]),
+        "warm_up_ms": warm_up_seconds * 1000,
+        "docs_per_sec": len(documents) / batch_seconds if batch_seconds > 0 else 0.0,
+        "query_p50_ms": _percentile(latencies, 50) * 1000,
+        "query_p95_ms": _percentile(latencies, 95) * 1000,
+        "top1_accuracy": correct / len(questions),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="임베딩 백엔드 비교 (질의 지연 시간, 배치 처리량, top-1 정확도)")
+    parser.add_argument("--backends", default="ollama:llama3.2:1b", help="쉼표로 구분한 백엔드 목록 (예: ollama:llama3.2:1b,onnx:/models/all-MiniLM-L6-v2)")
+    parser.add_argument("--base-url", default=os.environ.get("LLM_BASE_URL", "http://localhost:11434"))
+    parser.add_argument("--count", type=int, default=200, help="문서/질문 수")
+    args = parser.parse_args()
+
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        result = benchmark_backend(create_embeddings(backend, args.base_url), args.count)
+        print(
+            f"{backend}: {result['dim']}차원, 예열 {result['warm_up_ms']:.0f}ms, "
+            f"배치 {result['docs_per_sec']:.1f} docs/s, 질의 p50 {result['query_p50_ms']:.1f}ms / "
+            f"p95 {result['query_p95_ms']:.1f}ms, top-1 정확도 {result['top1_accuracy']:.1%}"
+        )
@@ -0,0 +1,162 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+# 임베딩 캐시 설정
+EMBED_CACHE_PATH = "./chroma_db/embedding_cache.sqlite3"  # chroma_db 옆에 SQLite 파일로 저장
+EMBED_CACHE_MEMORY_ITEMS = 4096  # 메모리(LRU) 계층 최대 항목 수
+EMBED_CACHE_DISK_ITEMS = 200000  # 디스크 계층 최대 항목 수 (초과 시 오래 안 쓴 항목부터 삭제)
+
+
+def cache_key(model, text):
+    """(모델명, 텍스트 해시)로 캐시 키 생성"""
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model}:{text_hash}"
+
+
+class CachedEmbeddings(Embeddings):
+    """메모리 LRU + SQLite 디스크 2단계 캐시를 앞에 둔 임베딩 래퍼"""
+
+    def __init__(self, embeddings, model=None, path=EMBED_CACHE_PATH,
+                 memory_items=EMBED_CACHE_MEMORY_ITEMS, disk_items=EMBED_CACHE_DISK_ITEMS):
+        self.embeddings = embeddings
+        self.model = model or getattr(embeddings, "model", "unknown")
+        self.memory_items = memory_items
+        self.disk_items = disk_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 캐시 적중/실패 카운터
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embedding_cache ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embedding_cache_last_used ON embedding_cache(last_used)")
+        self._conn.commit()
+
+    # --- 메모리 계층 ---
+    def _memory_get(self, key):
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+        return vector
+
+    def _memory_put(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    # --- 디스크 계층 ---
+    def _disk_get_many(self, keys):
+        found = {}
+        for i in range(0, len(keys), 500):  # SQLite 파라미터 개수 제한 회피
+            chunk = keys[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embedding_cache WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = array("f", blob).tolist()
+        if found:
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE embedding_cache SET last_used = ? WHERE key = ?", [(now, k) for k in found]
+            )
+            self._conn.commit()
+        return found
+
+    def _disk_put_many(self, items):
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embedding_cache (key, vector, last_used) VALUES (?, ?, ?)",
+            [(key, array("f", vector).tobytes(), now) for key, vector in items],
+        )
+        # 최대 크기를 넘으면 가장 오래 사용하지 않은 항목부터 삭제
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()
+        if count > self.disk_items:
+            self._conn.execute(
+                "DELETE FROM embedding_cache WHERE key IN ("
+                " SELECT key FROM embedding_cache ORDER BY last_used ASC LIMIT ?)",
+                (count - self.disk_items,),
+            )
+        self._conn.commit()
+
+    # --- Embeddings 인터페이스 ---
+    def embed_documents(self, texts):
+        texts = list(texts)
+        keys = [cache_key(self.model, t) for t in texts]
+        vectors = {}
+
+        with self._lock:
+            missing = []
+            for key in dict.fromkeys(keys):  # 중복 제거 + 순서 유지
+                vector = self._memory_get(key)
+                if vector is not None:
+                    vectors[key] = vector
+                    self.memory_hits += 1
+                else:
+                    missing.append(key)
+
+            if missing:
+                from_disk = self._disk_get_many(missing)
+                for key, vector in from_disk.items():
+                    self._memory_put(key, vector)
+                    vectors[key] = vector
+                self.disk_hits += len(from_disk)
+
+        # 캐시에 없는 텍스트만 실제 임베딩 (락 밖에서 호출해 동시 배치를 막지 않음)
+        to_embed = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in to_embed:
+                to_embed[key] = text
+
+        if to_embed:
+            new_vectors = self.embeddings.embed_documents(list(to_embed.values()))
+            new_items = list(zip(to_embed.keys(), new_vectors))
+            with self._lock:
+                self.misses += len(new_items)
+                for key, vector in new_items:
+                    self._memory_put(key, vector)
+                    vectors[key] = vector
+                self._disk_put_many(new_items)
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    # --- 통계 ---
+    def stats(self):
+        with self._lock:
+            (disk_count,) = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "disk_items": disk_count,
+            }
+
+    def format_stats(self):
+        s = self.stats()
+        return (
+            f"적중률 {s['hit_rate']:.0%} (메모리 {s['memory_hits']} / 디스크 {s['disk_hits']} / 실패 {s['misses']}), "
+            f"저장 {s['memory_items']}개(메모리) / {s['disk_items']}개(디스크)"
+        )
@@ -0,0 +1,69 @@
+import openpyxl
+import pandas as pd
+
+# 엑셀 읽기 설정
+EXCEL_CHUNK_ROWS = 5000  # DataFrame 하나로 만들 최대 행 수 (시트 전체를 한 번에 메모리에 올리지 않음)
+HEADER_SCAN_ROWS = 20  # 헤더 행을 찾을 때 위에서부터 살펴볼 행 수
+
+
+def sheet_names(file_path):
+    """시트 이름 목록 (읽기 전용 모드라 셀 내용은 읽지 않음)"""
+    workbook = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def _frame(rows, keep, columns):
+    # 행마다 길이가 다를 수 있으므로 헤더 길이에 맞춘 뒤 이름 있는 컬럼만 남김
+    frame = pd.DataFrame(rows, dtype=object).reindex(columns=range(max(keep) + 1)).iloc[:, keep]
+    frame.columns = columns
+    return frame.dropna(how="all")
+
+
+def iter_sheet_frames(file_path, sheet_filter, header_key, chunk_rows=EXCEL_CHUNK_ROWS):
+    """sheet_filter(시트 이름)가 참인 시트를 스트리밍으로 읽어 (시트 이름, DataFrame)을 chunk_rows행씩 반환
+
+    워크북은 읽기 전용 모드로 한 번만 열고, header_key 셀이 있는 첫 행을 헤더로 사용한다.
+    헤더를 찾지 못한 시트는 건너뛴다. 값은 엑셀에 있는 그대로(object dtype) 둔다.
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for name in workbook.sheetnames:
+            if not sheet_filter(name):
+                continue
+            rows = workbook[name].iter_rows(values_only=True)
+
+            header = None
+            for _, row in zip(range(HEADER_SCAN_ROWS), rows):
+                if header_key in row:
+                    header = row
+                    break
+            if header is None:
+                continue
+            keep = [i for i, value in enumerate(header) if value is not None]
+            columns = [str(header[i]) for i in keep]
+
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= chunk_rows:
+                    yield name, _frame(chunk, keep, columns)
+                    chunk = []
+            if chunk:
+                yield name, _frame(chunk, keep, columns)
+    finally:
+        workbook.close()
+
+
+def rows_to_documents(frame):
+    """각 행을 "컬럼: 값" 줄로 이어 붙인 문자열 Series (값이 없는 컬럼은 생략)
+
+    행 단위 반복 없이 컬럼마다 문자열 연산을 한 번씩만 한다.
+    """
+    documents = pd.Series("", index=frame.index, dtype=object)
+    for position, column in enumerate(frame.columns):
+        values = frame.iloc[:, position]  # 같은 이름의 컬럼이 있어도 하나씩 처리
+        documents = documents + (column + ": " + values.astype(str) + "\n").where(values.notna(), "")
+    return documents.str.slice(0, -1)  # 마지막 줄바꿈 제거
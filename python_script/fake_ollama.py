@@ -0,0 +1,167 @@
+import argparse
+import hashlib
+import json
+import math
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 테스트용 가짜 Ollama 서버 설정
+FAKE_EMBED_DIM = 64  # 가짜 임베딩 차원 수
+FAKE_ANSWER_TOKENS = 32  # 가짜 답변의 토큰 수
+
+
+def fake_embedding(text, dim=FAKE_EMBED_DIM):
+    """텍스트의 sha256 해시로 항상 같은 결과가 나오는 정규화된 벡터를 생성"""
+    values = []
+    counter = 0
+    while len(values) < dim:
+        digest = hashlib.sha256(f"{counter}:{text}".encode("utf-8")).digest()
+        for (chunk,) in struct.iter_unpack(">I", digest):
+            values.append(chunk / 0xFFFFFFFF * 2 - 1)
+        counter += 1
+    values = values[:dim]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+
+def fake_answer_tokens(prompt, count=FAKE_ANSWER_TOKENS):
+    """프롬프트 해시로 항상 같은 결과가 나오는 가짜 답변 토큰 목록"""
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return ["가짜 답변:"] + [f" {digest[i % len(digest):][:4]}" for i in range(count - 1)]
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Ollama의 임베딩 API(/api/embed, /api/embeddings)와 생성 API(/api/generate)를 흉내내는 핸들러"""
+
+    server_version = "FakeOllama/0.1"
+
+    def log_message(self, format, *args):
+        pass  # 요청 로그는 출력하지 않음
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b"{}"
+        return json.loads(body or b"{}")
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_generate(self, payload):
+        """/api/generate 응답 (stream이 꺼져 있지 않으면 토큰마다 NDJSON 한 줄씩 전송)"""
+        server = self.server
+        tokens = fake_answer_tokens(payload.get("prompt", ""), server.answer_tokens)
+        model = payload.get("model", "")
+        start = time.perf_counter()
+
+        if payload.get("stream") is False:
+            time.sleep(server.token_latency * len(tokens))
+            self._send_json({
+                "model": model, "response": "".join(tokens), "done": True,
+                "eval_count": len(tokens), "total_duration": int((time.perf_counter() - start) * 1e9),
+            })
+            return
+
+        # HTTP/1.0 응답이므로 Content-Length 없이 보내고 연결을 닫아 응답 끝을 알림
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+
+        def write_line(obj):
+            self.wfile.write((json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+        for token in tokens:
+            if server.token_latency:
+                time.sleep(server.token_latency)  # 토큰 생성 속도 흉내
+            write_line({"model": model, "response": token, "done": False})
+        write_line({
+            "model": model, "response": "", "done": True, "done_reason": "stop",
+            "eval_count": len(tokens), "total_duration": int((time.perf_counter() - start) * 1e9),
+        })
+
+    def do_POST(self):
+        payload = self._read_json()
+        server = self.server
+        server.record_request(self.path)
+
+        # 요청 한 번당 지연 시간 (실제 Ollama 왕복 비용 흉내)
+        if server.latency:
+            time.sleep(server.latency)
+
+        if self.path == "/api/embed":
+            texts = payload.get("input", [])
+            if isinstance(texts, str):
+                texts = [texts]
+            self._send_json({
+                "model": payload.get("model", ""),
+                "embeddings": [fake_embedding(t, server.dim) for t in texts],
+            })
+        elif self.path == "/api/embeddings":
+            self._send_json({"embedding": fake_embedding(payload.get("prompt", ""), server.dim)})
+        elif self.path == "/api/generate":
+            self._send_generate(payload)
+        else:
+            self._send_json({"error": f"지원하지 않는 경로입니다: {self.path}"}, status=404)
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    """요청 수를 세는 가짜 Ollama HTTP 서버"""
+
+    daemon_threads = True
+
+    def __init__(self, address, dim=FAKE_EMBED_DIM, latency=0.0, token_latency=0.0, answer_tokens=FAKE_ANSWER_TOKENS):
+        super().__init__(address, FakeOllamaHandler)
+        self.dim = dim
+        self.latency = latency  # 요청당 지연 시간 (생성 요청이면 첫 토큰까지의 지연)
+        self.token_latency = token_latency  # 생성 토큰 하나당 지연 시간
+        self.answer_tokens = answer_tokens
+        self.request_counts = {}
+        self._count_lock = threading.Lock()
+
+    def record_request(self, path):
+        with self._count_lock:
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_fake_server(host="127.0.0.1", port=0, dim=FAKE_EMBED_DIM, latency=0.0, token_latency=0.0,
+                      answer_tokens=FAKE_ANSWER_TOKENS):
+    """백그라운드 스레드에서 가짜 서버를 띄우고 서버 객체를 반환 (port=0이면 빈 포트 자동 선택)"""
+    server = FakeOllamaServer(
+        (host, port), dim=dim, latency=latency, token_latency=token_latency, answer_tokens=answer_tokens
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 테스트용 가짜 Ollama 임베딩/생성 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--dim", type=int, default=FAKE_EMBED_DIM)
+    parser.add_argument("--latency", type=float, default=0.0, help="요청당 지연 시간(초)")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="생성 토큰당 지연 시간(초)")
+    parser.add_argument("--answer-tokens", type=int, default=FAKE_ANSWER_TOKENS, help="가짜 답변의 토큰 수")
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(
+        (args.host, args.port), dim=args.dim, latency=args.latency,
+        token_latency=args.token_latency, answer_tokens=args.answer_tokens,
+    )
+    print(f"Fake Ollama server listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,148 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from python_script.answer import estimate_tokens, truncate_to_tokens
+
+# 대화 기록 설정
+HISTORY_PATH = "./chroma_db/chat_history.sqlite3"
+HISTORY_WINDOW = 20  # 세션 메모리에 두고 매 실행마다 그리는 최근 메시지 수 (나머지는 SQLite에만 보관)
+HISTORY_PAGE = 20  # "이전 대화 더 보기" 한 번에 불러올 메시지 수
+HISTORY_MAX_LOADED = 200  # 불러온 이전 메시지를 세션에 보관할 최대 개수
+HISTORY_TOKEN_BUDGET = 400  # 프롬프트에 넣을 이전 대화(요약 + 최근 대화)의 최대 토큰 수 (추정치)
+SUMMARY_TOKEN_BUDGET = 150  # 창 밖으로 밀려난 대화 요약의 최대 토큰 수
+TURN_MAX_TOKENS = 80  # 최근 대화에서 메시지 하나에 쓸 최대 토큰 수
+SUMMARY_LINE_CHARS = 60  # 요약 한 줄에 남길 질문 글자 수
+
+# 요약에 남길 키 (PA 넘버, API ID, PDF 파일명)
+_KEY_PATTERNS = (r"PA\d+", r"API ID: \w+", r"[\w\-]+\.pdf")
+
+
+class HistoryStore:
+    """세션별 채팅 메시지를 순번(seq)과 함께 저장하는 SQLite 저장소
+
+    세션 메모리에는 최근 HISTORY_WINDOW개만 두고, 오래된 메시지는 여기서 필요할 때만 페이지 단위로 읽는다.
+    창 밖으로 밀려난 대화의 요약도 세션별로 저장해, 새로고침 후에도 이어서 쓴다.
+    """
+
+    def __init__(self, path=HISTORY_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                " session_id TEXT NOT NULL,"
+                " seq INTEGER NOT NULL,"
+                " role TEXT NOT NULL,"
+                " content TEXT NOT NULL,"
+                " images TEXT NOT NULL DEFAULT '[]',"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (session_id, seq))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                " session_id TEXT PRIMARY KEY,"
+                " summary TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def append(self, session_id, message):
+        """메시지를 저장하고 순번을 반환"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            seq = row[0] + 1
+            self._conn.execute(
+                "INSERT INTO messages (session_id, seq, role, content, images, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    session_id, seq, message["role"], message["content"],
+                    json.dumps(message.get("images") or [], ensure_ascii=False), time.time(),
+                ),
+            )
+            self._conn.commit()
+        return seq
+
+    def page(self, session_id, before_seq, limit=HISTORY_PAGE):
+        """before_seq보다 앞선 메시지 최대 limit개를 오래된 순서로 반환"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, role, content, images FROM messages WHERE session_id = ? AND seq < ?"
+                " ORDER BY seq DESC LIMIT ?",
+                (session_id, before_seq, limit),
+            ).fetchall()
+        return [
+            {"seq": seq, "role": role, "content": content, "images": [tuple(image) for image in json.loads(images)]}
+            for seq, role, content, images in reversed(rows)
+        ]
+
+
+    def save_summary(self, session_id, summary):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (session_id, summary, updated_at) VALUES (?, ?, ?)",
+                (session_id, summary, time.time()),
+            )
+            self._conn.commit()
+
+    def summary(self, session_id):
+        """세션의 대화 요약 (없으면 빈 문자열)"""
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM summaries WHERE session_id = ?", (session_id,)).fetchone()
+        return row[0] if row else ""
+
+
+def fold_summary(summary, messages, budget=SUMMARY_TOKEN_BUDGET):
+    """창 밖으로 밀려난 메시지를 요약에 합침 (LLM 호출 없이 질문과 키만 남기는 추출 요약)
+
+    요약이 budget을 넘으면 가장 오래된 줄부터 버리므로 대화가 길어져도 크기가 일정하다.
+    """
+    lines = summary.splitlines() if summary else []
+    for message in messages:
+        if message["role"] != "user":
+            continue
+        question = re.sub(r"\s+", " ", message["content"]).strip()
+        if len(question) > SUMMARY_LINE_CHARS:
+            question = question[:SUMMARY_LINE_CHARS] + "…"
+        lines.append(f"- 질문: {question}")
+
+        # 답변에서 언급된 키도 함께 남김 (이후 질문에서 "그 API" 같은 지시어를 풀 수 있게)
+        answer = next((m for m in messages if m.get("seq", 0) > message.get("seq", 0) and m["role"] == "assistant"), None)
+        if answer:
+            keys = dict.fromkeys(key for pattern in _KEY_PATTERNS for key in re.findall(pattern, answer["content"]))
+            if keys:
+                lines.append(f"  관련: {', '.join(list(keys)[:5])}")
+
+    while lines and estimate_tokens("\n".join(lines)) > budget:
+        lines.pop(0)
+        if lines and lines[0].startswith("  "):
+            lines.pop(0)  # 질문이 빠지면 딸린 관련 키 줄도 버림
+    return "\n".join(lines)
+
+
+def history_context(summary, messages, budget=HISTORY_TOKEN_BUDGET, turn_max_tokens=TURN_MAX_TOKENS):
+    """프롬프트에 넣을 이전 대화 문자열 (요약 + 예산 안에 들어가는 최근 메시지, 최신 메시지 우선)"""
+    parts = []
+    used = 0
+    if summary:
+        summary_text = "이전 대화 요약:\n" + summary
+        used = estimate_tokens(summary_text)
+        parts.append(summary_text)
+
+    recent = []
+    for message in reversed(messages):
+        speaker = "사용자" if message["role"] == "user" else "도우미"
+        line = f"{speaker}: {truncate_to_tokens(message['content'], turn_max_tokens)}"
+        cost = estimate_tokens(line)
+        if used + cost > budget:
+            break
+        recent.append(line)
+        used += cost
+    if recent:
+        parts.append("\n".join(reversed(recent)))
+    return "\n\n".join(parts)
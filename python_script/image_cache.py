@@ -0,0 +1,133 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, features
+
+from python_script.tracing import span
+
+# 미리보기 이미지 설정
+PREVIEW_DIR_NAME = ".preview"  # 원본 이미지 폴더 아래에 미리보기를 저장할 폴더 이름
+PREVIEW_MAX_SIZE = 1024  # 미리보기의 긴 변 최대 픽셀 수
+PREVIEW_QUALITY = 80
+PREVIEW_WORKERS = os.cpu_count() or 1
+IMAGE_CACHE_BYTES = 64 * 1024 * 1024  # 메모리에 보관할 이미지 바이트 총량
+
+
+def preview_format():
+    """WebP를 지원하면 WebP, 아니면 JPEG"""
+    return "WEBP" if features.check("webp") else "JPEG"
+
+
+def preview_path(image_path, fmt=None):
+    """원본 이미지에 대응하는 미리보기 이미지 경로 (예: page_1.png → .preview/page_1.webp)"""
+    fmt = fmt or preview_format()
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    extension = "webp" if fmt == "WEBP" else "jpg"
+    return os.path.join(os.path.dirname(image_path), PREVIEW_DIR_NAME, f"{stem}.{extension}")
+
+
+def make_preview(image_path, max_size=PREVIEW_MAX_SIZE, quality=PREVIEW_QUALITY):
+    """원본을 줄인 미리보기를 저장하고 경로를 반환 (원본보다 새 미리보기가 있으면 그대로 사용)"""
+    fmt = preview_format()
+    target = preview_path(image_path, fmt)
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(image_path):
+        return target
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with Image.open(image_path) as image:
+        image.thumbnail((max_size, max_size))
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha and fmt == "WEBP" else "RGB")
+        # 다른 스레드/프로세스가 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓴 뒤 이름을 바꿈
+        tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        image.save(tmp_path, format=fmt, quality=quality)
+    os.replace(tmp_path, target)
+    return target
+
+
+def make_previews(image_paths, max_workers=PREVIEW_WORKERS):
+    """여러 이미지의 미리보기를 동시에 생성하고 생성(또는 재사용)한 개수를 반환"""
+    image_paths = [path for path in image_paths if path and os.path.exists(path)]
+    if not image_paths:
+        return 0
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(image_paths))) as executor:
+        return len(list(executor.map(make_preview, image_paths)))
+
+
+class ImageCache:
+    """채팅 화면에 보여줄 이미지 바이트 캐시
+
+    preview()는 미리보기(없으면 그 자리에서 생성)를 바이트 총량 기준 LRU로 메모리에 보관하고,
+    original()은 원본을 요청할 때만 디스크에서 읽는다(캐시하지 않음).
+    키에 원본 수정 시각이 들어 있어 같은 경로의 이미지가 다시 적재되면 자동으로 새로 읽는다.
+    """
+
+    def __init__(self, max_bytes=IMAGE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (경로, 수정 시각) -> 바이트
+        self._size = 0
+        self._lock = threading.Lock()
+
+        # 적중/실패 카운터와 화면으로 보낸 바이트 수
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+
+    def _put(self, key, data):
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def preview(self, image_path):
+        """미리보기 이미지 바이트 (원본이 없으면 None)"""
+        if not image_path or not os.path.exists(image_path):
+            return None
+        key = (image_path, os.path.getmtime(image_path))
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.bytes_served += len(data)
+                return data
+            self.misses += 1
+
+        with span("image.load_preview", path=os.path.basename(image_path)) as load_span:
+            try:
+                source = make_preview(image_path)
+            except OSError:
+                source = image_path  # PIL이 읽지 못하는 이미지는 원본을 그대로 사용
+            with open(source, "rb") as f:
+                data = f.read()
+            load_span.set(bytes=len(data))
+        self._put(key, data)
+        with self._lock:
+            self.bytes_served += len(data)
+        return data
+
+    def original(self, image_path):
+        """원본 이미지 바이트 (원본 보기를 요청했을 때만 사용)"""
+        if not image_path or not os.path.exists(image_path):
+            return None
+        with span("image.load_original", path=os.path.basename(image_path)) as load_span:
+            with open(image_path, "rb") as f:
+                data = f.read()
+            load_span.set(bytes=len(data))
+        with self._lock:
+            self.bytes_served += len(data)
+        return data
+
+    def format_stats(self):
+        with self._lock:
+            count, size = len(self._entries), self._size
+        return (
+            f"적중 {self.hits}, 실패 {self.misses}, {count}개 {size / 1024 / 1024:.1f}MB 보관, "
+            f"누적 전송 {self.bytes_served / 1024 / 1024:.1f}MB"
+        )
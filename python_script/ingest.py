@@ -0,0 +1,426 @@
+import json
+import os
+import re
+import shutil
+import threading
+
+import pandas as pd
+
+from python_script import resources
+from python_script.devide_pdf import page_image_dir
+from python_script.excel_reader import iter_sheet_frames, rows_to_documents, sheet_names
+from python_script.image_cache import make_previews
+from python_script.manifest import SourceSync, doc_id, sync_documents
+from python_script.pdf2txt import format_methods
+from python_script.pipeline import format_timings, run_pipeline, script_stage
+from python_script.spec_store import spec_ref
+from python_script.resources import PY_SCRIPT_DIR, UPLOAD_DIR
+
+# 적재 함수들은 진행 상황을 ui 객체로 보고한다.
+# ui는 success / error / info / warning 메서드와 spinner 컨텍스트 매니저를 가진 객체로,
+# Streamlit 화면에서는 st 모듈을, 백그라운드 작업에서는 jobs.JobReporter를 넘긴다.
+
+# 파이프라인 단계별 실행 결과 출력 (run_pipeline의 on_stage_done으로 사용)
+def stage_reporter(ui):
+    def on_stage_done(name, report):
+        if report["status"] == "ok":
+            ui.success(f"{name} 실행 완료 ✅ ({report['seconds']:.2f}초)")
+        elif report["status"] == "error":
+            ui.error(f"{name} 실행 중 오류 발생 ❌\n{report['error']}")
+        else:
+            ui.warning(f"{name} 건너뜀 (앞 단계 실패) ⚠️")
+    return on_stage_done
+
+# pa_documents 문서에 넣을 페이지 텍스트 최대 글자 수 (임베딩 모델 입력 길이에 맞춤)
+PAGE_TEXT_MAX_CHARS = 1000
+
+# ChromaDB 동기화 결과 출력
+def report_sync(ui, label, sync_result, collection_name):
+    if sync_result["added"]:
+        ui.info(f"임베딩 처리량: {resources.get_ingest_embedder(collection_name).format_stats()}")
+    ui.success(
+        f"✅ {label}: 추가 {sync_result['added']}개 / 삭제 {sync_result['removed']}개 / "
+        f"변경 없음 {sync_result['unchanged']}개"
+    )
+
+# PDF 처리 함수
+def process_pdf(file_path, ui):
+    pdf_file_name = os.path.basename(file_path)
+    pdf_name_only = os.path.splitext(pdf_file_name)[0]
+    work_dir = os.path.dirname(os.path.abspath(file_path))  # 적재 폴더 (ingest_file을 거치면 UPLOAD_DIR)
+
+    # PDF별 PNG 저장 폴더 설정 (적재 폴더 아래, devide_pdf.py와 같은 규칙)
+    pdf_png_dir = page_image_dir(file_path)
+
+    # 페이지 분할 → 텍스트 추출 → 와이어프레임 외 페이지 제거 → PA 넘버 추출 순서로 실행
+    stages = [
+        script_stage("devide_pdf.py", PY_SCRIPT_DIR),
+        script_stage("pdf2txt.py", PY_SCRIPT_DIR, depends_on=["devide_pdf.py"]),
+        script_stage("del_noWF.py", PY_SCRIPT_DIR, depends_on=["pdf2txt.py"]),
+        script_stage("pa_number.py", PY_SCRIPT_DIR, depends_on=["del_noWF.py"]),
+    ]
+
+    with ui.spinner(f"{pdf_file_name} 처리중..!"):
+        reports = run_pipeline(stages, file_path, on_stage_done=stage_reporter(ui))
+    ui.info(f"단계별 소요 시간: {format_timings(reports)}")
+
+    # pdf2txt 단계가 추출한 페이지 텍스트 (페이지 내용으로도 검색할 수 있도록 문서에 함께 저장)
+    page_texts = {}
+    text_result = reports["pdf2txt.py"]["result"]
+    if isinstance(text_result, dict):
+        page_texts = text_result["texts"]
+        ui.info(f"페이지 텍스트 추출: {format_methods(text_result)}")
+        if text_result.get("error"):
+            ui.warning(f"페이지 텍스트 추출 실패 (텍스트 없이 계속 진행): {text_result['error']}")
+
+    # 1. Chroma DB에 저장할 데이터 정리
+    pa_mapping = {}
+
+    # pa_number 단계가 같은 프로세스에서 실행되어 {페이지 번호: PA 넘버}를 돌려준 경우 파일을 다시 읽지 않음
+    pa_result = reports["pa_number.py"]["result"]
+    if isinstance(pa_result, dict):
+        pa_mapping = {int(page): pa for page, pa in pa_result.items() if pa and str(pa).lower() != "none"}
+    else:
+        # PA 넘버 파일 경로 설정 (pa_number.py가 UPLOAD_DIR 아래에 저장)
+        PA_FILE = os.path.join(work_dir, "EXTRACTED_ONLY_PA_NUMBER_EACHPAGE", f"{pdf_name_only}_pa_number.txt")
+
+        # PA 넘버 파일이 존재하는지 확인
+        if not os.path.exists(PA_FILE):
+            ui.error("PA 넘버 파일이 존재하지 않습니다! ❌")
+            return []
+
+        with open(PA_FILE, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+
+        # PA 넘버 정보 매핑
+        matches = re.findall(r'--- page_(\d+) ---\n(.*)', content)
+        for match in matches:
+            page_number = int(match[0])
+            pa_number = match[1].strip()
+            if pa_number.lower() != "none":  # PA넘버가 'None'인 결과값은 저장하지 않음
+                pa_mapping[page_number] = pa_number
+
+    # 2. PDF 이미지와 PA 넘버 매칭 후 Chroma DB 저장
+    documents, ids, metadatas = [], [], []
+
+    for page_file in sorted(os.listdir(pdf_png_dir)):
+        match = re.search(r'page_(\d+)\.(png|jpg|tif)$', page_file)  # devide_pdf.py --format에 따라 확장자가 달라짐
+        if match:
+            page_number = int(match.group(1))
+            if page_number in pa_mapping:
+                pa_number = pa_mapping[page_number]
+                image_path = os.path.join(pdf_png_dir, page_file)
+
+                # 문서 내용과 메타데이터 구성 (PA 넘버 + 페이지 텍스트)
+                doc_content = f"PA 넘버: {pa_number}"
+                page_text = page_texts.get(page_number, "")[:PAGE_TEXT_MAX_CHARS]
+                if page_text:
+                    doc_content += f"\n{page_text}"
+                doc_metadata = {
+                    "pa_number": pa_number,
+                    "image_path": image_path,
+                    "pdf_filename": pdf_file_name
+                }
+
+                # ChromaDB 저장을 위한 데이터 리스트 구성
+                documents.append(doc_content)
+                metadatas.append(doc_metadata)
+                ids.append(doc_id(pdf_file_name, page_number, f"{doc_content}\n{image_path}"))
+
+    # 3. ChromaDB와 동기화 (바뀐 페이지만 upsert, 사라진 페이지는 삭제)
+    sync_result = sync_documents(
+        resources.get_chroma_client("pa_documents"), resources.get_ingest_manifest(),
+        pdf_file_name, ids, documents, metadatas, resources.get_ingest_embedder("pa_documents"),
+        resources.get_join_index()
+    )
+    report_sync(ui, "PDF 페이지 데이터", sync_result, "pa_documents")
+
+    # 4. 채팅 화면에 보여줄 페이지 미리보기 생성 (원본은 원본 보기를 요청할 때만 읽음)
+    preview_count = make_previews([metadata["image_path"] for metadata in metadatas])
+    ui.info(f"페이지 미리보기 이미지 {preview_count}개 준비 완료")
+
+    return list(pa_mapping.values())
+
+# api_list 데이터 chroma db 적제
+# 엑셀의 API리스트 시트를 직접 스트리밍으로 읽음
+def store_api_list_in_chroma(excel_file_path, ui):
+    frames = iter_sheet_frames(excel_file_path, lambda name: "API리스트" in name, header_key="API ID")
+
+    source = os.path.basename(excel_file_path)
+    # ChromaDB와 묶음 단위로 동기화 (읽은 묶음마다 바뀐 행만 upsert, 사라진 행은 끝에서 삭제)
+    sync = SourceSync(
+        resources.get_chroma_client("api_list"), resources.get_ingest_manifest(),
+        source, resources.get_ingest_embedder("api_list"), resources.get_join_index()
+    )
+    sheets = set()
+
+    # 행 단위 반복 대신 DataFrame 컬럼 연산으로 document 문자열과 metadata를 만듦
+    for sheet_name, frame in frames:
+        sheets.add(sheet_name)
+        if frame.empty:
+            continue
+        sheet_documents = rows_to_documents(frame).tolist()  # 모든 키-값 쌍을 "키: 값" 줄로 변환
+
+        # API ID(ex.CMM001)와 사용화면아이디\n(없으면 비화면 API)(ex.PA1201001) 컬럼
+        pa_column = next((c for c in frame.columns if c.startswith("사용화면아이디")), None)
+        sheet_metadata = pd.DataFrame({
+            "source_file": excel_file_path,
+            "sheet_name": sheet_name,
+            "api_id": frame["API ID"].fillna("").astype(str) if "API ID" in frame else "",
+            "pa_number": frame[pa_column].fillna("").astype(str) if pa_column else "",
+        }, index=frame.index)
+
+        sync.add(
+            [doc_id(source, sheet_name, doc_content) for doc_content in sheet_documents],
+            sheet_documents,
+            sheet_metadata.to_dict("records"),
+        )
+
+    # 시트가 없으면 기존 행을 지우지 않도록 사라진 행 삭제(finish) 전에 중단
+    if not sheets:
+        ui.error(f"API리스트 시트를 찾을 수 없습니다: {source}")
+        return False
+
+    report_sync(ui, "API 리스트", sync.finish(), "api_list")
+    return True
+
+# API명세서 데이터 chroma db 적제
+# api_spec_data가 주어지면(파이프라인에서 메모리로 전달) JSON 파일을 다시 읽지 않음
+def store_api_spec_in_chroma(excel_file_path, ui, api_spec_data=None):
+    if api_spec_data is None:
+        API_DIR = os.path.join(os.path.dirname(os.path.abspath(excel_file_path)), "API_DIR")  # 적재 폴더(UPLOAD_DIR) 아래
+        json_output_path = os.path.join(API_DIR, f"{os.path.splitext(os.path.basename(excel_file_path))[0]}.json")
+
+        if not os.path.exists(json_output_path):
+            ui.error(f"API명세서 JSON 파일을 찾을 수 없습니다: {json_output_path}")
+            return False
+
+        with open(json_output_path, "r", encoding="utf-8") as f:
+            api_spec_data = json.load(f)
+
+    source = os.path.basename(excel_file_path)
+    documents, metadatas, ids, specs = [], [], [], []
+    for sheet_name, api_spec_list in api_spec_data.items(): # "API명세서"로 시작하는 시트이름으로 iteration
+        for item in api_spec_list:
+            # API ID 추출 (ex. item["설명"]["API ID"]
+            api_id = item.get("설명", {}).get("API ID", "") or "" # api_specification.py의 결과물에서 "설명":{"API ID": "CMM001"} → "CMM001" 추출
+
+            # document에는 API ID만 저장
+            doc_content = f"API ID: {api_id}"
+
+            # API 명세 본문은 명세 저장소에 압축해서 따로 저장하고, metadata에는 참조 키만 저장
+            # (조회 결과가 작아지고, 본문은 화면에 표시할 때만 읽음)
+            api_spec_info = json.dumps(item, ensure_ascii=False)
+            ref = spec_ref(source, sheet_name, api_id)
+
+            metadata = {
+                "api_id": api_id, # API ID를 metadata에 추가
+                "source_file": excel_file_path,
+                "sheet_name": sheet_name,
+                "api_spec_ref": ref  # 명세 저장소 키
+            }
+
+            documents.append(doc_content)
+            metadatas.append(metadata)
+            # 참조 키도 ID에 넣어, 예전 형식(API ID) 참조를 가진 행은 한 번 새 참조로 바뀌게 함
+            ids.append(doc_id(source, sheet_name, f"{ref}\n{api_spec_info}"))
+            specs.append((ref, item))
+
+    chroma_client = resources.get_chroma_client("api_spec")
+    manifest = resources.get_ingest_manifest()
+    spec_store = resources.get_spec_store()
+
+    # 이번 적재 전에 이 파일의 행들이 가리키던 참조 키
+    previous_ids = sorted(manifest.get_ids("api_spec", source))
+    previous_refs = set()
+    if previous_ids:
+        previous = chroma_client._collection.get(ids=previous_ids, include=["metadatas"])
+        previous_refs = {metadata.get("api_spec_ref") for metadata in previous["metadatas"] if metadata}
+
+    # 새 참조가 가리킬 본문을 먼저 저장 (동기화 중에도 참조가 빈 명세를 가리키지 않도록)
+    spec_store.put_many(specs)
+
+    # Chroma DB와 동기화 (바뀐 명세만 upsert, 사라진 명세는 삭제)
+    sync_result = sync_documents(
+        chroma_client, manifest,
+        source, ids, documents, metadatas, resources.get_ingest_embedder("api_spec"),
+        resources.get_join_index()
+    )
+
+    # 이번 적재로 더 이상 어떤 행도 가리키지 않게 된 명세 본문은 삭제
+    stale_refs = previous_refs - {ref for ref, _ in specs} - {None, ""}
+    unused_refs = [
+        ref for ref in stale_refs
+        if not chroma_client._collection.get(where={"api_spec_ref": ref}, limit=1, include=[])["ids"]
+    ]
+    if unused_refs:
+        spec_store.delete_many(unused_refs)
+    report_sync(ui, "API 명세서", sync_result, "api_spec")
+    return True
+
+# 엑셀 파일 처리 및 ChromaDB 저장 함수
+def process_excel(file_path, ui):
+    file_name = os.path.basename(file_path)
+
+    try:
+        # 엑셀 파일 관련 스크립트 실행
+        scripts = []
+        sheets = sheet_names(file_path)  # 읽기 전용 모드로 시트 이름만 확인
+
+        if any("DB_TABLE" in sheet for sheet in sheets):
+            scripts.append("dbTable2json.py")
+        if any("기능목록정의서" in sheet for sheet in sheets):
+            scripts.append("fc.py")
+        if any("API명세서" in sheet for sheet in sheets):
+            scripts.append("api_specification.py")
+        # API리스트 시트는 별도 스크립트 없이 store_api_list_in_chroma에서 직접 읽음
+
+        # 시트 파서들은 서로 독립적이므로 동시에 실행
+        with ui.spinner(f"{file_name} 처리중..!"):
+            reports = run_pipeline(
+                [script_stage(script, PY_SCRIPT_DIR) for script in scripts],
+                file_path,
+                on_stage_done=stage_reporter(ui)
+            )
+        if reports:
+            ui.info(f"단계별 소요 시간: {format_timings(reports)}")
+        if any(report["status"] != "ok" for report in reports.values()):
+            return False  # 스크립트 실패 시 즉시 종료
+
+        # 같은 프로세스에서 실행된 파서가 돌려준 JSON 데이터는 메모리로 바로 전달
+        def parsed_data(script):
+            result = reports.get(script, {}).get("result")
+            return result if isinstance(result, dict) else None
+
+        # API 리스트 및 명세서 ChromaDB에 저장
+        success_api_list = store_api_list_in_chroma(file_path, ui)
+        # API 명세서를 ChromaDB에 저장
+        success_api_spec = store_api_spec_in_chroma(file_path, ui, parsed_data("api_specification.py"))
+
+        if success_api_list and success_api_spec:
+            ui.success(f"✅ 엑셀 파일({file_name}) 처리 완료!")
+            return True
+        else:
+            ui.error("❌ 엑셀 파일의 API 리스트 또는 명세서 ChromaDB 저장 실패!")
+            return False
+
+    except Exception as e:
+        ui.error(f"❌ 엑셀 처리 중 오류 발생: {str(e)}")
+        return False
+
+# UML 파일 처리 및 업로드 함수
+def process_puml(file_path, ui):
+    file_name = os.path.basename(file_path)
+
+    try:
+        # puml 파일 관련 스크립트 실행
+        with ui.spinner(f"{file_name} 처리중..!"):
+            reports = run_pipeline([script_stage("convert_uml2img.py", PY_SCRIPT_DIR)], file_path)
+        report = reports["convert_uml2img.py"]
+
+        if report["status"] == "ok":
+            png_path = None
+            title_code = None
+            db_tables = None
+
+            if isinstance(report["result"], dict):
+                # 같은 프로세스에서 실행된 경우 반환값을 그대로 사용
+                png_path = report["result"].get("png_path")
+                title_code = report["result"].get("title_code")
+                db_tables = report["result"].get("db_tables")
+            else:
+                # Extract the returned values from the standard output
+                output_lines = report["result"].strip().split('\n')
+                for line in output_lines:
+                    if line.startswith("PNG Path:"):
+                        png_path = line.split("PNG Path:")[1].strip()
+                    elif line.startswith("Title Code:"):
+                        title_code = line.split("Title Code:")[1].strip()
+                    elif line.startswith("DB Tables:"):
+                        db_tables = line.split("DB Tables:")[1].strip().replace("[","").replace("]","").replace("'","").split(", ")
+
+            if png_path and title_code and db_tables:
+                # Store data in ChromaDB
+                doc_content = f"UML Diagram for API ID: {title_code}"
+                metadata = {
+                    "api_id": title_code,
+                    "db_name": db_tables,
+                    "png_path": png_path,
+                    "source_file": file_name
+                }
+                uml_id = doc_id(file_name, "uml", json.dumps(metadata, ensure_ascii=False, sort_keys=True))
+                sync_result = sync_documents(
+                    resources.get_chroma_client("puml"), resources.get_ingest_manifest(),
+                    file_name, [uml_id], [doc_content], [metadata], resources.get_ingest_embedder("puml"),
+                    resources.get_join_index()
+                )
+                report_sync(ui, "UML", sync_result, "puml")
+                make_previews([png_path])
+
+                ui.success(f"✅ UML 파일({file_name}) 처리 완료! API ID: {title_code}, DB Tables: {db_tables}")
+                return True
+            else:
+                ui.error("❌ UML 파일 처리 중 필요한 정보 추출 실패!")
+                return False
+        else:
+            ui.error(f"❌ convert_uml2img.py 실행 실패 ❌\n{report['error']}")
+            return False
+
+    except Exception as e:
+        ui.error(f"❌ puml 처리 중 오류 발생: {str(e)}")
+        return False
+
+# 외부 보조 스크립트(del_noWF.py, pa_number.py, api_specification.py, convert_uml2img.py 등)는
+# UPLOAD_DIR 아래 고정된 위치(DEVIDED_PDF_DIR, EXTRACTED_ONLY_PA_NUMBER_EACHPAGE, API_DIR 등)를 쓰고
+# 입력 파일도 "UPLOAD_DIR에서 가장 최근 파일"로 찾는다. 그래서 업로드 작업 폴더(uploads/<해시>)의
+# 파일을 UPLOAD_DIR/<파일명>으로 옮겨서 적재하고, 같은 종류의 파일은 한 번에 하나씩만 적재한다.
+def ingest_key(file_path):
+    """JobQueue에서 하나씩 처리할 작업을 정하는 키 (파일 확장자)"""
+    return os.path.splitext(file_path)[1].lower()
+
+
+def stage_upload(file_path, ingest_dir=UPLOAD_DIR):
+    """업로드 작업 폴더의 파일을 ingest_dir/<파일명>으로 복사하고 그 경로를 반환
+
+    임시 파일에 쓴 뒤 이름을 바꾸므로 보조 스크립트가 반쯤 쓴 파일을 읽지 않고, 복사한 파일이
+    ingest_dir에서 가장 최근 파일이 된다.
+    """
+    target = os.path.join(ingest_dir, os.path.basename(file_path))
+    if os.path.abspath(file_path) == os.path.abspath(target):
+        return target
+    os.makedirs(ingest_dir, exist_ok=True)
+    tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.copyfile(file_path, tmp_path)
+    os.replace(tmp_path, target)
+    return target
+
+# 업로드된 파일 처리 함수: 확장자별로 처리하고, 성공하면 매니페스트에 파일 해시 기록
+def ingest_file(file_path, file_hash, ui):
+    file_path = stage_upload(file_path)
+    file_name = os.path.basename(file_path)
+    file_extension = file_name.split(".")[-1].lower()
+
+    if file_extension == "pdf":
+        try:
+            pa_numbers = process_pdf(file_path, ui)
+        except Exception as e:
+            ui.error(f"❌ PDF 처리 실패: {str(e)}")
+            return False
+        success = bool(pa_numbers)
+        if success:
+            ui.success(f"✅ 새로운 PDF 파일({file_name})이 처리되었습니다!")
+    elif file_extension == "xlsx":
+        success = process_excel(file_path, ui)
+        if not success:
+            ui.error("❌ 엑셀 처리 실패!")
+    elif file_extension == "puml":
+        success = process_puml(file_path, ui)
+        if not success:
+            ui.error("🚫 puml 파일 처리 실패!!")
+    else:
+        ui.error("❌ 지원하지 않는 파일 형식입니다. (pdf, xlsx, puml 파일만 업로드 가능)")
+        return False
+
+    if success:
+        resources.get_ingest_manifest().record_file(file_name, file_hash)
+    return success
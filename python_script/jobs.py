@@ -0,0 +1,226 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from python_script.tracing import span
+
+# 백그라운드 적재 작업 설정
+JOBS_PATH = "./chroma_db/ingest_jobs.sqlite3"
+JOB_WORKERS = 3  # 동시에 처리할 수 있는 업로드 수
+
+# 작업 상태
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobStore:
+    """작업 상태와 진행 메시지를 SQLite에 저장 (페이지를 새로고침해도 유지)"""
+
+    def __init__(self, path=JOBS_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " file_name TEXT NOT NULL,"
+                " file_path TEXT NOT NULL,"
+                " file_hash TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " stage TEXT,"
+                " messages TEXT NOT NULL DEFAULT '[]',"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            # 작업을 등록한(같은 파일을 올려 같은 작업을 받은 경우 포함) 세션 목록
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_sessions ("
+                " job_id TEXT NOT NULL,"
+                " session_id TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (job_id, session_id))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS job_sessions_session ON job_sessions(session_id, created_at)")
+            self._conn.commit()
+
+    def create(self, file_path, file_hash):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, file_name, file_path, file_hash, status, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, os.path.basename(file_path), file_path, file_hash, QUEUED, now, now),
+            )
+            self._conn.commit()
+        return job_id
+
+    def update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def add_message(self, job_id, level, text):
+        with self._lock:
+            row = self._conn.execute("SELECT messages FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            messages = json.loads(row["messages"]) if row else []
+            messages.append({"level": level, "text": text, "time": time.time()})
+            self._conn.execute(
+                "UPDATE jobs SET messages = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(messages, ensure_ascii=False), time.time(), job_id),
+            )
+            self._conn.commit()
+
+    def _to_dict(self, row):
+        job = dict(row)
+        job["messages"] = json.loads(job["messages"])
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def link_session(self, job_id, session_id):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_sessions (job_id, session_id, created_at) VALUES (?, ?, ?)",
+                (job_id, session_id, time.time()),
+            )
+            self._conn.commit()
+
+    def recent(self, session_id, limit=5):
+        """세션이 등록한 최근 작업 (최신순)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT jobs.* FROM job_sessions JOIN jobs ON jobs.id = job_sessions.job_id"
+                " WHERE job_sessions.session_id = ? ORDER BY job_sessions.created_at DESC LIMIT ?",
+                (session_id, limit),
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def unfinished(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def find_active(self, file_name, file_hash):
+        """같은 파일(이름 + 해시)의 대기/실행 중 작업 ID를 반환"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE file_name = ? AND file_hash = ? AND status IN (?, ?)",
+                (file_name, file_hash, QUEUED, RUNNING),
+            ).fetchone()
+        return row["id"] if row else None
+
+
+class JobReporter:
+    """적재 함수의 ui 인터페이스(success/error/info/warning/spinner)를 작업 기록으로 바꿔주는 객체"""
+
+    def __init__(self, store, job_id):
+        self.store = store
+        self.job_id = job_id
+
+    def success(self, text):
+        self.store.add_message(self.job_id, "success", text)
+
+    def error(self, text):
+        self.store.add_message(self.job_id, "error", text)
+
+    def info(self, text):
+        self.store.add_message(self.job_id, "info", text)
+
+    def warning(self, text):
+        self.store.add_message(self.job_id, "warning", text)
+
+    @contextmanager
+    def spinner(self, text):
+        self.store.update(self.job_id, stage=text)
+        yield
+
+
+class JobQueue:
+    """업로드 파일을 작업으로 등록하고 워커 풀에서 처리하는 큐
+
+    serial_key(파일 경로)가 같은 작업은 하나씩 순서대로 처리한다(기본은 파일 이름, 즉 적재 매니페스트의
+    source). 같은 이름의 두 버전이 동시에 동기화되면 서로의 문서 ID 기록을 덮어써 지워지지 않는 행이
+    남기 때문이다. 차례를 기다리는 작업은 워커를 잡지 않고 키별 대기열에 있다가, 앞 작업을 처리한
+    워커가 이어서 처리한다.
+    """
+
+    def __init__(self, handler, store=None, max_workers=JOB_WORKERS, serial_key=os.path.basename):
+        # handler(file_path, file_hash, ui) -> bool
+        self.handler = handler
+        self.store = store or JobStore()
+        self.serial_key = serial_key
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest-job")
+        self._waiting = {}  # 처리 중인 직렬화 키 -> 차례를 기다리는 작업 ID 대기열
+        self._waiting_lock = threading.Lock()
+
+        # 이전 프로세스에서 끝나지 못한 작업은 다시 실행 (적재가 멱등이므로 안전)
+        for job in self.store.unfinished():
+            self.store.update(job["id"], status=QUEUED, stage="재시작 후 다시 대기 중")
+            self._schedule(job["id"], job["file_path"])
+
+    def submit(self, file_path, file_hash, session_id=None):
+        """작업을 등록하고 ID를 반환 (같은 파일이 이미 대기/실행 중이면 그 작업 ID를 반환)
+
+        session_id가 주어지면 작업을 그 세션에 연결해, 페이지를 새로고침해도 store.recent()로 다시 찾을 수 있게 한다.
+        """
+        job_id = self.store.find_active(os.path.basename(file_path), file_hash)
+        if not job_id:
+            job_id = self.store.create(file_path, file_hash)
+            self._schedule(job_id, file_path)
+        if session_id:
+            self.store.link_session(job_id, session_id)
+        return job_id
+
+    def _schedule(self, job_id, file_path):
+        """같은 키의 작업이 처리 중이면 대기열에 넣고, 아니면 워커 풀에 넘김"""
+        key = self.serial_key(file_path)
+        with self._waiting_lock:
+            if key in self._waiting:
+                self._waiting[key].append(job_id)
+                self.store.update(job_id, stage="같은 이름의 파일 처리가 끝나기를 기다리는 중")
+                return
+            self._waiting[key] = deque()
+        self._executor.submit(self._run_serial, key, job_id)
+
+    def _run_serial(self, key, job_id):
+        """작업을 처리하고, 그동안 같은 키로 들어온 작업이 있으면 이어서 처리"""
+        while job_id is not None:
+            try:
+                self._run(job_id)
+            finally:
+                with self._waiting_lock:
+                    waiting = self._waiting[key]
+                    job_id = waiting.popleft() if waiting else None
+                    if job_id is None:
+                        del self._waiting[key]
+
+    def _run(self, job_id):
+        job = self.store.get(job_id)
+        self.store.update(job_id, status=RUNNING, stage="처리 시작")
+        reporter = JobReporter(self.store, job_id)
+        try:
+            with span("ingest.job", file=job["file_name"]) as job_span:
+                success = self.handler(job["file_path"], job["file_hash"], reporter)
+                job_span.set(success=int(bool(success)))
+        except Exception as e:
+            reporter.error(f"❌ 처리 중 오류 발생: {str(e)}")
+            success = False
+        self.store.update(job_id, status=DONE if success else FAILED, stage="완료" if success else "실패")
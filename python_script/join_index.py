@@ -0,0 +1,174 @@
+import json
+import os
+import sqlite3
+import threading
+
+# PA 넘버 조인 인덱스 설정
+JOIN_INDEX_PATH = "./chroma_db/join_index.sqlite3"
+JOIN_INDEX_VERSION = 3  # 테이블 구조가 바뀌면 올림 (버전이 다르면 비우고 Chroma에서 다시 채움)
+
+# 컬렉션별로 조인 인덱스에 옮겨 담는 테이블과 컬럼 (metadata 키 -> 컬럼)
+COLLECTION_TABLES = {
+    "pa_documents": ("pa_pages", {"pa_number": "pa_number", "pdf_filename": "pdf_filename", "image_path": "image_path"}),
+    "api_list": ("pa_apis", {"pa_number": "pa_number", "api_id": "api_id"}),
+    # 예전 적재분은 명세 참조 대신 명세 JSON(api_spec_info)을 metadata에 직접 갖고 있음
+    "api_spec": ("api_specs", {"api_id": "api_id", "api_spec_ref": "spec_ref", "api_spec_info": "spec_json"}),
+    "puml": ("api_umls", {"api_id": "api_id", "png_path": "png_path"}),
+}
+
+
+class JoinIndex:
+    """PA 넘버 → 페이지/이미지, API ID, 명세 참조, UML PNG를 미리 조인해 둔 인덱스
+
+    네 컬렉션의 변경분을 apply()로 받아 기본 테이블을 갱신하고, 영향을 받은 PA 넘버의
+    조인 결과(pa_join)만 다시 계산한다. 채팅에서는 lookup()으로 키 조회 한 번만 하면 된다.
+    """
+
+    def __init__(self, path=JOIN_INDEX_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != JOIN_INDEX_VERSION:
+                self._conn.executescript(
+                    """
+                    DROP TABLE IF EXISTS pa_pages;
+                    DROP TABLE IF EXISTS pa_apis;
+                    DROP TABLE IF EXISTS api_specs;
+                    DROP TABLE IF EXISTS api_umls;
+                    DROP TABLE IF EXISTS pa_join;
+                    """
+                )
+                self._conn.execute(f"PRAGMA user_version = {JOIN_INDEX_VERSION}")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS pa_pages (
+                    doc_id TEXT PRIMARY KEY, pa_number TEXT, pdf_filename TEXT, image_path TEXT);
+                CREATE TABLE IF NOT EXISTS pa_apis (
+                    doc_id TEXT PRIMARY KEY, pa_number TEXT, api_id TEXT, document TEXT);
+                CREATE TABLE IF NOT EXISTS api_specs (
+                    doc_id TEXT PRIMARY KEY, api_id TEXT, spec_ref TEXT, spec_json TEXT);
+                CREATE TABLE IF NOT EXISTS api_umls (
+                    doc_id TEXT PRIMARY KEY, api_id TEXT, png_path TEXT);
+                CREATE TABLE IF NOT EXISTS pa_join (
+                    pa_number TEXT PRIMARY KEY, payload TEXT NOT NULL);
+                CREATE INDEX IF NOT EXISTS pa_pages_pa ON pa_pages(pa_number);
+                CREATE INDEX IF NOT EXISTS pa_apis_pa ON pa_apis(pa_number);
+                CREATE INDEX IF NOT EXISTS pa_apis_api ON pa_apis(api_id);
+                CREATE INDEX IF NOT EXISTS api_specs_api ON api_specs(api_id);
+                CREATE INDEX IF NOT EXISTS api_umls_api ON api_umls(api_id);
+                """
+            )
+            self._conn.commit()
+
+    def is_empty(self):
+        with self._lock:
+            return all(
+                self._conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None
+                for table, _ in COLLECTION_TABLES.values()
+            )
+
+    # --- 갱신 ---
+    def _affected_pa_numbers(self, table, doc_ids=(), metadatas=()):
+        """변경된 행 때문에 다시 계산해야 하는 PA 넘버 목록"""
+        pa_numbers = set()
+        api_ids = set()
+        key = "pa_number" if table in ("pa_pages", "pa_apis") else "api_id"
+
+        for metadata in metadatas:
+            (pa_numbers if key == "pa_number" else api_ids).add(metadata.get(key) or "")
+        for doc_id in doc_ids:
+            row = self._conn.execute(f"SELECT {key} FROM {table} WHERE doc_id = ?", (doc_id,)).fetchone()
+            if row:
+                (pa_numbers if key == "pa_number" else api_ids).add(row[0] or "")
+
+        # 명세/UML이 바뀌면 그 API ID를 쓰는 PA 넘버를 다시 계산
+        for api_id in api_ids:
+            rows = self._conn.execute("SELECT DISTINCT pa_number FROM pa_apis WHERE api_id = ?", (api_id,))
+            pa_numbers.update(row[0] for row in rows)
+        pa_numbers.discard("")
+        return pa_numbers
+
+    def _build_payload(self, pa_number):
+        pages = [
+            {"doc_id": doc_id, "pdf_filename": pdf_filename, "image_path": image_path}
+            for doc_id, pdf_filename, image_path in self._conn.execute(
+                "SELECT doc_id, pdf_filename, image_path FROM pa_pages WHERE pa_number = ? ORDER BY rowid", (pa_number,)
+            )
+        ]
+        apis = [
+            {"doc_id": doc_id, "api_id": api_id, "document": document}
+            for doc_id, api_id, document in self._conn.execute(
+                "SELECT doc_id, api_id, document FROM pa_apis WHERE pa_number = ? ORDER BY rowid", (pa_number,)
+            )
+        ]
+        if not pages and not apis:
+            return None
+
+        specs, umls = {}, {}
+        for api_id in {api["api_id"] for api in apis if api["api_id"]}:
+            # 명세 참조가 있는 행을 우선 쓰고, 없으면 예전 형식의 명세 JSON을 씀 (api_spec 결과 metadata 형식)
+            spec = self._conn.execute(
+                "SELECT spec_ref, spec_json FROM api_specs"
+                " WHERE api_id = ? AND (spec_ref IS NOT NULL OR spec_json IS NOT NULL)"
+                " ORDER BY spec_ref IS NULL, rowid LIMIT 1",
+                (api_id,),
+            ).fetchone()
+            if spec:
+                specs[api_id] = {"api_spec_ref": spec[0]} if spec[0] else {"api_spec_info": spec[1]}
+            uml = self._conn.execute(
+                "SELECT png_path FROM api_umls WHERE api_id = ? ORDER BY rowid LIMIT 1", (api_id,)
+            ).fetchone()
+            if uml:
+                umls[api_id] = uml[0]
+
+        return {"pa_number": pa_number, "pages": pages, "apis": apis, "specs": specs, "umls": umls}
+
+    def apply(self, collection_name, added=(), removed_ids=()):
+        """컬렉션 변경분 반영: added는 (doc_id, document, metadata) 목록, removed_ids는 삭제된 doc_id 목록"""
+        if collection_name not in COLLECTION_TABLES:
+            return
+        table, columns = COLLECTION_TABLES[collection_name]
+        added = [(doc_id, document, metadata or {}) for doc_id, document, metadata in added]
+        removed_ids = list(removed_ids)
+
+        with self._lock:
+            # 삭제 전에 영향을 받는 PA 넘버를 먼저 모아 둠 (추가분은 metadata에서, 삭제분은 기존 행에서)
+            affected = self._affected_pa_numbers(table, removed_ids, [metadata for _, _, metadata in added])
+
+            self._conn.executemany(f"DELETE FROM {table} WHERE doc_id = ?", [(i,) for i in removed_ids])
+
+            names = ["doc_id", *columns.values()] + (["document"] if table == "pa_apis" else [])
+            rows = []
+            for doc_id, document, metadata in added:
+                row = [doc_id, *(metadata.get(key) for key in columns)]
+                if table == "pa_apis":
+                    row.append(document)
+                rows.append(row)
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})", rows
+            )
+
+            for pa_number in affected:
+                payload = self._build_payload(pa_number)
+                if payload is None:
+                    self._conn.execute("DELETE FROM pa_join WHERE pa_number = ?", (pa_number,))
+                else:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO pa_join (pa_number, payload) VALUES (?, ?)",
+                        (pa_number, json.dumps(payload, ensure_ascii=False)),
+                    )
+            self._conn.commit()
+
+    def rebuild_from_chroma(self, chroma_clients):
+        """기존 Chroma 컬렉션 전체로 인덱스를 처음부터 채움 ({컬렉션 이름: Chroma 클라이언트})"""
+        for collection_name, chroma_client in chroma_clients.items():
+            data = chroma_client._collection.get(include=["documents", "metadatas"])
+            self.apply(collection_name, added=zip(data["ids"], data["documents"], data["metadatas"]))
+
+    # --- 조회 ---
+    def lookup(self, pa_number):
+        """PA 넘버 하나로 조인 결과 조회 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM pa_join WHERE pa_number = ?", (pa_number,)).fetchone()
+        return json.loads(row[0]) if row else None
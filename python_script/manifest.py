@@ -0,0 +1,241 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from python_script.tracing import span
+
+# 적재 매니페스트 설정
+MANIFEST_PATH = "./chroma_db/ingest_manifest.sqlite3"
+REINDEX_BATCH_SIZE = 1000  # 동기화/재색인 시 Chroma get/upsert 한 번에 넣을 문서 수 (Chroma max_batch_size보다 작게)
+
+
+def file_hash(path):
+    """파일 내용의 sha256 해시"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def doc_id(source, part, content):
+    """원본 파일, 시트/페이지, 행 내용으로 항상 같은 값이 나오는 문서 ID 생성"""
+    key = f"{source}\x00{part}\x00{content}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+class IngestManifest:
+    """처리한 파일의 해시와 컬렉션별로 저장한 문서 ID를 기록하는 SQLite 매니페스트"""
+
+    def __init__(self, path=MANIFEST_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " source TEXT PRIMARY KEY,"
+                " file_hash TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " collection TEXT NOT NULL,"
+                " source TEXT NOT NULL,"
+                " doc_id TEXT NOT NULL,"
+                " PRIMARY KEY (collection, doc_id))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS documents_source ON documents(collection, source)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS collection_versions ("
+                " collection TEXT PRIMARY KEY,"
+                " version INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS collection_backends ("
+                " collection TEXT PRIMARY KEY,"
+                " backend TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    def is_unchanged(self, source, digest):
+        """같은 내용의 파일을 이미 처리했는지 확인"""
+        with self._lock:
+            row = self._conn.execute("SELECT file_hash FROM files WHERE source = ?", (source,)).fetchone()
+        return row is not None and row[0] == digest
+
+    def record_file(self, source, digest):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (source, file_hash, updated_at) VALUES (?, ?, ?)",
+                (source, digest, time.time()),
+            )
+            self._conn.commit()
+
+    def get_ids(self, collection, source):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT doc_id FROM documents WHERE collection = ? AND source = ?", (collection, source)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def add_ids(self, collection, source, ids):
+        """source의 문서 ID 추가 (동기화 도중 실패해도 이미 넣은 행을 다음 동기화에서 정리할 수 있도록)"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents (collection, source, doc_id) VALUES (?, ?, ?)",
+                [(collection, source, i) for i in ids],
+            )
+            self._conn.commit()
+
+    def replace_ids(self, collection, source, ids):
+        with self._lock:
+            self._conn.execute("DELETE FROM documents WHERE collection = ? AND source = ?", (collection, source))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents (collection, source, doc_id) VALUES (?, ?, ?)",
+                [(collection, source, i) for i in ids],
+            )
+            self._conn.commit()
+
+    def bump_version(self, collection):
+        """컬렉션 내용이 바뀔 때마다 버전을 1 올림 (응답 캐시 무효화 기준)"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO collection_versions (collection, version) VALUES (?, 1)"
+                " ON CONFLICT(collection) DO UPDATE SET version = version + 1",
+                (collection,),
+            )
+            self._conn.commit()
+
+    def versions(self):
+        """{컬렉션 이름: 버전}"""
+        with self._lock:
+            rows = self._conn.execute("SELECT collection, version FROM collection_versions").fetchall()
+        return dict(rows)
+
+    def backend(self, collection):
+        """컬렉션의 벡터를 만든 임베딩 백엔드 (기록이 없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT backend FROM collection_backends WHERE collection = ?", (collection,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def record_backend(self, collection, backend):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO collection_backends (collection, backend) VALUES (?, ?)", (collection, backend)
+            )
+            self._conn.commit()
+
+
+class SourceSync:
+    """source 하나의 문서를 묶음(청크) 단위로 컬렉션과 동기화
+
+    add()로 받은 묶음마다 이미 컬렉션에 있는 ID는 그대로 두고 새 ID만 임베딩해서 upsert하고,
+    finish()에서 이전 적재에는 있었지만 이번에 한 번도 나오지 않은 ID를 삭제한다.
+    전체 행을 메모리에 모으지 않으므로 큰 엑셀도 읽는 대로 적재할 수 있다.
+    Chroma get/upsert는 batch_size개씩 나눠서 호출한다.
+    join_index가 주어지면 같은 변경분을 조인 인덱스에도 반영한다.
+    """
+
+    def __init__(self, chroma_client, manifest, source, embedder, join_index=None, batch_size=REINDEX_BATCH_SIZE):
+        self.collection = chroma_client._collection
+        self.manifest = manifest
+        self.source = source
+        self.embedder = embedder
+        self.join_index = join_index
+        self.batch_size = batch_size
+        self.previous_ids = manifest.get_ids(self.collection.name, source)
+        self.seen = set()
+        self.added = 0
+
+    def add(self, ids, documents, metadatas):
+        """문서 묶음을 동기화하고 새로 넣은 문서 수를 반환"""
+        collection_name = self.collection.name
+        with span("chroma.sync", profile=True, collection=collection_name, rows=len(ids)) as sync_span:
+            # 같은 내용의 행이 여러 번 나오면(앞 묶음 포함) ID가 같으므로 첫 번째만 사용
+            rows = {}
+            for i, document, metadata in zip(ids, documents, metadatas):
+                if i not in self.seen:
+                    rows.setdefault(i, (document, metadata))
+            new_ids = list(rows)
+            self.seen.update(new_ids)
+
+            to_add = []
+            for start in range(0, len(new_ids), self.batch_size):
+                batch = new_ids[start:start + self.batch_size]
+                existing = set(self.collection.get(ids=batch, include=[])["ids"])
+                to_add.extend(i for i in batch if i not in existing)
+
+            if to_add:
+                self.manifest.add_ids(collection_name, self.source, to_add)
+            for start in range(0, len(to_add), self.batch_size):
+                batch = to_add[start:start + self.batch_size]
+                batch_documents = [rows[i][0] for i in batch]
+                self.collection.upsert(
+                    ids=batch,
+                    documents=batch_documents,
+                    metadatas=[rows[i][1] for i in batch],
+                    embeddings=self.embedder.embed_documents(batch_documents),
+                )
+            if self.join_index is not None and to_add:
+                self.join_index.apply(collection_name, added=[(i, *rows[i]) for i in to_add])
+            self.added += len(to_add)
+            sync_span.set(added=len(to_add))
+        return len(to_add)
+
+    def finish(self):
+        """사라진 문서를 삭제하고 매니페스트를 갱신한 뒤 {"added", "removed", "unchanged"} 개수를 반환"""
+        collection_name = self.collection.name
+        with span("chroma.sync_finish", collection=collection_name) as finish_span:
+            to_remove = sorted(self.previous_ids - self.seen)
+            for start in range(0, len(to_remove), self.batch_size):
+                self.collection.delete(ids=to_remove[start:start + self.batch_size])
+            self.manifest.replace_ids(collection_name, self.source, self.seen)
+            if self.added or to_remove:
+                self.manifest.bump_version(collection_name)
+            if self.join_index is not None and to_remove:
+                self.join_index.apply(collection_name, removed_ids=to_remove)
+            finish_span.set(removed=len(to_remove))
+        return {"added": self.added, "removed": len(to_remove), "unchanged": len(self.seen) - self.added}
+
+
+def sync_documents(chroma_client, manifest, source, ids, documents, metadatas, embedder, join_index=None,
+                   batch_size=REINDEX_BATCH_SIZE):
+    """source에서 나온 문서 집합을 컬렉션과 한 번에 동기화 (SourceSync 참고)
+
+    ID가 내용으로부터 만들어지므로, 이미 컬렉션에 있는 ID는 그대로 두고 새 ID만 임베딩해서
+    upsert하며, 이전 적재에는 있었지만 이번에 사라진 ID는 삭제한다.
+    반환값: {"added", "removed", "unchanged"} 개수
+    """
+    sync = SourceSync(chroma_client, manifest, source, embedder, join_index, batch_size)
+    sync.add(ids, documents, metadatas)
+    return sync.finish()
+
+
+def reindex_collection(chroma_client, manifest, embedder, batch_size=REINDEX_BATCH_SIZE):
+    """컬렉션에 저장된 문서를 새 임베딩 백엔드로 다시 임베딩 (원본 파일 없이 재색인)
+
+    백엔드가 바뀌면 벡터 차원이 달라져 기존 컬렉션에 섞어 넣을 수 없으므로 컬렉션을 비우고 새로 만든다.
+    문서 ID와 metadata는 내용으로 정해지므로 그대로 두며, 매니페스트와 조인 인덱스도 바꿀 필요가 없다.
+    반환값: 다시 임베딩한 문서 수
+    """
+    collection_name = chroma_client._collection.name
+    with span("chroma.reindex", profile=True, collection=collection_name) as reindex_span:
+        data = chroma_client._collection.get(include=["documents", "metadatas"])
+        chroma_client.reset_collection()
+        collection = chroma_client._collection
+        for i in range(0, len(data["ids"]), batch_size):
+            documents = data["documents"][i:i + batch_size]
+            collection.upsert(
+                ids=data["ids"][i:i + batch_size],
+                documents=documents,
+                metadatas=data["metadatas"][i:i + batch_size],
+                embeddings=embedder.embed_documents(documents),
+            )
+        manifest.bump_version(collection_name)
+        reindex_span.set(rows=len(data["ids"]))
+    return len(data["ids"])
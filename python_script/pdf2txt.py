@@ -0,0 +1,236 @@
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from python_script.devide_pdf import chunk_pages, divide_pdf, page_image_dir
+except ModuleNotFoundError as e:
+    if e.name != "python_script":
+        raise
+    # python python_script/pdf2txt.py처럼 파일 경로로 실행하면 이 폴더가 import 경로의 맨 앞에 옴
+    from devide_pdf import chunk_pages, divide_pdf, page_image_dir
+
+# 텍스트 추출 설정
+PAGE_TEXT_CACHE_PATH = "./chroma_db/page_text.sqlite3"
+TEXT_DIR_NAME = "EXTRACTED_TEXT"  # PDF가 있는 폴더 아래에 페이지별 텍스트 파일을 저장할 폴더 이름
+OCR_MIN_CHARS = 10  # 텍스트 레이어의 글자 수(공백 제외)가 이보다 적으면 이미지 전용 페이지로 보고 OCR
+OCR_LANG = os.environ.get("OCR_LANG", "kor+eng")
+MAX_WORKERS = os.cpu_count() or 1
+# 추출 방식이 바뀌면 올려서 캐시된 텍스트를 다시 추출하게 함
+EXTRACT_VERSION = 1
+
+# 페이지 텍스트를 얻은 방식
+TEXT_LAYER = "text"
+OCR = "ocr"
+EMPTY = "empty"  # 텍스트 레이어가 없고 OCR도 쓸 수 없거나 결과가 비어 있음
+
+
+def page_hash(image_path):
+    """페이지 이미지 내용 + 추출 설정으로 만든 캐시 키 (PDF가 바뀌어도 같은 페이지는 다시 추출하지 않음)"""
+    digest = hashlib.sha256(f"{EXTRACT_VERSION}\x00{OCR_LANG}\x00".encode("utf-8"))
+    with open(image_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def clean_text(text):
+    """줄마다 앞뒤 공백과 연속 공백을 정리하고 빈 줄을 제거"""
+    lines = (re.sub(r"\s+", " ", line).strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class PageTextCache:
+    """페이지 해시 → 추출한 텍스트를 저장하는 SQLite 캐시 (모든 PDF가 공유)"""
+
+    def __init__(self, path=PAGE_TEXT_CACHE_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS page_text ("
+                " page_hash TEXT PRIMARY KEY,"
+                " text TEXT NOT NULL,"
+                " method TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get_many(self, hashes):
+        """{페이지 해시: (텍스트, 방식)} (캐시에 있는 것만)"""
+        found = {}
+        hashes = list(hashes)
+        with self._lock:
+            for i in range(0, len(hashes), 500):  # SQLite 변수 개수 제한
+                batch = hashes[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT page_hash, text, method FROM page_text WHERE page_hash IN ({', '.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                found.update({row[0]: (row[1], row[2]) for row in rows})
+        return found
+
+    def put_many(self, entries):
+        """(페이지 해시, 텍스트, 방식) 목록 저장"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO page_text (page_hash, text, method, updated_at) VALUES (?, ?, ?, ?)",
+                [(digest, text, method, now) for digest, text, method in entries],
+            )
+            self._conn.commit()
+
+
+def extract_text_layer(pdf_path, first_page, last_page):
+    """pdftotext(poppler)로 페이지 구간의 텍스트 레이어를 읽어 {페이지 번호: 텍스트}로 반환
+
+    pdftotext가 없거나 실패하면 구간의 모든 페이지를 빈 텍스트로 돌려주어 OCR(쓸 수 있으면)로 넘긴다.
+    """
+    try:
+        result = subprocess.run(
+            ["pdftotext", "-f", str(first_page), "-l", str(last_page), "-enc", "UTF-8", pdf_path, "-"],
+            capture_output=True, text=True, encoding="utf-8", errors="replace",
+        )
+    except OSError:
+        result = None  # pdftotext가 설치되지 않음
+    if result is None or result.returncode != 0:
+        return {page: "" for page in range(first_page, last_page + 1)}
+    # pdftotext는 페이지마다 끝에 폼 피드(\f)를 붙임
+    pages = result.stdout.split("\f")
+    return {first_page + i: clean_text(pages[i]) if i < len(pages) else "" for i in range(last_page - first_page + 1)}
+
+
+def ocr_available():
+    return shutil.which("tesseract") is not None
+
+
+def ocr_page(image_path, lang=OCR_LANG):
+    """tesseract로 페이지 이미지를 OCR (이미지 전용 페이지에만 사용, 실패하면 빈 문자열)"""
+    result = subprocess.run(
+        ["tesseract", image_path, "stdout", "-l", lang],
+        capture_output=True, text=True, encoding="utf-8", errors="replace",
+    )
+    return clean_text(result.stdout) if result.returncode == 0 else ""
+
+
+def page_images(image_dir):
+    """{페이지 번호: 이미지 경로} (devide_pdf.py가 저장한 page_N.png/jpg/tif)"""
+    images = {}
+    for name in os.listdir(image_dir) if os.path.isdir(image_dir) else []:
+        match = re.fullmatch(r"page_(\d+)\.(png|jpg|tif)", name)
+        if match:
+            images[int(match.group(1))] = os.path.join(image_dir, name)
+    return images
+
+
+def extract_pdf_text(pdf_path, image_dir=None, cache=None, max_workers=MAX_WORKERS):
+    """PDF의 페이지별 텍스트를 추출
+
+    1. 페이지 이미지 해시로 캐시를 조회하고, 캐시에 없는 페이지만 처리
+    2. 텍스트 레이어를 페이지 구간별로 동시에 읽음 (pdftotext)
+    3. 텍스트 레이어가 거의 없는 페이지(이미지 전용)만 OCR (tesseract, 페이지별 동시 실행)
+    반환값: {"texts": {페이지 번호: 텍스트}, "methods": {페이지 번호: 방식}, "cached": 캐시 적중 페이지 수}
+    """
+    image_dir = image_dir or page_image_dir(pdf_path)
+    images = page_images(image_dir)
+    if not images:
+        image_dir = divide_pdf(pdf_path)  # 단독 실행 시 페이지 이미지가 없으면 먼저 분할
+        images = page_images(image_dir)
+    cache = cache or PageTextCache()
+    workers = max(1, min(max_workers, len(images)))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pages = sorted(images)
+        hashes = dict(zip(pages, executor.map(page_hash, [images[page] for page in pages])))
+        cached = cache.get_many(hashes.values())
+
+        texts, methods = {}, {}
+        missing = []
+        for page in pages:
+            if hashes[page] in cached:
+                texts[page], methods[page] = cached[hashes[page]]
+            else:
+                missing.append(page)
+
+        # 텍스트 레이어 (서로 독립적인 페이지 구간을 동시에 실행)
+        for layer in executor.map(lambda chunk: extract_text_layer(pdf_path, *chunk), chunk_pages(missing)):
+            for page, text in layer.items():
+                if page in images:
+                    texts[page], methods[page] = text, TEXT_LAYER
+
+        # 이미지 전용 페이지만 OCR
+        need_ocr = [page for page in missing if len(re.sub(r"\s", "", texts.get(page, ""))) < OCR_MIN_CHARS]
+        if need_ocr and ocr_available():
+            for page, text in zip(need_ocr, executor.map(ocr_page, [images[page] for page in need_ocr])):
+                if text:
+                    texts[page], methods[page] = text, OCR
+        for page in need_ocr:
+            if methods.get(page) != OCR and not texts.get(page):
+                texts[page], methods[page] = "", EMPTY
+
+    # 텍스트를 얻지 못한 페이지는 캐시하지 않음 (나중에 OCR을 설치하면 다시 시도)
+    cache.put_many([(hashes[page], texts[page], methods[page]) for page in missing if methods[page] != EMPTY])
+    return {"texts": texts, "methods": methods, "cached": len(pages) - len(missing)}
+
+
+def write_text_file(pdf_path, texts):
+    """페이지별 텍스트를 <PDF 폴더>/EXTRACTED_TEXT/<PDF 이름>.txt에 저장 ("--- page_N ---" 구분)"""
+    output_dir = os.path.join(os.path.dirname(os.path.abspath(pdf_path)), TEXT_DIR_NAME)
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(pdf_path))[0]}.txt")
+    with open(output_path, "w", encoding="utf-8") as f:
+        for page in sorted(texts):
+            f.write(f"--- page_{page} ---\n{texts[page]}\n")
+    return output_path
+
+
+def format_methods(result):
+    """추출 방식별 페이지 수 요약"""
+    counts = {TEXT_LAYER: 0, OCR: 0, EMPTY: 0}
+    for method in result["methods"].values():
+        counts[method] = counts.get(method, 0) + 1
+    return (
+        f"텍스트 레이어 {counts[TEXT_LAYER]}쪽, OCR {counts[OCR]}쪽, 텍스트 없음 {counts[EMPTY]}쪽 "
+        f"(캐시 {result['cached']}쪽)"
+    )
+
+
+def run(file_path, results=None):
+    """파이프라인 단계로 실행될 때의 진입점: devide_pdf.py가 저장한 페이지 이미지를 기준으로 텍스트 추출
+
+    텍스트는 검색 품질을 높이는 부가 정보이므로, 추출에 실패해도 예외를 내지 않고 빈 텍스트로 끝낸다
+    (뒤따르는 del_noWF.py/pa_number.py 단계가 건너뛰어지지 않도록). 실패 이유는 "error"에 담는다.
+    """
+    image_dir = (results or {}).get("devide_pdf.py")
+    try:
+        result = extract_pdf_text(file_path, image_dir=image_dir)
+    except Exception as e:
+        pages = page_images(image_dir or page_image_dir(file_path))
+        result = {"texts": {page: "" for page in pages}, "methods": {page: EMPTY for page in pages}, "cached": 0,
+                  "error": str(e)}
+    result["text_path"] = write_text_file(file_path, result["texts"])
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PDF 페이지별 텍스트 추출 (텍스트 레이어 우선, 이미지 전용 페이지만 OCR)")
+    parser.add_argument("pdf_path", help="텍스트를 추출할 PDF 경로")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+        extracted = extract_pdf_text(args.pdf_path, max_workers=args.workers)
+        text_path = write_text_file(args.pdf_path, extracted["texts"])
+        print(f"{format_methods(extracted)}, {time.perf_counter() - start:.2f}초")
+        print(f"Text for {os.path.basename(args.pdf_path)} saved in: {text_path}")
+    except FileNotFoundError as e:
+        print(e)
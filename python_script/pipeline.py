@@ -0,0 +1,144 @@
+import ast
+import contextvars
+import importlib
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from python_script.tracing import span
+
+# 이 패키지(python_script) 디렉토리: 여기 있는 스크립트는 프로세스 안에서 import해서 실행
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+PIPELINE_MAX_WORKERS = 4  # 동시에 실행할 수 있는 최대 단계 수
+
+# 스크립트 대신 실행할 함수 (헬퍼 스크립트가 없는 벤치마크 같은 환경에서 register_stage로 등록)
+_registered_stages = {}
+
+
+class Stage:
+    """파이프라인 단계: func(file_path, results)를 실행하고 반환값을 results[name]으로 다음 단계에 넘김"""
+
+    def __init__(self, name, func, depends_on=()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+
+def _defines_run(script_path):
+    """스크립트가 최상위에 run 함수를 정의하는지 확인 (import하지 않고 소스만 파싱)"""
+    with open(script_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=script_path)
+    return any(isinstance(node, ast.FunctionDef) and node.name == "run" for node in tree.body)
+
+
+def register_stage(script, func):
+    """script 단계를 func(file_path, results)로 대신 실행하도록 등록 (프로세스 전체에 적용)"""
+    _registered_stages[script] = func
+
+
+def script_stage(script, script_dir, depends_on=()):
+    """헬퍼 스크립트를 파이프라인 단계로 감싸는 함수
+
+    python_script 패키지에 있고 run(file_path, results)를 제공하는 스크립트는 import해서
+    같은 프로세스에서 실행하고 반환값을 메모리로 넘긴다. 그렇지 않은 스크립트는 기존처럼
+    별도 프로세스로 실행하고 표준 출력을 결과로 넘긴다. 이때 UPLOAD_DIR 환경 변수를 file_path가 있는
+    폴더로 바꿔 준다(적재할 때는 ingest_file이 파일을 UPLOAD_DIR로 옮기므로 기존 값과 같음).
+    register_stage로 등록한 함수가 있으면 그것을 먼저 쓴다.
+    """
+    module_name = os.path.splitext(script)[0]
+    local_path = os.path.join(PACKAGE_DIR, script)
+
+    def run_script(file_path, results):
+        registered = _registered_stages.get(script)
+        if registered is not None:
+            return registered(file_path, results)
+        if os.path.exists(local_path) and _defines_run(local_path):
+            module = importlib.import_module(f"python_script.{module_name}")
+            return module.run(file_path, results)
+
+        script_path = os.path.join(script_dir, script)
+        if not os.path.exists(script_path):
+            raise FileNotFoundError(f"{script} 경로가 존재하지 않습니다!")
+        with span(f"script.{module_name}", subprocess=1) as script_span:
+            env = dict(os.environ, UPLOAD_DIR=os.path.dirname(os.path.abspath(file_path)))
+            result = subprocess.run([sys.executable, script_path, file_path], capture_output=True, text=True, env=env)
+            script_span.set(returncode=result.returncode, stdout_bytes=len(result.stdout.encode("utf-8")))
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr)
+        return result.stdout
+
+    return Stage(script, run_script, depends_on)
+
+
+def _run_timed(stage, file_path, results):
+    """단계를 실행하고 (소요 시간, 결과, 오류)를 반환"""
+    start = time.perf_counter()
+    try:
+        with span(f"pipeline.{stage.name}", profile=True, file=os.path.basename(file_path)):
+            result = stage.func(file_path, results)
+        return time.perf_counter() - start, result, None
+    except Exception as e:
+        return time.perf_counter() - start, None, e
+
+
+def run_pipeline(stages, file_path, max_workers=PIPELINE_MAX_WORKERS, on_stage_done=None):
+    """의존 관계 순서대로 단계를 실행하고, 서로 독립적인 단계는 동시에 실행
+
+    반환값은 {단계 이름: {"status", "seconds", "result", "error"}} 형태이며,
+    status는 "ok", "error", 또는 앞 단계 실패로 건너뛴 "skipped" 중 하나다.
+    on_stage_done(name, report)가 주어지면 단계가 끝날 때마다 호출한다.
+    """
+    stages = {stage.name: stage for stage in stages}
+    for stage in stages.values():
+        for dep in stage.depends_on:
+            if dep not in stages:
+                raise ValueError(f"{stage.name} 단계가 존재하지 않는 단계에 의존합니다: {dep}")
+
+    reports = {}
+    results = {}  # 단계 간 메모리 전달용 결과
+    running = {}
+
+    def finish(name, report):
+        reports[name] = report
+        if on_stage_done:
+            on_stage_done(name, report)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while len(reports) < len(stages):
+            progressed = False
+            for name, stage in stages.items():
+                if name in reports or name in running.values():
+                    continue
+                deps = [reports.get(dep) for dep in stage.depends_on]
+                if any(dep is not None and dep["status"] != "ok" for dep in deps):
+                    finish(name, {"status": "skipped", "seconds": 0.0, "result": None, "error": None})
+                    progressed = True
+                elif all(dep is not None for dep in deps):
+                    # 단계 스팬이 ingest.job 스팬의 자식으로 기록되도록 호출한 쪽 컨텍스트를 복사해서 실행
+                    task = executor.submit(contextvars.copy_context().run, _run_timed, stage, file_path, dict(results))
+                    running[task] = name
+                    progressed = True
+
+            if not running:
+                if not progressed:
+                    raise ValueError("단계 간 의존 관계에 순환이 있습니다.")
+                continue  # 건너뛴 단계 때문에 새로 준비된 단계가 있는지 다시 확인
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                seconds, result, error = future.result()
+                if error is None:
+                    results[name] = result
+                    finish(name, {"status": "ok", "seconds": seconds, "result": result, "error": None})
+                else:
+                    finish(name, {"status": "error", "seconds": seconds, "result": None, "error": str(error)})
+
+    return reports
+
+
+def format_timings(reports):
+    """단계별 소요 시간을 한 줄 문자열로 변환"""
+    return ", ".join(f"{name} {report['seconds']:.2f}초" for name, report in reports.items())
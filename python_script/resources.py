@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+
+import chromadb
+from langchain_chroma import Chroma
+from langchain_ollama import OllamaLLM
+
+from python_script.embedder import BatchEmbedder
+from python_script.embedding_backends import create_embeddings, warm_up
+from python_script.embedding_cache import CachedEmbeddings
+from python_script.history import HistoryStore
+from python_script.image_cache import ImageCache
+from python_script.join_index import COLLECTION_TABLES, JoinIndex
+from python_script.manifest import IngestManifest, reindex_collection
+from python_script.response_cache import ResponseCache
+from python_script.spec_store import SpecStore
+from python_script.tracing import start_metrics_server, start_profiler
+
+# Ollama & Chroma 설정
+LLM_BASE_URL = os.environ.get("LLM_BASE_URL", "http://localhost:11434")  # 가짜 서버(python_script/fake_ollama.py)로 바꿔 테스트 가능
+LLM_MODEL = "llama3.2:1b"
+EMBED_MODEL = "llama3.2:1b"
+EMBED_BACKEND = os.environ.get("EMBED_BACKEND", f"ollama:{EMBED_MODEL}")  # 예) onnx:/models/all-MiniLM-L6-v2
+CHROMA_DIR = "./chroma_db"
+METRICS_PORT = os.environ.get("METRICS_PORT")  # 지정하면 이 포트의 /metrics로 Prometheus 지표를 내보냄
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")  # 다른 호스트에서 수집하려면 0.0.0.0 등으로 지정
+TRACE_PROFILE = os.environ.get("TRACE_PROFILE") == "1"  # 1이면 주요 구간에 샘플링 프로파일러 사용
+COLLECTIONS = ("pa_documents", "api_list", "api_spec", "dbTable", "puml")
+# 컬렉션별 임베딩 백엔드 (EMBED_BACKEND_API_LIST=onnx:... 처럼 지정, 없으면 EMBED_BACKEND)
+# 백엔드를 바꾸면 벡터 차원이 달라지므로, 컬렉션을 처음 열 때 저장된 문서를 새 백엔드로 다시 임베딩한다
+COLLECTION_EMBED_BACKENDS = {
+    name: os.environ[f"EMBED_BACKEND_{name.upper()}"]
+    for name in COLLECTIONS
+    if os.environ.get(f"EMBED_BACKEND_{name.upper()}")
+}
+
+# 경로 설정
+UPLOAD_DIR = os.environ.get("UPLOAD_DIR", "/proj/mini-chat-bot/chatbot/data_result")  # 벤치마크 등에서 작업 폴더를 바꿀 때 사용
+PY_SCRIPT_DIR = os.environ.get("PY_SCRIPT_DIR", "/proj/mini-chat-bot/chatbot/python_script")
+UPLOADS_DIR = os.path.join(UPLOAD_DIR, "uploads")  # 업로드별 작업 폴더 (uploads/<내용 해시>/<파일명>)
+UML_ORIGINAL = os.path.join(UPLOAD_DIR, "UML_ORIGINAL") # puml
+UML2IMG = os.path.join(UPLOAD_DIR, "UML2IMG") # puml
+
+# 프로세스 전체에서 한 번만 만드는 리소스 저장소
+# Streamlit은 매 상호작용마다 main.py를 다시 실행하지만, import된 모듈은 그대로 남아 있으므로
+# 여기 저장한 객체(HTTP 커넥션 풀, SQLite 연결 포함)는 재실행 사이에 재사용된다.
+_registry = {}
+_registry_lock = threading.RLock()
+build_timings = {}  # 리소스 이름 -> 최초 생성에 걸린 시간(초)
+
+
+def get_resource(name, factory):
+    """name으로 등록된 리소스를 반환하고, 없으면 factory()로 한 번만 생성"""
+    with _registry_lock:
+        if name not in _registry:
+            start = time.perf_counter()
+            _registry[name] = factory()
+            build_timings[name] = time.perf_counter() - start
+        return _registry[name]
+
+
+def get_llm():
+    # OllamaLLM은 내부 httpx 클라이언트를 재사용하므로 Ollama로의 연결이 유지된다
+    return get_resource("llm", lambda: OllamaLLM(model=LLM_MODEL, base_url=LLM_BASE_URL))
+
+
+def embed_backend(collection_name=None):
+    """컬렉션에 설정된 임베딩 백엔드 문자열"""
+    return COLLECTION_EMBED_BACKENDS.get(collection_name, EMBED_BACKEND)
+
+
+def get_embeddings(collection_name=None):
+    # 같은 문자열(PA 넘버, API ID, 재업로드된 문서)은 캐시에서 꺼내 임베딩 호출을 생략
+    # 캐시 키에 모델 이름이 들어가므로 백엔드가 달라도 캐시 파일 하나를 같이 쓴다
+    backend = embed_backend(collection_name)
+    return get_resource(
+        f"embeddings:{backend}",
+        lambda: CachedEmbeddings(create_embeddings(backend, LLM_BASE_URL)),
+    )
+
+
+def get_ingest_embedder(collection_name=None):
+    # 적재 경로 공용 임베더 (배치 + 동시 요청, 백엔드마다 하나)
+    embeddings = get_embeddings(collection_name)
+    return get_resource(f"ingest_embedder:{embed_backend(collection_name)}", lambda: BatchEmbedder(embeddings))
+
+
+def _warm_up_or_error(embeddings):
+    # 실패도 결과로 저장해 두어, Streamlit 재실행마다 실패한 예열을 다시 시도하지 않게 함
+    try:
+        return warm_up(embeddings)
+    except Exception as e:
+        return e
+
+
+def warm_up_embeddings():
+    """사용하는 임베딩 백엔드마다 한 번씩 임베딩해 모델 로딩을 시작 시점에 끝냄 (성공/실패 모두 프로세스당 한 번)
+
+    반환값: {백엔드: 오류 메시지} (예열에 실패한 백엔드만)
+    """
+    failures = {}
+    for collection_name in COLLECTIONS:
+        backend = embed_backend(collection_name)
+        embeddings = get_embeddings(collection_name)
+        # 캐시를 거치지 않고 실제 모델을 호출해야 예열이 됨
+        result = get_resource(f"warmup:{backend}", lambda: _warm_up_or_error(embeddings.embeddings))
+        if isinstance(result, Exception):
+            failures[backend] = str(result)
+    return failures
+
+
+def get_chroma_persistent_client():
+    # 모든 컬렉션이 chroma.sqlite3 연결 하나를 공유
+    return get_resource("chroma", lambda: chromadb.PersistentClient(path=CHROMA_DIR))
+
+
+def get_chroma_client(collection_name):
+    """컬렉션별 Chroma 클라이언트를 반환 (프로세스당 한 번만 생성)
+
+    매니페스트에 기록된 백엔드와 지금 설정된 백엔드가 다르면 저장된 문서를 새 백엔드로 다시 임베딩한다.
+    """
+    # 의존 리소스를 먼저 꺼내 두어 build_timings에 생성 시간이 중복 집계되지 않게 함
+    client = get_chroma_persistent_client()
+    embeddings = get_embeddings(collection_name)
+    embedder = get_ingest_embedder(collection_name)
+    manifest = get_ingest_manifest()
+    backend = embed_backend(collection_name)
+
+    def build():
+        chroma_client = Chroma(client=client, collection_name=collection_name, embedding_function=embeddings)
+        recorded = manifest.backend(collection_name)
+        if recorded is not None and recorded != backend:
+            reindex_collection(chroma_client, manifest, embedder)
+        # 기록이 없는 기존 컬렉션은 지금 설정한 백엔드로 만든 것으로 봄
+        manifest.record_backend(collection_name, backend)
+        return chroma_client
+
+    return get_resource(f"chroma:{collection_name}", build)
+
+
+def get_ingest_manifest():
+    # 처리한 파일 해시와 컬렉션별 문서 ID 기록
+    return get_resource("ingest_manifest", IngestManifest)
+
+
+def get_spec_store():
+    # 명세 참조 키 → 압축된 API 명세 본문 (Chroma metadata에는 참조만 저장)
+    return get_resource("spec_store", SpecStore)
+
+
+def get_join_index():
+    # PA 넘버 → 페이지/API/명세/UML 조인 인덱스 (처음 만들 때 기존 Chroma 데이터로 채움)
+    chroma_clients = {name: get_chroma_client(name) for name in COLLECTION_TABLES}
+
+    def build():
+        join_index = JoinIndex()
+        if join_index.is_empty():
+            join_index.rebuild_from_chroma(chroma_clients)
+        return join_index
+
+    return get_resource("join_index", build)
+
+
+def get_history_store():
+    # 세션별 채팅 기록 (세션 메모리에는 최근 메시지만 두고 나머지는 여기서 페이지 단위로 읽음)
+    return get_resource("history_store", HistoryStore)
+
+
+def get_image_cache():
+    # 페이지/UML 미리보기 이미지 바이트 캐시 (모든 세션이 공유)
+    return get_resource("image_cache", ImageCache)
+
+
+def get_response_cache():
+    # 채팅 응답 캐시 (컬렉션 버전은 적재 매니페스트에서 읽어 재적재 시 무효화)
+    embeddings = get_embeddings()
+    manifest = get_ingest_manifest()
+    return get_resource("response_cache", lambda: ResponseCache(embeddings, manifest.versions))
+
+
+def get_job_queue():
+    # 업로드 적재 작업 큐 (워커 풀은 프로세스당 하나, 모든 세션이 공유)
+    from python_script.ingest import ingest_file, ingest_key  # ingest가 resources를 import하므로 순환 import 방지
+    from python_script.jobs import JobQueue
+    return get_resource("job_queue", lambda: JobQueue(ingest_file, serial_key=ingest_key))
+
+
+def get_service():
+    # 모든 세션이 공유하는 적재/검색/답변 생성 서비스
+    from python_script.service import ChatService  # service가 retrieval(→ resources)을 import하므로 순환 import 방지
+    llm = get_llm()
+    job_queue = get_job_queue()
+    manifest = get_ingest_manifest()
+    response_cache = get_response_cache()
+    return get_resource("service", lambda: ChatService(llm, job_queue, manifest, response_cache, UPLOADS_DIR))
+
+
+def get_metrics_server():
+    # Prometheus 지표 서버 (METRICS_PORT가 없으면 띄우지 않음)
+    if not METRICS_PORT:
+        return None
+    return get_resource("metrics_server", lambda: start_metrics_server(METRICS_HOST, int(METRICS_PORT)))
+
+
+def get_profiler():
+    # 샘플링 프로파일러 (TRACE_PROFILE=1일 때만 켬)
+    if not TRACE_PROFILE:
+        return None
+    return get_resource("profiler", start_profiler)
+
+
+def format_build_timings():
+    """리소스별 최초 생성 시간을 문자열로 변환"""
+    with _registry_lock:
+        items = sorted(build_timings.items(), key=lambda item: -item[1])
+    return ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in items)
+
@@ -0,0 +1,111 @@
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# 응답 캐시 설정
+RESPONSE_CACHE_ITEMS = 256  # 최대 항목 수 (초과 시 오래 안 쓴 항목부터 삭제)
+RESPONSE_CACHE_TTL = 30 * 60  # 항목 유효 시간(초)
+RESPONSE_CACHE_SIMILARITY = 0.92  # 키가 없는 질문끼리 같은 질문으로 볼 임베딩 코사인 유사도 하한
+
+
+def normalize_question(text):
+    """대소문자/공백 차이를 무시한 질문 문자열"""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class ResponseCache:
+    """채팅 응답 캐시 (메모리 LRU + TTL)
+
+    (PA 넘버, PDF 파일명, API ID)와 정규화한 질문 문자열로 찾는다. 같은 PA 넘버라도 질문이 다르면
+    다른 항목이다. 추출한 키가 하나도 없는 질문은 정확히 일치하는 항목이 없을 때 키가 없는 항목 중
+    질문 임베딩이 충분히 비슷한 것을 찾는다.
+    versions()가 돌려주는 컬렉션 버전이 바뀌면(재적재) 캐시 전체를 비운다.
+    """
+
+    def __init__(self, embeddings, versions, max_items=RESPONSE_CACHE_ITEMS, ttl=RESPONSE_CACHE_TTL,
+                 similarity=RESPONSE_CACHE_SIMILARITY):
+        self.embeddings = embeddings
+        self.versions = versions  # () -> {컬렉션 이름: 버전}
+        self.max_items = max_items
+        self.ttl = ttl
+        self.similarity = similarity
+        self._entries = OrderedDict()  # 캐시 키 -> (저장 시각, 질문 임베딩, 값)
+        self._versions = None
+        self._lock = threading.Lock()
+
+        # 적중/실패 카운터
+        self.key_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(question, pa_number, pdf_filename, api_id):
+        if pa_number or pdf_filename or api_id:
+            return f"key:{pa_number or ''}|{pdf_filename or ''}|{api_id or ''}|{normalize_question(question)}"
+        return f"q:{normalize_question(question)}"
+
+    def _check_versions(self):
+        versions = self.versions()
+        if versions != self._versions:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._versions = versions
+
+    def _expire(self, now):
+        for key in [key for key, (stored_at, _, _) in self._entries.items() if now - stored_at > self.ttl]:
+            del self._entries[key]
+
+    def get(self, question, pa_number=None, pdf_filename=None, api_id=None):
+        """캐시된 값과 적중 방식("key"/"similar")을 반환 (없으면 (None, None))"""
+        key = self.make_key(question, pa_number, pdf_filename, api_id)
+        with self._lock:
+            self._check_versions()
+            self._expire(time.time())
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.key_hits += 1
+                return self._entries[key][2], "key"
+            keyless = [(k, vector) for k, (_, vector, _) in self._entries.items() if vector is not None]
+
+        # 키가 없는 질문만 임베딩 유사도로 찾음 (다른 PA 넘버/API의 답변을 돌려주지 않도록)
+        if key.startswith("q:") and keyless:
+            vector = self.embeddings.embed_query(question)
+            best_key, best_score = max(((k, _cosine(vector, v)) for k, v in keyless), key=lambda item: item[1])
+            if best_score >= self.similarity:
+                with self._lock:
+                    if best_key in self._entries:
+                        self._entries.move_to_end(best_key)
+                        self.similar_hits += 1
+                        return self._entries[best_key][2], "similar"
+
+        with self._lock:
+            self.misses += 1
+        return None, None
+
+    def put(self, question, value, pa_number=None, pdf_filename=None, api_id=None):
+        key = self.make_key(question, pa_number, pdf_filename, api_id)
+        vector = self.embeddings.embed_query(question) if key.startswith("q:") else None
+        with self._lock:
+            self._check_versions()
+            self._entries[key] = (time.time(), vector, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def format_stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return (
+            f"키 적중 {self.key_hits}, 유사 질문 적중 {self.similar_hits}, 실패 {self.misses}, "
+            f"무효화 {self.invalidations}회, {size}/{self.max_items}개"
+        )
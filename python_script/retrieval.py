@@ -0,0 +1,230 @@
+import contextvars
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from python_script import resources
+from python_script.tracing import span
+
+# 검색 설정
+RETRIEVAL_WORKERS = 4  # 동시에 실행할 수 있는 최대 조회 수
+PAGE_RESULTS = 3  # 의미 검색으로 찾을 와이어프레임 페이지 수
+
+# 프로세스 전체에서 공유하는 조회용 스레드 풀
+_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval")
+
+
+# 메타데이터 키 정확 일치 조회 함수
+# 임베딩 호출과 ANN 검색 없이 Chroma의 메타데이터 인덱스(key, string_value)만으로 조회
+def lookup_by_key(chroma_client, where, limit=5):
+    results = chroma_client._collection.get(
+        where=where,
+        limit=limit,
+        include=["documents", "metadatas"]
+    )
+    # query() 결과와 같은 이중 리스트 구조로 맞춰서 기존 처리 코드를 그대로 사용
+    return {
+        "ids": [results["ids"]],
+        "documents": [results["documents"]],
+        "metadatas": [results["metadatas"]]
+    }
+
+
+# 의미 검색 함수 (질문에서 PA 넘버/API ID를 찾지 못한 경우에만 사용)
+def semantic_search(chroma_client, text, n_results=5):
+    # 질문도 컬렉션을 적재할 때와 같은 백엔드로 임베딩해야 벡터 공간이 맞음
+    collection_name = chroma_client._collection.name
+    with span("embed.query", chars=len(text), backend=resources.embed_backend(collection_name)):
+        query_embedding = resources.get_embeddings(collection_name).embed_query(text)
+
+    results = chroma_client._collection.query(
+        query_embeddings=[query_embedding],
+        n_results=n_results
+    )
+    return results
+
+
+# PDF 페이지 검색 함수
+def search_pdf_pages(pa_number, pdf_filename):
+    return lookup_by_key(
+        resources.get_chroma_client("pa_documents"),
+        {
+            "$and": [
+                {"pa_number": pa_number},
+                {"pdf_filename": pdf_filename}
+            ]
+        },
+        limit=10
+    )
+
+
+# API 정보 검색 함수
+def search_api_info(pa_number):
+    return lookup_by_key(resources.get_chroma_client("api_list"), {"pa_number": pa_number})
+
+
+# API 명세 정보 검색 함수
+def search_api_spec_info(api_id):
+    return lookup_by_key(resources.get_chroma_client("api_spec"), {"api_id": api_id})
+
+
+# UML 정보 검색 함수
+def search_uml_info(api_id):
+    return lookup_by_key(resources.get_chroma_client("puml"), {"api_id": api_id})
+
+
+def load_api_spec(metadata):
+    """api_spec 결과 metadata에서 명세 객체를 읽음 (명세 저장소 참조, 예전 형식의 JSON 문자열 모두 지원)
+
+    참조가 없거나 저장소에 없으면 None, JSON 파싱에 실패하면 ValueError
+    """
+    if not isinstance(metadata, dict):
+        return None
+    if metadata.get("api_spec_ref"):
+        return resources.get_spec_store().get(metadata["api_spec_ref"])
+    if "api_spec_info" in metadata:
+        return json.loads(metadata["api_spec_info"])
+    return None
+
+
+def extract_keys(user_input):
+    """질문에서 PA 넘버, PDF 파일명, API ID를 추출"""
+    pa_number_match = re.search(r'PA\d+', user_input)
+    pdf_filename_match = re.search(r"([\w\-]+\.pdf)", user_input)  # ".pdf"가 포함된 문자열
+    api_id_match = re.search(r'API ID: (\w+)', user_input)
+    return (
+        pa_number_match.group(0) if pa_number_match else None,
+        pdf_filename_match.group(1) if pdf_filename_match else None,
+        api_id_match.group(1) if api_id_match else None,
+    )
+
+
+def _timed(name, func, *args):
+    start = time.perf_counter()
+    with span(f"retrieval.{name}"):
+        result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def _run_steps(steps, timings, parallel):
+    """{단계 이름: (함수, 인자...)}를 실행하고 결과를 같은 순서로 반환 (parallel이면 동시에 실행)"""
+    if parallel and len(steps) > 1:
+        # 풀 스레드에서 연 스팬도 호출한 쪽 스팬의 자식이 되도록 작업마다 컨텍스트를 복사해서 실행
+        futures = {
+            name: _executor.submit(contextvars.copy_context().run, _timed, name, step[0], *step[1:])
+            for name, step in steps.items()
+        }
+        outputs = {name: future.result() for name, future in futures.items()}
+    else:
+        outputs = {name: _timed(name, step[0], *step[1:]) for name, step in steps.items()}
+
+    results = []
+    for name, (result, seconds) in outputs.items():
+        timings[name] = seconds
+        results.append(result)
+    return results
+
+
+def _nested(documents, metadatas):
+    """조인 인덱스 결과를 Chroma query() 결과와 같은 이중 리스트 구조로 변환"""
+    return {"documents": [documents], "metadatas": [metadatas]}
+
+
+def _fill_from_join(result, joined, pdf_filename):
+    """조인 인덱스 조회 결과로 retrieve() 결과를 채우고 API ID를 반환"""
+    pages = [page for page in joined["pages"] if page["pdf_filename"] == pdf_filename][:10]
+    apis = joined["apis"][:5]
+    result["pdf_results"] = _nested(
+        [f"PA 넘버: {joined['pa_number']}"] * len(pages),
+        [{"pa_number": joined["pa_number"], "image_path": page["image_path"], "pdf_filename": pdf_filename} for page in pages],
+    )
+    result["api_list_results"] = _nested([api["document"] for api in apis], [{"api_id": api["api_id"]} for api in apis])
+
+    api_list_info = "\n".join(api["document"] for api in apis)
+    result["api_list_info"] = api_list_info
+    api_id_match = re.search(r'API ID: (\w+)', api_list_info)
+    api_id = result["api_id"] = api_id_match.group(1) if api_id_match else None
+
+    if api_id:
+        spec = joined["specs"].get(api_id)
+        uml = joined["umls"].get(api_id)
+        result["api_spec_results"] = _nested(
+            [f"API ID: {api_id}"] if spec else [], [{"api_id": api_id, **spec}] if spec else []
+        )
+        result["uml_results"] = _nested(
+            [f"UML Diagram for API ID: {api_id}"] if uml else [], [{"api_id": api_id, "png_path": uml}] if uml else []
+        )
+    return api_id
+
+
+def retrieve(pa_number, pdf_filename, api_id, query_text=None, parallel=True):
+    """채팅 질문 하나에 필요한 조회를 실행
+
+    PA 넘버가 조인 인덱스에 있으면 키 조회 한 번으로 페이지/API/명세/UML을 모두 얻는다.
+    없으면 Chroma 컬렉션을 조회하되, 서로 의존하지 않는 조회는 동시에 실행한다:
+      1단계: pa_documents(PDF 페이지) ∥ api_list(PA 넘버)
+      2단계: api_spec ∥ puml (둘 다 1단계에서 얻은 API ID에만 의존)
+    parallel=False이면 같은 순서로 하나씩 실행한다 (기존 순차 방식과 비교용).
+    반환값의 timings에는 단계별 소요 시간이, total_seconds에는 전체 소요 시간이 들어 있다.
+    """
+    start = time.perf_counter()
+    timings = {}
+    result = {
+        "pa_number": pa_number,
+        "pdf_filename": pdf_filename,
+        "api_id": api_id,
+        "pdf_results": None,
+        "api_list_results": None,
+        "api_list_info": None,
+        "api_spec_results": None,
+        "uml_results": None,
+        "semantic_results": None,
+        "page_results": None,
+    }
+
+    joined = None
+    if pa_number and pdf_filename:
+        (joined,) = _run_steps({"join_index": (resources.get_join_index().lookup, pa_number)}, timings, parallel)
+
+    if joined is not None:
+        api_id = _fill_from_join(result, joined, pdf_filename)
+    elif pa_number and pdf_filename:
+        pdf_results, api_list_results = _run_steps({
+            "pa_documents": (search_pdf_pages, pa_number, pdf_filename),
+            "api_list": (search_api_info, pa_number),
+        }, timings, parallel)
+        result["pdf_results"] = pdf_results
+        result["api_list_results"] = api_list_results
+
+        if api_list_results['documents'] and pdf_results['documents']:
+            api_list_info = "\n".join(api_list_results['documents'][0])  # 첫 번째 리스트의 요소만 사용
+            result["api_list_info"] = api_list_info
+
+            # api_list 문서에서 API ID 추출
+            api_id_match = re.search(r'API ID: (\w+)', api_list_info)
+            result["api_id"] = api_id = api_id_match.group(1) if api_id_match else None
+
+    if api_id and joined is None:
+        result["api_spec_results"], result["uml_results"] = _run_steps({
+            "api_spec": (search_api_spec_info, api_id),
+            "puml": (search_uml_info, api_id),
+        }, timings, parallel)
+
+    # 질문에 PA 넘버/API ID가 없을 때만 의미 검색 수행 (API 리스트 ∥ 페이지 텍스트)
+    if not pa_number and not api_id and query_text:
+        result["semantic_results"], result["page_results"] = _run_steps({
+            "semantic": (semantic_search, resources.get_chroma_client("api_list"), query_text),
+            "semantic_pages": (semantic_search, resources.get_chroma_client("pa_documents"), query_text, PAGE_RESULTS),
+        }, timings, parallel)
+
+    result["timings"] = timings
+    result["total_seconds"] = time.perf_counter() - start
+    return result
+
+
+def format_retrieval_timings(result):
+    """단계별 소요 시간과 전체 시간(순차 실행 시 합계 포함)을 문자열로 변환"""
+    steps = ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in result["timings"].items())
+    serial = sum(result["timings"].values())
+    return f"{steps} / 전체 {result['total_seconds'] * 1000:.1f}ms (순차 실행 시 합계 {serial * 1000:.1f}ms)"
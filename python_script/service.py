@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+from python_script.answer import build_prompt, context_sections, stream_answer
+from python_script.retrieval import extract_keys, load_api_spec, retrieve
+from python_script.tracing import span
+
+# 서비스 설정
+GENERATION_SLOTS = int(os.environ.get("GENERATION_SLOTS", "2"))  # 동시에 Ollama로 보낼 답변 생성 요청 수 (OLLAMA_NUM_PARALLEL과 맞춤)
+UPLOAD_HASH_CHARS = 16  # 업로드 작업 폴더 이름에 쓸 내용 해시 길이
+UPLOAD_RETENTION_HOURS = float(os.environ.get("UPLOAD_RETENTION_HOURS", "24"))  # 업로드 작업 폴더 보관 시간
+
+
+def upload_work_dir(uploads_dir, file_hash):
+    """업로드 내용 해시로 정한 작업 폴더 (같은 내용이면 같은 폴더, 다른 내용이면 이름이 같아도 다른 폴더)"""
+    return os.path.join(uploads_dir, file_hash[:UPLOAD_HASH_CHARS])
+
+
+def cleanup_uploads(uploads_dir, keep_dirs, max_age, now=None):
+    """마지막 업로드 후 max_age초가 지난 업로드 작업 폴더를 삭제하고 삭제한 폴더 수를 반환
+
+    적재는 UPLOAD_DIR로 옮긴 파일로 하므로 작업이 끝난 업로드 폴더는 더 필요 없다.
+    keep_dirs(대기/실행 중인 작업의 폴더)는 오래됐어도 남긴다.
+    """
+    if not os.path.isdir(uploads_dir):
+        return 0
+    now = time.time() if now is None else now
+    keep_dirs = {os.path.abspath(path) for path in keep_dirs}
+    removed = 0
+    for name in os.listdir(uploads_dir):
+        path = os.path.abspath(os.path.join(uploads_dir, name))
+        if not os.path.isdir(path) or path in keep_dirs or now - os.path.getmtime(path) < max_age:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+    return removed
+
+
+class ChatService:
+    """모든 세션이 함께 쓰는 적재/검색/답변 생성 서비스
+
+    Streamlit 세션(main.py)은 화면만 그리고, 업로드 저장·작업 등록·조회·캐시는 여기서 처리한다.
+    Chroma 클라이언트, Ollama 클라이언트(HTTP 커넥션 풀), SQLite 저장소는 resources에서
+    프로세스당 하나만 만들어 모든 세션이 공유하고, 답변 생성은 GENERATION_SLOTS개까지만 동시에 보낸다.
+    """
+
+    def __init__(self, llm, job_queue, manifest, response_cache, uploads_dir, generation_slots=GENERATION_SLOTS):
+        self.llm = llm
+        self.job_queue = job_queue
+        self.manifest = manifest
+        self.response_cache = response_cache
+        self.uploads_dir = uploads_dir
+        self._generation_slots = threading.BoundedSemaphore(generation_slots)
+        self._lock = threading.Lock()
+        self.active_generations = 0
+        self.waiting_generations = 0
+
+    def save_upload(self, file_name, data):
+        """업로드 파일을 작업 폴더에 저장하고 (경로, 내용 해시)를 반환
+
+        임시 파일에 쓴 뒤 이름을 바꾸므로 같은 파일을 동시에 올려도 반쯤 쓴 파일을 읽지 않는다.
+        """
+        file_hash = hashlib.sha256(data).hexdigest()  # manifest.file_hash와 같은 sha256
+        work_dir = upload_work_dir(self.uploads_dir, file_hash)
+        os.makedirs(work_dir, exist_ok=True)
+        file_path = os.path.join(work_dir, os.path.basename(file_name))
+        if not os.path.exists(file_path):
+            tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, file_path)
+        os.utime(work_dir)  # 보관 시간은 마지막 업로드부터 계산
+        return file_path, file_hash
+
+    def submit_upload(self, file_name, data, session_id=None):
+        """업로드를 적재 작업으로 등록하고 작업 ID를 반환 (이미 처리된 같은 내용의 파일이면 None)"""
+        file_hash = hashlib.sha256(data).hexdigest()
+        if self.manifest.is_unchanged(os.path.basename(file_name), file_hash):
+            return None
+        file_path, file_hash = self.save_upload(file_name, data)
+        job_id = self.job_queue.submit(file_path, file_hash, session_id)
+        self.cleanup_uploads()
+        return job_id
+
+    def cleanup_uploads(self, max_age=UPLOAD_RETENTION_HOURS * 3600):
+        """보관 시간이 지난 업로드 작업 폴더 삭제 (업로드할 때마다 실행)"""
+        active_dirs = [os.path.dirname(job["file_path"]) for job in self.job_queue.store.unfinished()]
+        with span("upload.cleanup") as cleanup_span:
+            cleanup_span.set(removed=cleanup_uploads(self.uploads_dir, active_dirs, max_age))
+
+    def prepare_answer(self, question):
+        """질문 하나에 필요한 조회를 하고 답변 생성에 쓸 컨텍스트를 반환
+
+        캐시에 응답이 있으면 "cached"에 값이 들어 있고 조회는 하지 않는다.
+        조회에 실패하면(임베딩 서버 오류, 백엔드와 컬렉션의 벡터 차원 불일치 등) "error"에 메시지를 넣고
+        빈 검색 결과로 반환한다.
+        """
+        pa_number, pdf_filename, api_id = extract_keys(question)
+        context = {
+            "question": question,
+            "keys": (pa_number, pdf_filename, api_id),  # 캐시 키는 질문에서 추출한 값으로 만듦
+            "cached": None,
+            "cache_hit": None,
+            "error": None,
+            "retrieval": None,
+            "sections": [],
+            "images": [],
+            "fallback": "",
+        }
+
+        # 같은 질문(추출한 키 또는 비슷한 질문)의 응답이 캐시에 있으면 조회와 답변 생성을 건너뜀
+        # (비슷한 질문 비교에 임베딩을 쓰므로, 실패하면 캐시에 없는 것으로 봄)
+        try:
+            cached, cache_hit = self.response_cache.get(question, pa_number, pdf_filename, api_id)
+        except Exception:
+            cached, cache_hit = None, None
+        if cached is not None:
+            context.update(cached=cached, cache_hit=cache_hit)
+            return context
+
+        # ChromaDB 조회 (서로 독립적인 조회는 동시에 실행)
+        try:
+            with span("chat.retrieve"):
+                retrieval = retrieve(pa_number, pdf_filename, api_id, query_text=question)
+        except Exception as e:
+            context["error"] = str(e)
+            return context
+        api_id = retrieval["api_id"]
+        pdf_results = retrieval["pdf_results"]
+        api_list_info = retrieval["api_list_info"]
+
+        # api_spec에서 API ID로 찾은 명세 (본문은 명세 저장소에서 필요할 때만 읽음)
+        api_spec = None
+        api_spec_str = "API 명세 정보를 찾을 수 없습니다."
+        api_spec_results = retrieval["api_spec_results"]
+        if api_id and api_spec_results and api_spec_results['metadatas'] and api_spec_results['metadatas'][0]:
+            try:
+                api_spec = load_api_spec(api_spec_results['metadatas'][0][0])
+                if api_spec is not None:
+                    api_spec_str = json.dumps(api_spec, indent=4, ensure_ascii=False)
+            except json.JSONDecodeError:
+                api_spec_str = "API 명세 정보를 파싱하는 데 실패했습니다."
+
+        # 화면에 함께 보여줄 페이지 이미지와 UML 이미지
+        images = []
+        if api_list_info is not None:
+            for metadata in pdf_results['metadatas'][0]:
+                image_path = metadata.get('image_path', '')
+                if os.path.exists(image_path):
+                    images.append(image_path)
+
+        uml_image_path = None
+        uml_results = retrieval["uml_results"]
+        if api_id and uml_results and uml_results['metadatas'] and uml_results['metadatas'][0]:
+            uml_image_path = uml_results['metadatas'][0][0].get('png_path', None)  # Access the first element of the first list
+            if uml_image_path and not os.path.exists(uml_image_path):
+                uml_image_path = None
+
+        # LLM을 쓸 수 없을 때 보여줄 검색 결과 요약 (기존 응답 형식)
+        fallback = ""
+        if images and api_id:
+            fallback = f"{pdf_filename}에서 PA넘버: {pa_number} 관련 이미지 {len(images)}개와 API 정보:\n{api_list_info}\n\nAPI 명세 정보:\n{api_spec_str}"
+        semantic_results = retrieval["semantic_results"]
+        if semantic_results and semantic_results['documents'] and semantic_results['documents'][0]:
+            fallback = "질문과 관련된 API 정보:\n\n" + "\n\n".join(semantic_results['documents'][0])
+
+        message_images = [(img, f"{pdf_filename}의 {pa_number}") for img in images]
+        if uml_image_path:
+            message_images.append((uml_image_path, f"UML Diagram for API ID: {api_id}"))
+
+        # 페이지 내용으로 찾은 와이어프레임 (질문에 PA 넘버가 없을 때)
+        page_results = retrieval["page_results"]
+        if page_results and page_results['metadatas'] and page_results['metadatas'][0]:
+            for metadata in page_results['metadatas'][0]:
+                image_path = metadata.get('image_path', '')
+                if os.path.exists(image_path):
+                    message_images.append((image_path, f"{metadata.get('pdf_filename', '')}의 {metadata.get('pa_number', '')}"))
+            if not fallback:
+                fallback = "질문과 관련된 화면:\n\n" + "\n\n".join(page_results['documents'][0])
+
+        context.update(
+            retrieval=retrieval,
+            sections=context_sections(retrieval, api_spec),
+            images=message_images,
+            fallback=fallback,
+        )
+        return context
+
+    def build_prompt(self, context, history=""):
+        """(프롬프트, 컨텍스트 토큰 수) (history는 history.history_context()로 예산을 맞춘 이전 대화)"""
+        return build_prompt(context["question"], context["sections"], history=history)
+
+    def stream(self, prompt, stats):
+        """답변을 스트리밍 (동시 생성 수를 GENERATION_SLOTS개로 제한하고, 자리가 날 때까지 기다림)"""
+        with self._lock:
+            self.waiting_generations += 1
+        try:
+            with span("chat.generation_wait"):
+                self._generation_slots.acquire()
+        finally:
+            # 기다리다 중단돼도(세션 종료, 재실행 등) 대기 수가 남지 않도록
+            with self._lock:
+                self.waiting_generations -= 1
+        with self._lock:
+            self.active_generations += 1
+        try:
+            yield from stream_answer(self.llm, prompt, stats)
+        finally:
+            with self._lock:
+                self.active_generations -= 1
+            self._generation_slots.release()
+
+    def remember(self, context, response):
+        """답변 생성에 성공한 응답을 캐시 (재적재로 컬렉션이 바뀌면 자동으로 무효화됨)"""
+        self.response_cache.put(
+            context["question"], {"images": context["images"], "response": response}, *context["keys"]
+        )
+
+    def format_stats(self):
+        with self._lock:
+            return f"답변 생성 중 {self.active_generations}개, 대기 {self.waiting_generations}개"
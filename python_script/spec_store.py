@@ -0,0 +1,90 @@
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+
+# API 명세 저장소 설정
+SPEC_STORE_PATH = "./chroma_db/api_specs.sqlite3"
+SPEC_CACHE_ITEMS = 256  # 디코딩된 명세 객체를 메모리에 보관할 최대 개수
+SPEC_COMPRESS_LEVEL = 6
+
+
+def encode_spec(spec):
+    """명세 객체를 압축된 JSON 바이트로 변환"""
+    text = json.dumps(spec, ensure_ascii=False, separators=(",", ":"))
+    return zlib.compress(text.encode("utf-8"), SPEC_COMPRESS_LEVEL)
+
+
+def decode_spec(blob):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def spec_ref(source, sheet_name, api_id):
+    """명세 저장소 키 (같은 API ID가 여러 워크북/시트에 있어도 행마다 자기 명세를 가리키도록 출처를 포함)"""
+    return f"{source}::{sheet_name}::{api_id}"
+
+
+class SpecStore:
+    """명세 참조 키로 찾는 압축 API 명세 저장소
+
+    Chroma metadata에는 api_spec_ref(spec_ref() 키, 예전 적재분은 API ID)만 넣고, 명세 본문은
+    여기에 따로 보관했다가 화면에 표시할 때만 꺼내서 디코딩한다. 최근에 쓴 명세는 디코딩된 상태로 캐시한다.
+    """
+
+    def __init__(self, path=SPEC_STORE_PATH, cache_items=SPEC_CACHE_ITEMS):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self.cache_items = cache_items
+        self.cache_hits = 0
+        self.cache_misses = 0
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS api_specs ("
+                " spec_ref TEXT PRIMARY KEY,"
+                " payload BLOB NOT NULL)"
+            )
+            # 예전 저장소는 참조 키 컬럼 이름이 api_id였음
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(api_specs)")]
+            if "api_id" in columns:
+                self._conn.execute("ALTER TABLE api_specs RENAME COLUMN api_id TO spec_ref")
+            self._conn.commit()
+
+    def put_many(self, specs):
+        """(참조 키, 명세 객체) 목록 저장 (같은 키는 덮어씀)"""
+        rows = [(ref, encode_spec(spec)) for ref, spec in specs]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO api_specs (spec_ref, payload) VALUES (?, ?)", rows)
+            self._conn.commit()
+            for ref, _ in rows:
+                self._cache.pop(ref, None)
+
+    def delete_many(self, refs):
+        """더 이상 어떤 행도 가리키지 않는 명세 삭제"""
+        refs = list(refs)
+        with self._lock:
+            self._conn.executemany("DELETE FROM api_specs WHERE spec_ref = ?", [(ref,) for ref in refs])
+            self._conn.commit()
+            for ref in refs:
+                self._cache.pop(ref, None)
+
+    def get(self, ref):
+        """참조 키(예전 적재분은 API ID)로 명세 객체 조회 (없으면 None)"""
+        with self._lock:
+            if ref in self._cache:
+                self._cache.move_to_end(ref)
+                self.cache_hits += 1
+                return self._cache[ref]
+
+            self.cache_misses += 1
+            row = self._conn.execute("SELECT payload FROM api_specs WHERE spec_ref = ?", (ref,)).fetchone()
+            if row is None:
+                return None
+            spec = decode_spec(row[0])
+            self._cache[ref] = spec
+            while len(self._cache) > self.cache_items:
+                self._cache.popitem(last=False)
+            return spec
@@ -0,0 +1,138 @@
+import argparse
+import os
+import random
+
+import pandas as pd
+
+# 합성 코퍼스 설정
+PA_NUMBER_BASE = 1200000  # PA 넘버는 PA1200001부터 시작
+API_GROUPS = ("CMM", "DEV", "USR", "NET", "SYS")
+HTTP_METHODS = ("GET", "POST", "PUT", "DELETE")
+
+
+def pa_number(index):
+    return f"PA{PA_NUMBER_BASE + index + 1}"
+
+
+def api_id(index):
+    return f"{API_GROUPS[index % len(API_GROUPS)]}{index + 1:04d}"
+
+
+def _pdf_text(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_wireframe_pdf(path, page_labels):
+    """페이지마다 PA 넘버 텍스트와 와이어프레임 상자를 그린 PDF 작성 (텍스트 레이어 포함)
+
+    외부 라이브러리 없이 PDF 객체를 직접 쓴다. 페이지 하나에 Page/Contents 객체 두 개를 쓰고,
+    글꼴(Helvetica)은 모든 페이지가 공유한다.
+    """
+    objects = {1: "<< /Type /Catalog /Pages 2 0 R >>", 3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    page_refs = []
+    for i, label in enumerate(page_labels):
+        page_obj, content_obj = 4 + i * 2, 5 + i * 2
+        lines = label.split("\n")
+        stream = ["0.5 w", "40 40 532 712 re S", "60 560 220 120 re S", "300 560 252 120 re S", "60 120 492 400 re S"]
+        stream += [f"BT /F1 {18 if n == 0 else 11} Tf 60 {720 - n * 18} Td ({_pdf_text(line)}) Tj ET" for n, line in enumerate(lines)]
+        data = "\n".join(stream)
+        objects[page_obj] = (
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_obj} 0 R >>"
+        )
+        objects[content_obj] = f"<< /Length {len(data.encode('latin-1'))} >>\nstream\n{data}\nendstream"
+        page_refs.append(f"{page_obj} 0 R")
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(page_refs)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += f"{number} 0 obj\n{objects[number]}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    size = max(objects) + 1
+    out += f"xref\n0 {size}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offsets[n]:010d} 00000 n \n" for n in range(1, size)).encode("latin-1")
+    out += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def write_api_workbook(path, apis, pa_numbers, rng):
+    """API리스트 시트와 API명세서 시트가 있는 엑셀 작성 (API 하나가 PA 넘버 하나에 연결됨)"""
+    api_list = pd.DataFrame({
+        "API ID": apis,
+        "사용화면아이디\n(없으면 비화면 API)": [pa_numbers[i % len(pa_numbers)] for i in range(len(apis))],
+        "API 명": [f"{api} 조회" for api in apis],
+        "Method": [rng.choice(HTTP_METHODS) for _ in apis],
+        "URL": [f"/api/v1/{api.lower()}" for api in apis],
+    })
+    api_spec = pd.DataFrame({
+        "API ID": apis,
+        "설명": [f"{api} 기능 설명" for api in apis],
+        "요청 파라미터": [", ".join(f"param{n}" for n in range(rng.randint(1, 6))) for _ in apis],
+        "응답 필드": [", ".join(f"field{n}" for n in range(rng.randint(2, 10))) for _ in apis],
+    })
+    with pd.ExcelWriter(path) as writer:
+        api_list.to_excel(writer, sheet_name="API리스트", index=False)
+        api_spec.to_excel(writer, sheet_name="API명세서", index=False)
+
+
+def write_puml(path, api, tables):
+    lines = ["@startuml", f"title {api}", "actor User", "participant Server"]
+    lines += [f"database {table}" for table in tables]
+    lines += ["User -> Server : request"] + [f"Server -> {table} : query" for table in tables]
+    lines += ["Server --> User : response", "@enduml"]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def generate_corpus(output_dir, pdfs=2, pages=10, rows=100, pumls=10, seed=0):
+    """합성 코퍼스를 만들고 생성한 파일 경로와 조회에 쓸 (PA 넘버, PDF 파일명) 목록을 반환
+
+    - PDF pdfs개: 페이지마다 서로 다른 PA 넘버
+    - 엑셀 1개: API리스트/API명세서 시트에 rows행 (PA 넘버에 고르게 연결)
+    - puml pumls개: 앞쪽 API ID의 UML
+    같은 인자면 항상 같은 코퍼스가 만들어진다.
+    """
+    rng = random.Random(seed)
+    os.makedirs(output_dir, exist_ok=True)
+
+    pdf_paths, queries = [], []
+    for n in range(pdfs):
+        pdf_name = f"BENCH_Wireframe{n + 1}.pdf"
+        labels = []
+        for page in range(pages):
+            pa = pa_number(n * pages + page)
+            labels.append(f"{pa}\nScreen {n + 1}-{page + 1}\nWireframe description for {pa}")
+            queries.append((pa, pdf_name))
+        path = os.path.join(output_dir, pdf_name)
+        write_wireframe_pdf(path, labels)
+        pdf_paths.append(path)
+
+    pa_numbers = [pa for pa, _ in queries] or [pa_number(0)]
+    apis = [api_id(i) for i in range(rows)]
+    workbook_path = os.path.join(output_dir, "BENCH_API.xlsx")
+    write_api_workbook(workbook_path, apis, pa_numbers, rng)
+
+    puml_paths = []
+    for i, api in enumerate(apis[:pumls]):
+        path = os.path.join(output_dir, f"BENCH_{api}.puml")
+        write_puml(path, api, [f"TB_{api}_{t}" for t in range(rng.randint(1, 4))])
+        puml_paths.append(path)
+
+    return {"pdfs": pdf_paths, "workbooks": [workbook_path], "pumls": puml_paths, "queries": queries}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벤치마크용 합성 코퍼스 생성")
+    parser.add_argument("output_dir")
+    parser.add_argument("--pdfs", type=int, default=2)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--pumls", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.output_dir, args.pdfs, args.pages, args.rows, args.pumls, args.seed)
+    print(f"PDF {len(corpus['pdfs'])}개, 엑셀 {len(corpus['workbooks'])}개, puml {len(corpus['pumls'])}개 생성: {args.output_dir}")
@@ -0,0 +1,256 @@
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 추적/지표 설정
+TRACE_FILE = os.environ.get("TRACE_FILE")  # 지정하면 끝난 스팬을 JSONL로 추가 기록
+TRACE_RECENT_SPANS = 500  # 메모리에 보관할 최근 스팬 수
+PROFILE_INTERVAL = 0.005  # 샘플링 프로파일러 샘플 간격(초)
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRIC_PREFIX = "chatbot"
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """실행 구간 하나: 이름, 소요 시간, 속성(건수, 바이트 수 등)"""
+
+    def __init__(self, name, attrs, parent):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = dict(attrs)
+        self.parent = parent.id if parent else None
+        self.start = time.time()
+        self.seconds = None
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self):
+        return {
+            "id": self.id, "parent": self.parent, "name": self.name, "start": self.start,
+            "seconds": self.seconds, "thread": threading.current_thread().name,
+            "attrs": self.attrs, "error": self.error,
+        }
+
+
+class SpanMetrics:
+    """스팬 이름별 누적 지표 (횟수, 오류 수, 소요 시간 히스토그램, 숫자 속성 합계)"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.buckets = [0] * len(HISTOGRAM_BUCKETS)
+        self.attr_totals = Counter()
+
+    def observe(self, span):
+        self.count += 1
+        self.errors += span.error is not None
+        self.seconds += span.seconds
+        for i, bound in enumerate(HISTOGRAM_BUCKETS):
+            if span.seconds <= bound:
+                self.buckets[i] += 1
+        for key, value in span.attrs.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.attr_totals[key] += value
+
+
+class Tracer:
+    """스팬을 모아 최근 목록, 이름별 지표, JSONL 파일로 내보내는 추적기"""
+
+    def __init__(self, trace_file=TRACE_FILE, recent=TRACE_RECENT_SPANS):
+        self.trace_file = trace_file
+        self.recent = deque(maxlen=recent)
+        self.metrics = {}
+        self.profiler = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, profile=False, **attrs):
+        """with tracer.span("이름", 건수=...) as span: 형태로 구간을 기록 (span.set()으로 속성 추가)
+
+        profile=True이면 샘플링 프로파일러가 켜져 있을 때 이 구간을 실행하는 스레드의 스택을 수집한다.
+        """
+        span = Span(name, attrs, _current_span.get())
+        token = _current_span.set(span)
+        profiling = profile and self.profiler is not None
+        if profiling:
+            self.profiler.enter(name)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.seconds = time.perf_counter() - start
+            if profiling:
+                self.profiler.exit()
+            _current_span.reset(token)
+            self._finish(span)
+
+    def _finish(self, span):
+        record = span.to_dict()
+        with self._lock:
+            self.recent.append(record)
+            self.metrics.setdefault(span.name, SpanMetrics()).observe(span)
+            if self.trace_file:
+                with open(self.trace_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    # --- 내보내기 ---
+    def prometheus_text(self):
+        """Prometheus 텍스트 형식의 지표"""
+        with self._lock:
+            items = sorted(self.metrics.items())
+            lines = [
+                f"# HELP {METRIC_PREFIX}_span_seconds 구간별 소요 시간",
+                f"# TYPE {METRIC_PREFIX}_span_seconds histogram",
+            ]
+            for name, metrics in items:
+                for bound, count in zip(HISTOGRAM_BUCKETS, metrics.buckets):
+                    lines.append(f'{METRIC_PREFIX}_span_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+                lines.append(f'{METRIC_PREFIX}_span_seconds_bucket{{span="{name}",le="+Inf"}} {metrics.count}')
+                lines.append(f'{METRIC_PREFIX}_span_seconds_sum{{span="{name}"}} {metrics.seconds:.6f}')
+                lines.append(f'{METRIC_PREFIX}_span_seconds_count{{span="{name}"}} {metrics.count}')
+            lines += [f"# TYPE {METRIC_PREFIX}_span_errors_total counter"]
+            lines += [f'{METRIC_PREFIX}_span_errors_total{{span="{name}"}} {m.errors}' for name, m in items]
+            lines += [f"# TYPE {METRIC_PREFIX}_span_attribute_total counter"]
+            for name, metrics in items:
+                for key, value in sorted(metrics.attr_totals.items()):
+                    lines.append(f'{METRIC_PREFIX}_span_attribute_total{{span="{name}",attribute="{key}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def format_summary(self):
+        """스팬 이름별 누적 횟수와 평균 소요 시간 (프로세스 시작 후 전체)"""
+        with self._lock:
+            items = sorted(self.metrics.items())
+        lines = []
+        for name, metrics in items:
+            errors = f", 오류 {metrics.errors}회" if metrics.errors else ""
+            lines.append(f"{name} 평균 {metrics.seconds / metrics.count * 1000:.1f}ms ({metrics.count}회{errors})")
+        return "\n".join(lines)
+
+    def format_recent(self, limit=20):
+        """최근 스팬을 사람이 읽을 수 있는 문자열로 변환"""
+        with self._lock:
+            spans = list(self.recent)[-limit:]
+        lines = []
+        for span in reversed(spans):
+            attrs = ", ".join(f"{key}={value}" for key, value in span["attrs"].items())
+            error = f" ❌ {span['error']}" if span["error"] else ""
+            lines.append(f"{span['name']} {span['seconds'] * 1000:.1f}ms" + (f" ({attrs})" if attrs else "") + error)
+        return "\n".join(lines)
+
+
+class SamplingProfiler:
+    """profile=True인 스팬을 실행 중인 스레드의 스택만 주기적으로 수집하는 샘플링 프로파일러
+
+    결과는 "스팬;파일:함수;... 샘플 수" 형태의 collapsed stack으로, flamegraph 도구에 바로 넣을 수 있다.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self._active = {}  # 스레드 ID -> 스팬 이름 목록 (중첩 대비)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def enter(self, name):
+        with self._lock:
+            self._active.setdefault(threading.get_ident(), []).append(name)
+
+    def exit(self):
+        with self._lock:
+            names = self._active.get(threading.get_ident())
+            if names:
+                names.pop()
+                if not names:
+                    del self._active[threading.get_ident()]
+
+    def _sample(self):
+        with self._lock:
+            active = {thread_id: names[-1] for thread_id, names in self._active.items()}
+        frames = sys._current_frames()
+        stacks = []
+        for thread_id, span_name in active.items():
+            frame = frames.get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            stacks.append(";".join([span_name, *reversed(stack)]))
+        with self._lock:
+            self.samples.update(stacks)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="sampling-profiler")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def collapsed(self):
+        with self._lock:
+            return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+# 프로세스 전체에서 공유하는 추적기
+tracer = Tracer()
+span = tracer.span
+
+
+def start_profiler(interval=PROFILE_INTERVAL):
+    """샘플링 프로파일러를 켜고 반환 (이미 켜져 있으면 그대로 반환)"""
+    if tracer.profiler is None:
+        tracer.profiler = SamplingProfiler(interval)
+        tracer.profiler.start()
+    return tracer.profiler
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """/metrics에서 Prometheus 텍스트, /profile에서 collapsed stack을 돌려주는 핸들러"""
+
+    def log_message(self, format, *args):
+        pass  # 요청 로그는 출력하지 않음
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = tracer.prometheus_text(), "text/plain; version=0.0.4"
+        elif self.path == "/profile" and tracer.profiler is not None:
+            body, content_type = tracer.profiler.collapsed(), "text/plain"
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_metrics_server(host="127.0.0.1", port=9464):
+    """백그라운드 스레드에서 지표 HTTP 서버를 띄우고 서버 객체를 반환 (기본은 이 호스트에서만 접근 가능)"""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics-server").start()
+    return server
@@ -0,0 +1,71 @@
+import json
+import urllib.request
+
+import pytest
+
+from python_script.fake_ollama import start_fake_server
+
+
+class OllamaHttpEmbeddings:
+    """가짜 Ollama 서버의 /api/embed를 직접 호출하는 최소 임베딩 클라이언트 (embed_documents/embed_query)"""
+
+    def __init__(self, base_url, model="fake-embed"):
+        self.base_url = base_url
+        self.model = model
+        self.calls = []  # 요청마다 보낸 문서 목록
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        body = json.dumps({"model": self.model, "input": list(texts)}).encode("utf-8")
+        request = urllib.request.Request(
+            f"{self.base_url}/api/embed", data=body, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())["embeddings"]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class OllamaHttpLLM:
+    """가짜 Ollama 서버의 /api/generate 스트림을 토큰 단위로 돌려주는 최소 LLM 클라이언트 (stream)"""
+
+    def __init__(self, base_url, model="fake-llm"):
+        self.base_url = base_url
+        self.model = model
+
+    def stream(self, prompt):
+        body = json.dumps({"model": self.model, "prompt": prompt}).encode("utf-8")
+        request = urllib.request.Request(
+            f"{self.base_url}/api/generate", data=body, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request) as response:
+            for line in response:
+                chunk = json.loads(line)
+                if chunk.get("done"):
+                    break
+                yield chunk["response"]
+
+
+@pytest.fixture
+def fake_server():
+    server = start_fake_server(dim=16)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_fake_server():
+    """지연 시간 등을 바꿔 가짜 서버를 띄우는 팩토리"""
+    servers = []
+
+    def make(**kwargs):
+        server = start_fake_server(**kwargs)
+        servers.append(server)
+        return server
+
+    yield make
+    for server in servers:
+        server.shutdown()
+        server.server_close()
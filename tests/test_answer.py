@@ -0,0 +1,31 @@
+from python_script.answer import AnswerStats, stream_answer
+from python_script.fake_ollama import fake_answer_tokens
+
+from tests.conftest import OllamaHttpLLM
+
+
+def test_stream_answer_records_ttft_and_tokens(make_fake_server):
+    server = make_fake_server(latency=0.05, token_latency=0.005, answer_tokens=8)
+    stats = AnswerStats(prompt_tokens=12)
+
+    chunks = list(stream_answer(OllamaHttpLLM(server.base_url), "PA001 화면의 API는?", stats))
+
+    assert chunks == fake_answer_tokens("PA001 화면의 API는?", 8)
+    assert stats.tokens == 8
+    assert stats.ttft >= 0.05
+    assert stats.seconds >= stats.ttft + 7 * 0.005
+    assert stats.tokens_per_sec > 0
+    assert server.request_counts["/api/generate"] == 1
+    assert "8토큰" in stats.format()
+
+
+def test_stream_answer_without_tokens_has_no_ttft():
+    class EmptyLLM:
+        def stream(self, prompt):
+            yield ""
+
+    stats = AnswerStats()
+    assert list(stream_answer(EmptyLLM(), "질문", stats)) == []
+    assert stats.ttft is None
+    assert stats.tokens == 0
+    assert stats.tokens_per_sec == 0.0
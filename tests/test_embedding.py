@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+from python_script.embedder import BatchEmbedder
+from python_script.fake_ollama import fake_embedding
+
+from tests.conftest import OllamaHttpEmbeddings
+
+
+def expected_vectors(texts, dim=16):
+    return [pytest.approx(fake_embedding(text, dim)) for text in texts]
+
+
+def test_batch_embedder_keeps_input_order(fake_server):
+    embeddings = OllamaHttpEmbeddings(fake_server.base_url)
+    embedder = BatchEmbedder(embeddings, batch_size=3, max_in_flight=2)
+    texts = [f"API ID: CMM{i:03d}" for i in range(10)]
+
+    vectors = embedder.embed_documents(texts)
+
+    assert vectors == expected_vectors(texts)
+    assert sorted(len(batch) for batch in embeddings.calls) == [1, 3, 3, 3]
+    assert fake_server.request_counts["/api/embed"] == 4
+    assert embedder.total_docs == 10
+    assert embedder.total_batches == 4
+
+
+def test_batch_embedder_limits_in_flight_requests(make_fake_server):
+    server = make_fake_server(dim=16, latency=0.05)
+    embedder = BatchEmbedder(OllamaHttpEmbeddings(server.base_url), batch_size=1, max_in_flight=2)
+
+    peak = 0
+    active = 0
+    original = embedder.embeddings.embed_documents
+    lock = threading.Lock()
+
+    def counting(texts):
+        nonlocal peak, active
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        try:
+            return original(texts)
+        finally:
+            with lock:
+                active -= 1
+
+    embedder.embeddings.embed_documents = counting
+    callers = [threading.Thread(target=embedder.embed_documents, args=([f"doc {c}-{i}" for i in range(4)],))
+               for c in range(3)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+
+    assert peak == 2
+    assert server.request_counts["/api/embed"] == 12
+
+
+def test_cached_embeddings_counts_hits(fake_server, tmp_path):
+    pytest.importorskip("langchain_core")
+    from python_script.embedding_cache import CachedEmbeddings
+
+    embeddings = OllamaHttpEmbeddings(fake_server.base_url)
+    path = str(tmp_path / "embedding_cache.sqlite3")
+    cached = CachedEmbeddings(BatchEmbedder(embeddings, batch_size=2), path=path)
+
+    first = cached.embed_documents(["a", "b", "a", "c"])
+    assert first == expected_vectors(["a", "b", "a", "c"])
+    assert embeddings.calls == [["a", "b"], ["c"]]  # 중복은 한 번만 임베딩
+    assert cached.stats()["misses"] == 3
+
+    second = cached.embed_documents(["c", "d"])
+    assert second == expected_vectors(["c", "d"])
+    assert embeddings.calls[-1] == ["d"]
+    stats = cached.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 0, 4)
+
+    # 새 인스턴스는 메모리가 비어 있으므로 디스크 계층에서 읽음
+    reopened = CachedEmbeddings(embeddings, model=cached.model, path=path)
+    assert reopened.embed_query("b") == pytest.approx(fake_embedding("b", 16))
+    assert reopened.stats()["disk_hits"] == 1
+    assert fake_server.request_counts["/api/embed"] == 3
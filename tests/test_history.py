@@ -0,0 +1,56 @@
+from python_script.answer import estimate_tokens
+from python_script.history import HistoryStore, fold_summary, history_context
+
+
+def conversation(turns):
+    messages = []
+    for i in range(turns):
+        messages.append({"seq": 2 * i + 1, "role": "user", "content": f"PA{i:03} 화면 설명해줘"})
+        messages.append({"seq": 2 * i + 2, "role": "assistant", "content": f"API ID: CMM{i:03} 을 사용합니다."})
+    return messages
+
+
+def test_history_store_pages_by_seq(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    for message in conversation(5):
+        store.append("s1", {**message, "images": [("page_1.png", "PA000")]} if message["seq"] == 1 else message)
+    store.append("s2", {"role": "user", "content": "다른 세션"})
+
+    latest = store.page("s1", 11, limit=4)
+    assert [message["seq"] for message in latest] == [7, 8, 9, 10]
+    older = store.page("s1", latest[0]["seq"], limit=4)
+    assert [message["seq"] for message in older] == [3, 4, 5, 6]
+    first = store.page("s1", older[0]["seq"], limit=4)
+    assert [message["seq"] for message in first] == [1, 2]
+    assert first[0]["images"] == [("page_1.png", "PA000")]
+    assert store.page("s1", first[0]["seq"]) == []
+    assert [message["content"] for message in store.page("s2", 100)] == ["다른 세션"]
+
+
+def test_summary_survives_reopen(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    store = HistoryStore(path)
+    assert store.summary("s1") == ""
+    store.save_summary("s1", fold_summary("", conversation(1)))
+
+    assert HistoryStore(path).summary("s1") == "- 질문: PA000 화면 설명해줘\n  관련: API ID: CMM000"
+    assert HistoryStore(path).summary("s2") == ""
+
+
+def test_fold_summary_stays_within_budget():
+    summary = ""
+    messages = conversation(20)
+    for i in range(0, len(messages), 4):
+        summary = fold_summary(summary, messages[i:i + 4], budget=60)
+        assert estimate_tokens(summary) <= 60
+    # 오래된 질문부터 버리고, 질문이 빠지면 딸린 관련 키 줄도 버림
+    assert summary.splitlines()[0].startswith("- 질문:")
+    assert "PA019" in summary and "PA000" not in summary
+
+
+def test_history_context_prefers_recent_messages():
+    context = history_context("- 질문: 예전 질문", conversation(10), budget=60)
+    assert context.startswith("이전 대화 요약:\n- 질문: 예전 질문")
+    assert context.endswith("도우미: API ID: CMM009 을 사용합니다.")
+    assert "PA000" not in context
+    assert estimate_tokens(context) <= 60 + 2
@@ -0,0 +1,72 @@
+import os
+from pathlib import Path
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from python_script.image_cache import ImageCache, make_preview, make_previews, preview_path  # noqa: E402
+
+
+def write_png(path, size=(2000, 1000), mode="RGB", color="white"):
+    Image.new(mode, size, color).save(path)
+    return str(path)
+
+
+def test_make_preview_shrinks_and_reuses(tmp_path):
+    source = write_png(tmp_path / "page_1.png")
+    target = make_preview(source, max_size=500)
+
+    assert target == preview_path(source)
+    assert os.path.dirname(target) == str(tmp_path / ".preview")
+    with Image.open(target) as preview:
+        assert max(preview.size) == 500
+
+    # 원본보다 새 미리보기는 다시 만들지 않음
+    mtime = os.path.getmtime(target)
+    assert make_preview(source, max_size=500) == target
+    assert os.path.getmtime(target) == mtime
+
+    # 원본이 다시 적재되면 새로 만듦
+    os.utime(source, (mtime + 10, mtime + 10))
+    make_preview(source, max_size=500)
+    assert os.path.getmtime(target) > mtime
+
+
+def test_make_preview_keeps_transparency(tmp_path):
+    target = make_preview(write_png(tmp_path / "uml.png", mode="RGBA", color=(0, 0, 0, 0)))
+    with Image.open(target) as preview:
+        assert preview.mode == ("RGBA" if target.endswith(".webp") else "RGB")
+
+
+def test_make_previews_skips_missing(tmp_path):
+    paths = [write_png(tmp_path / f"page_{i}.png", size=(10, 10)) for i in range(3)]
+    assert make_previews(paths + [str(tmp_path / "missing.png"), None]) == 3
+    assert all(os.path.exists(preview_path(path)) for path in paths)
+
+
+def test_image_cache_preview_and_original(tmp_path):
+    source = write_png(tmp_path / "page_1.png")
+    cache = ImageCache()
+
+    data = cache.preview(source)
+    assert cache.preview(source) == data
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert data == Path(preview_path(source)).read_bytes()
+
+    with open(source, "rb") as f:
+        assert cache.original(source) == f.read()
+    assert cache.preview(str(tmp_path / "missing.png")) is None
+
+
+def test_image_cache_evicts_by_bytes(tmp_path):
+    paths = [write_png(tmp_path / f"page_{i}.png", size=(50 + i, 50)) for i in range(3)]
+    sizes = [len(ImageCache().preview(path)) for path in paths]
+    cache = ImageCache(max_bytes=sizes[1] + sizes[2])
+
+    for path in paths:
+        cache.preview(path)
+    cache.preview(paths[0])
+    assert cache.misses == 4
+    cache.preview(paths[2])
+    assert cache.hits == 1
@@ -0,0 +1,106 @@
+import functools
+
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+from python_script import ingest, resources  # noqa: E402
+from python_script.excel_reader import iter_sheet_frames  # noqa: E402
+from python_script.join_index import JoinIndex  # noqa: E402
+from python_script.manifest import IngestManifest  # noqa: E402
+from tests.test_sync import CountingEmbedder, MemoryChroma  # noqa: E402
+
+
+class RecordingUI:
+    def __init__(self):
+        self.messages = []
+
+    def __getattr__(self, level):
+        return lambda message: self.messages.append((level, message))
+
+
+class StatsEmbedder(CountingEmbedder):
+    def format_stats(self):
+        return f"{len(self.embedded)}개"
+
+
+def write_api_list(path, rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "API리스트"
+    sheet.append(["API 목록"])  # 헤더 위의 제목 행
+    sheet.append(["API ID", "API 명", "사용화면아이디\n(없으면 비화면 API)"])
+    for api_id, pa_number in rows:
+        sheet.append([api_id, f"{api_id} 조회", pa_number])
+    workbook.save(path)
+    return str(path)
+
+
+@pytest.fixture
+def api_list_env(tmp_path, monkeypatch):
+    chroma = MemoryChroma("api_list", max_batch_size=2)
+    manifest = IngestManifest(str(tmp_path / "manifest.sqlite3"))
+    join_index = JoinIndex(str(tmp_path / "join_index.sqlite3"))
+    embedder = StatsEmbedder()
+    monkeypatch.setattr(resources, "get_chroma_client", lambda name: chroma)
+    monkeypatch.setattr(resources, "get_ingest_manifest", lambda: manifest)
+    monkeypatch.setattr(resources, "get_ingest_embedder", lambda name: embedder)
+    monkeypatch.setattr(resources, "get_join_index", lambda: join_index)
+    # 2행씩 읽어 묶음마다 동기화하는지 확인
+    monkeypatch.setattr(ingest, "iter_sheet_frames", functools.partial(iter_sheet_frames, chunk_rows=2))
+    return chroma, manifest, join_index, embedder
+
+
+def test_api_list_is_synced_per_chunk(tmp_path, api_list_env):
+    chroma, manifest, join_index, embedder = api_list_env
+    path = write_api_list(tmp_path / "apis.xlsx", [("CMM001", "PA001"), ("CMM002", "PA001"), ("CMM003", "PA002")])
+
+    ui = RecordingUI()
+    assert ingest.store_api_list_in_chroma(path, ui)
+    assert ("success", "✅ API 리스트: 추가 3개 / 삭제 0개 / 변경 없음 0개") in ui.messages
+    assert [size for method, size in chroma._collection.calls if method == "upsert"] == [2, 1]
+    assert [api["api_id"] for api in join_index.lookup("PA001")["apis"]] == ["CMM001", "CMM002"]
+    assert {metadata["pa_number"] for _, metadata, _ in chroma._collection.rows.values()} == {"PA001", "PA002"}
+
+    # 한 행이 빠지면 마지막에 한 번만 삭제
+    path = write_api_list(tmp_path / "apis.xlsx", [("CMM001", "PA001"), ("CMM003", "PA002")])
+    ui = RecordingUI()
+    assert ingest.store_api_list_in_chroma(path, ui)
+    assert ("success", "✅ API 리스트: 추가 0개 / 삭제 1개 / 변경 없음 2개") in ui.messages
+    assert len(chroma._collection.rows) == 2
+    assert len(embedder.embedded) == 3
+
+
+def test_missing_api_list_sheet_keeps_rows(tmp_path, api_list_env):
+    chroma, *_ = api_list_env
+    assert ingest.store_api_list_in_chroma(write_api_list(tmp_path / "apis.xlsx", [("CMM001", "PA001")]), RecordingUI())
+
+    workbook = openpyxl.Workbook()
+    workbook.active.title = "기타"
+    workbook.save(tmp_path / "apis.xlsx")
+    ui = RecordingUI()
+    assert not ingest.store_api_list_in_chroma(str(tmp_path / "apis.xlsx"), ui)
+    assert ui.messages[0][0] == "error"
+    assert len(chroma._collection.rows) == 1
+
+
+def test_stage_upload_copies_to_legacy_location(tmp_path):
+    upload = tmp_path / "uploads" / "abc123" / "DEVICE.pdf"
+    upload.parent.mkdir(parents=True)
+    upload.write_bytes(b"%PDF new")
+    older = tmp_path / "data_result" / "OTHER.pdf"
+    older.parent.mkdir()
+    older.write_bytes(b"%PDF old")
+
+    staged = ingest.stage_upload(str(upload), str(tmp_path / "data_result"))
+    assert staged == str(tmp_path / "data_result" / "DEVICE.pdf")
+    assert (tmp_path / "data_result" / "DEVICE.pdf").read_bytes() == b"%PDF new"
+    # 보조 스크립트가 "가장 최근 PDF"로 찾는 파일이 방금 올린 파일이어야 함
+    pdfs = sorted((tmp_path / "data_result").glob("*.pdf"), key=lambda path: path.stat().st_mtime_ns)
+    assert pdfs[-1].name == "DEVICE.pdf"
+    assert ingest.stage_upload(staged, str(tmp_path / "data_result")) == staged
+
+
+def test_ingest_key_serializes_by_file_type():
+    assert ingest.ingest_key("/a/x.PDF") == ingest.ingest_key("/b/y.pdf") == ".pdf"
+    assert ingest.ingest_key("/a/x.xlsx") != ingest.ingest_key("/a/x.puml")
@@ -0,0 +1,64 @@
+import threading
+
+from python_script.jobs import DONE, JobQueue, JobStore
+
+
+def test_recent_lists_jobs_of_the_session(tmp_path):
+    release = threading.Event()
+
+    def handler(file_path, file_hash, ui):
+        release.wait(5)
+        ui.success(f"{file_path} 처리 완료")
+        return True
+
+    queue = JobQueue(handler, store=JobStore(str(tmp_path / "jobs.sqlite3")))
+    first = queue.submit(str(tmp_path / "a" / "x.pdf"), "hash-x", session_id="s1")
+    second = queue.submit(str(tmp_path / "b" / "y.pdf"), "hash-y", session_id="s2")
+    # 다른 세션이 대기 중인 같은 파일을 올리면 같은 작업을 받고, 그 세션의 목록에도 나타남
+    shared = queue.submit(str(tmp_path / "a" / "x.pdf"), "hash-x", session_id="s2")
+    assert shared == first
+
+    release.set()
+    queue._executor.shutdown(wait=True)
+
+    assert [job["id"] for job in queue.store.recent("s1")] == [first]
+    assert {job["id"] for job in queue.store.recent("s2")} == {first, second}
+    assert queue.store.recent("unknown") == []
+
+    # 새 프로세스(새로고침 후)에서도 같은 세션 ID로 다시 찾을 수 있음
+    reopened = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job = reopened.recent("s1")[0]
+    assert job["status"] == DONE
+    assert job["messages"][-1]["level"] == "success"
+
+
+def test_waiting_job_does_not_hold_a_worker(tmp_path):
+    started = []
+    release = {name: threading.Event() for name in ("x1", "x2", "y")}
+
+    def handler(file_path, file_hash, ui):
+        started.append(file_hash)
+        release[file_hash].wait(5)
+        return True
+
+    queue = JobQueue(handler, store=JobStore(str(tmp_path / "jobs.sqlite3")), max_workers=2)
+    first = queue.submit(str(tmp_path / "a" / "x.pdf"), "x1")
+    second = queue.submit(str(tmp_path / "b" / "x.pdf"), "x2")  # 같은 이름의 다른 버전은 앞 작업 뒤에서 대기
+    other = queue.submit(str(tmp_path / "c" / "y.pdf"), "y")
+
+    # 대기 중인 작업이 워커를 잡고 있지 않으므로 다른 파일은 바로 처리됨
+    release["y"].set()
+    for _ in range(100):
+        if queue.store.get(other)["status"] == DONE:
+            break
+        threading.Event().wait(0.05)
+    assert queue.store.get(other)["status"] == DONE
+    assert queue.store.get(second)["stage"] == "같은 이름의 파일 처리가 끝나기를 기다리는 중"
+    assert started == ["x1", "y"]
+
+    release["x1"].set()
+    release["x2"].set()
+    queue._executor.shutdown(wait=True)
+    assert [queue.store.get(job)["status"] for job in (first, second)] == [DONE, DONE]
+    assert started == ["x1", "y", "x2"]
+    assert queue._waiting == {}
@@ -0,0 +1,51 @@
+import subprocess
+
+import pytest
+
+pytest.importorskip("pdf2image")
+from python_script import pdf2txt  # noqa: E402
+
+
+@pytest.fixture
+def page_dir(tmp_path):
+    image_dir = tmp_path / "DEVIDED_PDF_DIR" / "a"
+    image_dir.mkdir(parents=True)
+    for page in (1, 2):
+        (image_dir / f"page_{page}.png").write_bytes(f"image {page}".encode("utf-8"))
+    return image_dir
+
+
+def test_failed_text_layer_degrades_to_empty_pages(monkeypatch, tmp_path, page_dir):
+    def failing_run(command, **kwargs):
+        return subprocess.CompletedProcess(command, 1, stdout="", stderr="Syntax Error")
+
+    monkeypatch.setattr(pdf2txt.subprocess, "run", failing_run)
+    monkeypatch.setattr(pdf2txt, "ocr_available", lambda: False)
+    cache = pdf2txt.PageTextCache(str(tmp_path / "page_text.sqlite3"))
+
+    result = pdf2txt.extract_pdf_text(str(tmp_path / "a.pdf"), image_dir=str(page_dir), cache=cache)
+    assert result["texts"] == {1: "", 2: ""}
+    assert set(result["methods"].values()) == {pdf2txt.EMPTY}
+    assert cache.get_many([pdf2txt.page_hash(str(page_dir / "page_1.png"))]) == {}  # 빈 결과는 캐시하지 않음
+
+
+def test_missing_pdftotext_degrades_to_empty_pages(monkeypatch):
+    def missing_run(command, **kwargs):
+        raise FileNotFoundError(command[0])
+
+    monkeypatch.setattr(pdf2txt.subprocess, "run", missing_run)
+    assert pdf2txt.extract_text_layer("a.pdf", 3, 4) == {3: "", 4: ""}
+
+
+def test_run_never_raises(monkeypatch, tmp_path, page_dir):
+    def broken(*args, **kwargs):
+        raise RuntimeError("broken cache")
+
+    monkeypatch.setattr(pdf2txt, "extract_pdf_text", broken)
+    pdf_path = tmp_path / "a.pdf"
+
+    result = pdf2txt.run(str(pdf_path), {"devide_pdf.py": str(page_dir)})
+    assert result["texts"] == {1: "", 2: ""}
+    assert result["error"] == "broken cache"
+    with open(result["text_path"], encoding="utf-8") as f:
+        assert f.read() == "--- page_1 ---\n\n--- page_2 ---\n\n"
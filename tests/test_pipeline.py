@@ -0,0 +1,97 @@
+import pytest
+
+from python_script.pipeline import Stage, run_pipeline
+from python_script.tracing import Tracer, span, tracer
+
+
+def test_results_flow_to_dependent_stages():
+    stages = [
+        Stage("split", lambda path, results: f"{path}:pages"),
+        Stage("text", lambda path, results: results["split"] + ":text", depends_on=["split"]),
+    ]
+    reports = run_pipeline(stages, "a.pdf")
+    assert reports["text"] == {"status": "ok", "seconds": reports["text"]["seconds"], "result": "a.pdf:pages:text",
+                               "error": None}
+
+
+def test_stage_spans_are_children_of_caller_span():
+    stages = [Stage("a", lambda path, results: 1), Stage("b", lambda path, results: 2)]
+    with span("ingest.job") as job_span:
+        run_pipeline(stages, "a.pdf")
+    records = [record for record in tracer.recent if record["name"] in ("pipeline.a", "pipeline.b")][-2:]
+    assert [record["parent"] for record in records] == [job_span.id, job_span.id]
+
+
+def test_failed_stage_skips_dependents_but_not_independent_stages():
+    def fail(path, results):
+        raise RuntimeError("boom")
+
+    done = []
+    stages = [
+        Stage("split", fail),
+        Stage("text", lambda path, results: "text", depends_on=["split"]),
+        Stage("pa", lambda path, results: "pa", depends_on=["text"]),
+        Stage("other", lambda path, results: "other"),
+    ]
+    reports = run_pipeline(stages, "a.pdf", on_stage_done=lambda name, report: done.append(name))
+
+    assert reports["split"]["status"] == "error"
+    assert reports["split"]["error"] == "boom"
+    assert reports["text"]["status"] == "skipped"
+    assert reports["pa"]["status"] == "skipped"
+    assert reports["other"]["status"] == "ok"
+    assert sorted(done) == ["other", "pa", "split", "text"]
+
+
+def test_cycle_is_rejected():
+    stages = [
+        Stage("a", lambda path, results: None, depends_on=["b"]),
+        Stage("b", lambda path, results: None, depends_on=["a"]),
+    ]
+    with pytest.raises(ValueError, match="순환"):
+        run_pipeline(stages, "a.pdf")
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError, match="missing"):
+        run_pipeline([Stage("a", lambda path, results: None, depends_on=["missing"])], "a.pdf")
+
+
+def test_registered_stage_replaces_script(monkeypatch, tmp_path):
+    from python_script import pipeline
+
+    monkeypatch.setattr(pipeline, "_registered_stages", {})
+    pipeline.register_stage("missing_helper.py", lambda path, results: f"registered:{path}")
+    reports = run_pipeline([pipeline.script_stage("missing_helper.py", str(tmp_path))], "a.pdf")
+    assert reports["missing_helper.py"]["result"] == "registered:a.pdf"
+
+    pipeline._registered_stages.clear()
+    reports = run_pipeline([pipeline.script_stage("missing_helper.py", str(tmp_path))], "a.pdf")
+    assert reports["missing_helper.py"]["status"] == "error"
+
+
+def test_subprocess_stage_gets_upload_work_dir(tmp_path):
+    from python_script import pipeline
+
+    script_dir = tmp_path / "scripts"
+    script_dir.mkdir()
+    (script_dir / "helper_only_script.py").write_text("import os\nprint(os.environ['UPLOAD_DIR'])\n", encoding="utf-8")
+    work_dir = tmp_path / "uploads" / "abc123"
+    work_dir.mkdir(parents=True)
+
+    stage = pipeline.script_stage("helper_only_script.py", str(script_dir))
+    reports = run_pipeline([stage], str(work_dir / "a.pdf"))
+    assert reports["helper_only_script.py"]["result"].strip() == str(work_dir)
+
+
+def test_tracer_summary_averages_spans():
+    tracer = Tracer()
+    for _ in range(2):
+        with tracer.span("stage.a"):
+            pass
+    with pytest.raises(RuntimeError):
+        with tracer.span("stage.b"):
+            raise RuntimeError("boom")
+    lines = tracer.format_summary().splitlines()
+    assert lines[0].startswith("stage.a 평균 ") and lines[0].endswith("(2회)")
+    assert lines[1].endswith("(1회, 오류 1회)")
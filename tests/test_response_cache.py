@@ -0,0 +1,70 @@
+import pytest
+
+from python_script.response_cache import ResponseCache
+
+
+class WordEmbeddings:
+    """질문에 들어 있는 단어로 만든 벡터 (같은 단어 구성이면 같은 벡터)"""
+
+    WORDS = ["주문", "조회", "취소", "방법", "알려줘"]
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return [float(word in text) for word in self.WORDS]
+
+
+@pytest.fixture
+def versions():
+    return {"api_list": 1}
+
+
+@pytest.fixture
+def cache(versions):
+    return ResponseCache(WordEmbeddings(), lambda: dict(versions))
+
+
+def test_keyed_questions_include_question_text(cache):
+    cache.put("PA001 화면 설명해줘", "설명", pa_number="PA001")
+
+    assert cache.get("pa001   화면 설명해줘", pa_number="PA001") == ("설명", "key")
+    assert cache.get("PA001 API 목록 알려줘", pa_number="PA001") == (None, None)
+    assert cache.get("PA001 화면 설명해줘", pa_number="PA002") == (None, None)
+    # 키가 있는 질문은 임베딩하지 않음
+    assert cache.embeddings.calls == 0
+
+
+def test_similar_keyless_question_hits(cache):
+    cache.put("주문 조회 방법 알려줘", "답변")
+
+    assert cache.get("주문 조회 방법 알려줘!") == ("답변", "similar")
+    assert cache.get("주문 취소") == (None, None)
+    # 키가 있는 질문은 키가 없는 항목과 비교하지 않음
+    assert cache.get("주문 조회 방법 알려줘", api_id="CMM001") == (None, None)
+    assert (cache.key_hits, cache.similar_hits, cache.misses) == (0, 1, 2)
+
+
+def test_version_change_clears_cache(cache, versions):
+    cache.put("PA001 설명", "설명", pa_number="PA001")
+    versions["api_list"] = 2
+
+    assert cache.get("PA001 설명", pa_number="PA001") == (None, None)
+    assert cache.invalidations == 1
+
+
+def test_lru_and_ttl(versions, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("python_script.response_cache.time.time", lambda: now[0])
+    cache = ResponseCache(WordEmbeddings(), lambda: dict(versions), max_items=2, ttl=60)
+
+    cache.put("a", 1, pa_number="PA001")
+    cache.put("b", 2, pa_number="PA002")
+    cache.get("a", pa_number="PA001")
+    cache.put("c", 3, pa_number="PA003")
+    assert cache.get("b", pa_number="PA002") == (None, None)
+    assert cache.get("a", pa_number="PA001") == (1, "key")
+
+    now[0] += 61
+    assert cache.get("c", pa_number="PA003") == (None, None)
@@ -0,0 +1,68 @@
+import pytest
+
+from python_script import resources, retrieval
+from python_script.join_index import JoinIndex
+from python_script.spec_store import SpecStore
+from python_script.tracing import span, tracer
+
+
+@pytest.fixture
+def stores(tmp_path, monkeypatch):
+    join_index = JoinIndex(str(tmp_path / "join_index.sqlite3"))
+    spec_store = SpecStore(str(tmp_path / "api_specs.sqlite3"))
+    monkeypatch.setattr(resources, "get_join_index", lambda: join_index)
+    monkeypatch.setattr(resources, "get_spec_store", lambda: spec_store)
+
+    # 조인 인덱스에 있는 PA 넘버는 Chroma를 조회하지 않아야 함
+    def no_chroma(*args, **kwargs):
+        raise AssertionError("Chroma lookup on the join index path")
+
+    for name in ("search_pdf_pages", "search_api_info", "search_api_spec_info", "search_uml_info"):
+        monkeypatch.setattr(retrieval, name, no_chroma)
+    return join_index, spec_store
+
+
+def load_pa001(join_index, spec_metadata):
+    join_index.apply("pa_documents", added=[
+        ("p1", "", {"pa_number": "PA001", "pdf_filename": "a.pdf", "image_path": "page_1.png"}),
+        ("p2", "", {"pa_number": "PA001", "pdf_filename": "b.pdf", "image_path": "page_9.png"}),
+    ])
+    join_index.apply("api_list", added=[("a1", "API ID: CMM001\nPA: PA001", {"pa_number": "PA001", "api_id": "CMM001"})])
+    join_index.apply("api_spec", added=[("s1", "", {"api_id": "CMM001", **spec_metadata})])
+    join_index.apply("puml", added=[("u1", "", {"api_id": "CMM001", "png_path": "cmm001.png"})])
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+def test_retrieve_uses_join_index(stores, parallel):
+    join_index, spec_store = stores
+    spec_store.put_many([("a.xlsx::명세::CMM001", {"설명": "조회"})])
+    load_pa001(join_index, {"api_spec_ref": "a.xlsx::명세::CMM001"})
+
+    result = retrieval.retrieve("PA001", "a.pdf", None, parallel=parallel)
+    assert result["api_id"] == "CMM001"
+    assert [m["image_path"] for m in result["pdf_results"]["metadatas"][0]] == ["page_1.png"]
+    assert result["api_list_info"] == "API ID: CMM001\nPA: PA001"
+    assert result["uml_results"]["metadatas"][0] == [{"api_id": "CMM001", "png_path": "cmm001.png"}]
+    assert retrieval.load_api_spec(result["api_spec_results"]["metadatas"][0][0]) == {"설명": "조회"}
+    assert set(result["timings"]) == {"join_index"}
+
+
+def test_retrieve_join_index_with_inline_spec(stores):
+    join_index, _ = stores
+    load_pa001(join_index, {"api_spec_info": '{"설명": "예전 형식"}'})
+
+    result = retrieval.retrieve("PA001", "a.pdf", None)
+    assert retrieval.load_api_spec(result["api_spec_results"]["metadatas"][0][0]) == {"설명": "예전 형식"}
+
+
+def test_pool_spans_keep_parent():
+    def step(value):
+        with span("retrieval.test_inner"):
+            return value
+
+    with span("chat.test") as parent:
+        timings = {}
+        assert retrieval._run_steps({"a": (step, 1), "b": (step, 2)}, timings, parallel=True) == [1, 2]
+
+    records = [record for record in tracer.recent if record["name"] in ("retrieval.a", "retrieval.b")][-2:]
+    assert [record["parent"] for record in records] == [parent.id, parent.id]
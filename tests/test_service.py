@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+from python_script.service import ChatService, cleanup_uploads
+
+
+class InterruptedSlots:
+    """자리를 기다리다 중단되는 세마포어"""
+
+    def acquire(self):
+        raise KeyboardInterrupt
+
+    def release(self):
+        raise AssertionError("released a slot that was never acquired")
+
+
+def test_interrupted_wait_is_not_counted_as_waiting(tmp_path):
+    service = ChatService(None, None, None, None, str(tmp_path))
+    service._generation_slots = InterruptedSlots()
+
+    with pytest.raises(KeyboardInterrupt):
+        list(service.stream("prompt", {}))
+    assert (service.waiting_generations, service.active_generations) == (0, 0)
+
+
+def test_cleanup_uploads_keeps_recent_and_active_dirs(tmp_path):
+    uploads = tmp_path / "uploads"
+    for name in ("old", "active", "recent"):
+        (uploads / name).mkdir(parents=True)
+        (uploads / name / "a.pdf").write_bytes(b"%PDF")
+    for name in ("old", "active"):
+        os.utime(uploads / name, (1000, 1000))
+
+    removed = cleanup_uploads(str(uploads), [str(uploads / "active")], max_age=3600, now=1000 + 7200)
+    assert removed == 1
+    assert sorted(path.name for path in uploads.iterdir()) == ["active", "recent"]
+    assert cleanup_uploads(str(tmp_path / "missing"), [], max_age=0) == 0
@@ -0,0 +1,49 @@
+import sqlite3
+
+from python_script.spec_store import SpecStore, encode_spec, spec_ref
+
+
+def test_refs_keep_same_api_id_apart(tmp_path):
+    store = SpecStore(str(tmp_path / "api_specs.sqlite3"))
+    a = spec_ref("a.xlsx", "API명세서", "CMM001")
+    b = spec_ref("b.xlsx", "API명세서", "CMM001")
+    store.put_many([(a, {"설명": "A"}), (b, {"설명": "B"})])
+
+    assert store.get(a) == {"설명": "A"}
+    assert store.get(b) == {"설명": "B"}
+    assert store.get("CMM001") is None
+
+    store.delete_many([a])
+    assert store.get(a) is None
+    assert store.get(b) == {"설명": "B"}
+
+
+def test_cache_is_invalidated_on_overwrite(tmp_path):
+    store = SpecStore(str(tmp_path / "api_specs.sqlite3"), cache_items=1)
+    store.put_many([("r1", {"v": 1}), ("r2", {"v": 2})])
+
+    assert store.get("r1") == {"v": 1}
+    assert store.get("r1") == {"v": 1}
+    assert (store.cache_hits, store.cache_misses) == (1, 1)
+
+    # 캐시 크기를 넘으면 오래된 명세부터 비움
+    store.get("r2")
+    store.get("r1")
+    assert store.cache_misses == 3
+
+    store.put_many([("r1", {"v": 3})])
+    assert store.get("r1") == {"v": 3}
+
+
+def test_migrates_legacy_api_id_column(tmp_path):
+    path = str(tmp_path / "api_specs.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE api_specs (api_id TEXT PRIMARY KEY, payload BLOB NOT NULL)")
+    conn.execute("INSERT INTO api_specs VALUES (?, ?)", ("CMM001", encode_spec({"설명": "예전"})))
+    conn.commit()
+    conn.close()
+
+    store = SpecStore(path)
+    assert store.get("CMM001") == {"설명": "예전"}
+    store.put_many([("a.xlsx::API명세서::CMM001", {"설명": "새 참조"})])
+    assert store.get("a.xlsx::API명세서::CMM001") == {"설명": "새 참조"}
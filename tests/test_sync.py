@@ -0,0 +1,216 @@
+import pytest
+
+from python_script.join_index import JoinIndex
+from python_script.manifest import IngestManifest, SourceSync, doc_id, reindex_collection, sync_documents
+
+
+class MemoryCollection:
+    """sync_documents가 쓰는 Chroma 컬렉션 메서드(get/upsert/delete)만 가진 메모리 컬렉션"""
+
+    def __init__(self, name, max_batch_size=None):
+        self.name = name
+        self.rows = {}
+        self.max_batch_size = max_batch_size
+        self.calls = []
+
+    def _check_batch(self, method, ids):
+        # Chroma처럼 한 번에 받을 수 있는 ID 수를 넘으면 실패
+        self.calls.append((method, len(ids)))
+        if self.max_batch_size is not None and len(ids) > self.max_batch_size:
+            raise ValueError(f"batch size {len(ids)} exceeds {self.max_batch_size}")
+
+    def get(self, ids=None, include=()):
+        if ids is not None:
+            self._check_batch("get", ids)
+        found = [i for i in ids if i in self.rows] if ids is not None else list(self.rows)
+        return {
+            "ids": found,
+            "documents": [self.rows[i][0] for i in found],
+            "metadatas": [self.rows[i][1] for i in found],
+        }
+
+    def upsert(self, ids, documents, metadatas, embeddings):
+        self._check_batch("upsert", ids)
+        for i, document, metadata, embedding in zip(ids, documents, metadatas, embeddings):
+            self.rows[i] = (document, metadata, embedding)
+
+    def delete(self, ids):
+        self._check_batch("delete", ids)
+        for i in ids:
+            self.rows.pop(i, None)
+
+
+class MemoryChroma:
+    def __init__(self, name, max_batch_size=None):
+        self._collection = MemoryCollection(name, max_batch_size)
+
+    def reset_collection(self):
+        self._collection = MemoryCollection(self._collection.name, self._collection.max_batch_size)
+
+
+class CountingEmbedder:
+    def __init__(self, dim=1):
+        self.dim = dim
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(text))] * self.dim for text in texts]
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    return IngestManifest(str(tmp_path / "manifest.sqlite3"))
+
+
+@pytest.fixture
+def join_index(tmp_path):
+    return JoinIndex(str(tmp_path / "join_index.sqlite3"))
+
+
+def api_rows(source, rows):
+    documents = [f"API ID: {api}\nPA: {pa}" for pa, api in rows]
+    metadatas = [{"pa_number": pa, "api_id": api} for pa, api in rows]
+    ids = [doc_id(source, "Sheet1", document) for document in documents]
+    return ids, documents, metadatas
+
+
+def test_sync_embeds_only_changed_rows(manifest, join_index):
+    chroma = MemoryChroma("api_list")
+    embedder = CountingEmbedder()
+
+    ids, documents, metadatas = api_rows("apis.xlsx", [("PA001", "CMM001"), ("PA002", "CMM002")])
+    result = sync_documents(chroma, manifest, "apis.xlsx", ids, documents, metadatas, embedder, join_index)
+    assert result == {"added": 2, "removed": 0, "unchanged": 0}
+    assert manifest.versions()["api_list"] == 1
+
+    # 같은 내용을 다시 적재하면 아무것도 바뀌지 않고 버전도 그대로
+    result = sync_documents(chroma, manifest, "apis.xlsx", ids, documents, metadatas, embedder, join_index)
+    assert result == {"added": 0, "removed": 0, "unchanged": 2}
+    assert manifest.versions()["api_list"] == 1
+    assert len(embedder.embedded) == 2
+
+    # 한 행이 바뀌면 새 행만 임베딩하고 사라진 행은 삭제
+    ids, documents, metadatas = api_rows("apis.xlsx", [("PA001", "CMM001"), ("PA002", "CMM003")])
+    result = sync_documents(chroma, manifest, "apis.xlsx", ids, documents, metadatas, embedder, join_index)
+    assert result == {"added": 1, "removed": 1, "unchanged": 1}
+    assert embedder.embedded[-1] == "API ID: CMM003\nPA: PA002"
+    assert set(chroma._collection.rows) == set(ids)
+    assert manifest.get_ids("api_list", "apis.xlsx") == set(ids)
+    assert manifest.versions()["api_list"] == 2
+
+    assert [api["api_id"] for api in join_index.lookup("PA002")["apis"]] == ["CMM003"]
+
+
+def test_sync_keeps_other_sources(manifest):
+    chroma = MemoryChroma("api_list")
+    embedder = CountingEmbedder()
+    a = api_rows("a.xlsx", [("PA001", "CMM001")])
+    b = api_rows("b.xlsx", [("PA002", "CMM002")])
+    sync_documents(chroma, manifest, "a.xlsx", *a, embedder)
+    sync_documents(chroma, manifest, "b.xlsx", *b, embedder)
+
+    result = sync_documents(chroma, manifest, "a.xlsx", [], [], [], embedder)
+    assert result == {"added": 0, "removed": 1, "unchanged": 0}
+    assert set(chroma._collection.rows) == set(b[0])
+
+
+def test_sync_batches_chroma_calls(manifest):
+    chroma = MemoryChroma("api_list", max_batch_size=3)
+    embedder = CountingEmbedder()
+    rows = api_rows("a.xlsx", [(f"PA{i:03}", f"CMM{i:03}") for i in range(7)])
+
+    result = sync_documents(chroma, manifest, "a.xlsx", *rows, embedder, batch_size=3)
+    assert result == {"added": 7, "removed": 0, "unchanged": 0}
+    assert [size for method, size in chroma._collection.calls if method == "upsert"] == [3, 3, 1]
+
+    result = sync_documents(chroma, manifest, "a.xlsx", [], [], [], embedder, batch_size=3)
+    assert result == {"added": 0, "removed": 7, "unchanged": 0}
+    assert chroma._collection.rows == {}
+
+
+def test_source_sync_deletes_stale_rows_once_at_finish(manifest, join_index):
+    chroma = MemoryChroma("api_list")
+    embedder = CountingEmbedder()
+    sync_documents(chroma, manifest, "a.xlsx", *api_rows("a.xlsx", [("PA001", "CMM001"), ("PA002", "CMM002")]),
+                   embedder, join_index)
+
+    sync = SourceSync(chroma, manifest, "a.xlsx", embedder, join_index)
+    assert sync.add(*api_rows("a.xlsx", [("PA001", "CMM001"), ("PA003", "CMM003")])) == 1
+    # 앞 묶음과 같은 행은 다시 세지 않음
+    assert sync.add(*api_rows("a.xlsx", [("PA003", "CMM003")])) == 0
+    # 끝나기 전에는 사라진 행도 남아 있음
+    assert join_index.lookup("PA002") is not None
+    assert len(chroma._collection.rows) == 3
+
+    assert sync.finish() == {"added": 1, "removed": 1, "unchanged": 1}
+    assert join_index.lookup("PA002") is None
+    assert len(chroma._collection.rows) == 2
+    assert manifest.versions()["api_list"] == 2
+
+
+def test_interrupted_source_sync_is_cleaned_up_next_time(manifest):
+    chroma = MemoryChroma("api_list")
+    embedder = CountingEmbedder()
+    sync = SourceSync(chroma, manifest, "a.xlsx", embedder)
+    sync.add(*api_rows("a.xlsx", [("PA001", "CMM001")]))  # finish() 전에 중단
+
+    result = sync_documents(chroma, manifest, "a.xlsx", *api_rows("a.xlsx", [("PA002", "CMM002")]), embedder)
+    assert result == {"added": 1, "removed": 1, "unchanged": 0}
+    assert len(chroma._collection.rows) == 1
+
+
+def test_join_index_apply_recomputes_affected_pa_numbers(join_index):
+    join_index.apply("pa_documents", added=[("p1", "", {"pa_number": "PA001", "pdf_filename": "a.pdf",
+                                                       "image_path": "page_1.png"})])
+    join_index.apply("api_list", added=[("a1", "API ID: CMM001", {"pa_number": "PA001", "api_id": "CMM001"})])
+    join_index.apply("api_spec", added=[("s1", "", {"api_id": "CMM001", "api_spec_ref": "a.xlsx::명세::CMM001"})])
+    join_index.apply("puml", added=[("u1", "", {"api_id": "CMM001", "png_path": "cmm001.png"})])
+
+    payload = join_index.lookup("PA001")
+    assert [page["image_path"] for page in payload["pages"]] == ["page_1.png"]
+    assert payload["specs"] == {"CMM001": {"api_spec_ref": "a.xlsx::명세::CMM001"}}
+    assert payload["umls"] == {"CMM001": "cmm001.png"}
+
+    # 명세가 삭제되면 그 API ID를 쓰는 PA 넘버의 조인 결과도 갱신
+    join_index.apply("api_spec", removed_ids=["s1"])
+    assert join_index.lookup("PA001")["specs"] == {}
+
+    # 페이지와 API 행이 모두 사라지면 조인 결과도 삭제
+    join_index.apply("pa_documents", removed_ids=["p1"])
+    join_index.apply("api_list", removed_ids=["a1"])
+    assert join_index.lookup("PA001") is None
+    assert join_index.is_empty() is False  # UML 행은 남아 있음
+
+    join_index.apply("unknown", added=[("x", "", {})])  # 조인 대상이 아닌 컬렉션은 무시
+
+
+def test_reindex_reembeds_stored_documents(manifest):
+    chroma = MemoryChroma("api_list")
+    ids, documents, metadatas = api_rows("apis.xlsx", [("PA001", "CMM001"), ("PA002", "CMM002")])
+    sync_documents(chroma, manifest, "apis.xlsx", ids, documents, metadatas, CountingEmbedder())
+    manifest.record_backend("api_list", "ollama:old")
+
+    embedder = CountingEmbedder(dim=3)
+    assert reindex_collection(chroma, manifest, embedder, batch_size=1) == 2
+    assert sorted(embedder.embedded) == sorted(documents)
+    assert {i: len(row[2]) for i, row in chroma._collection.rows.items()} == {i: 3 for i in ids}
+    assert chroma._collection.rows[ids[0]][1] == metadatas[0]
+    assert manifest.get_ids("api_list", "apis.xlsx") == set(ids)  # 문서 ID는 백엔드와 무관
+    assert manifest.versions()["api_list"] == 2
+
+    assert manifest.backend("api_list") == "ollama:old"
+    manifest.record_backend("api_list", "onnx:minilm")
+    assert manifest.backend("api_list") == "onnx:minilm"
+    assert manifest.backend("puml") is None
+
+
+def test_join_index_falls_back_to_inline_spec(join_index):
+    # 예전 적재분은 명세 참조 대신 명세 JSON을 metadata에 직접 가짐
+    join_index.apply("api_list", added=[("a1", "API ID: CMM001", {"pa_number": "PA001", "api_id": "CMM001"})])
+    join_index.apply("api_spec", added=[("s1", "", {"api_id": "CMM001", "api_spec_info": '{"설명": "조회"}'})])
+    assert join_index.lookup("PA001")["specs"] == {"CMM001": {"api_spec_info": '{"설명": "조회"}'}}
+
+    # 같은 API ID에 명세 참조 행이 생기면 참조를 우선 사용
+    join_index.apply("api_spec", added=[("s2", "", {"api_id": "CMM001", "api_spec_ref": "a.xlsx::명세::CMM001"})])
+    assert join_index.lookup("PA001")["specs"] == {"CMM001": {"api_spec_ref": "a.xlsx::명세::CMM001"}}